@@ -0,0 +1,96 @@
+import threading
+import time
+
+
+class SessionAdmissionState:
+    """Per-session bookkeeping for frame admission"""
+
+    def __init__(self):
+        self.credit = 0.0
+        self.last_admitted = None
+        self.last_seen = None
+        self.seen = 0
+        self.admitted = 0
+
+
+class FrameAdmission:
+    """Decides whether a frame is analyzed before its payload is touched
+
+    ``base_skip_ratio`` is the fraction of frames dropped when the inference
+    queue is idle (0.5 keeps every other frame). As the queue grows from
+    ``queue_low`` to ``queue_high`` the ratio rises towards
+    ``max_skip_ratio``. ``max_fps`` caps admitted frames per session.
+    """
+
+    def __init__(self, queue_depth=None, base_skip_ratio=0.5, max_skip_ratio=0.9,
+                 queue_low=8, queue_high=32, max_fps=4.0, session_ttl=300.0):
+        self.queue_depth = queue_depth or (lambda: 0)
+        self.base_skip_ratio = min(max(float(base_skip_ratio), 0.0), 1.0)
+        self.max_skip_ratio = min(max(float(max_skip_ratio), self.base_skip_ratio), 1.0)
+        self.queue_low = int(queue_low)
+        self.queue_high = max(int(queue_high), self.queue_low + 1)
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.session_ttl = session_ttl
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._counts = {'admitted': 0, 'skipped': 0, 'rate_limited': 0}
+
+    def skip_ratio(self):
+        """Current skip ratio given the inference queue depth"""
+        depth = self.queue_depth()
+        if depth <= self.queue_low:
+            return self.base_skip_ratio
+        pressure = min(1.0, (depth - self.queue_low) / (self.queue_high - self.queue_low))
+        return self.base_skip_ratio + (self.max_skip_ratio - self.base_skip_ratio) * pressure
+
+    def admit(self, session_id, now=None):
+        """Return (admitted, reason) for the next frame of a session"""
+        now = time.monotonic() if now is None else now
+        ratio = self.skip_ratio()
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = SessionAdmissionState()
+            state.seen += 1
+            state.last_seen = now
+
+            # Keep a steady fraction of frames instead of bursts
+            state.credit = min(state.credit + (1.0 - ratio), 1.0)
+            if state.credit < 1.0 - 1e-9:
+                self._counts['skipped'] += 1
+                decision = (False, 'skipped')
+            elif state.last_admitted is not None and now - state.last_admitted < self.min_interval:
+                self._counts['rate_limited'] += 1
+                decision = (False, 'rate_limited')
+            else:
+                state.credit -= 1.0
+                state.last_admitted = now
+                state.admitted += 1
+                self._counts['admitted'] += 1
+                decision = (True, 'admitted')
+
+            if now - self._last_prune > self.session_ttl:
+                self._prune(now)
+            return decision
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _prune(self, now):
+        stale = [sid for sid, state in self._sessions.items()
+                 if now - state.last_seen > self.session_ttl]
+        for sid in stale:
+            del self._sessions[sid]
+        self._last_prune = now
+
+    def stats(self):
+        with self._lock:
+            return {
+                'skip_ratio': round(self.skip_ratio(), 3),
+                'active_sessions': len(self._sessions),
+                **self._counts,
+            }
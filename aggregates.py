@@ -0,0 +1,292 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import case, delete, event, func, inspect, literal, select, union_all, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+SUMMARY_ID = 1
+DAILY_COLUMNS = ('candidates', 'interviews', 'completed_interviews', 'violations', 'tab_change_violations')
+
+
+class StatisticsAggregator:
+    """Summary, per-day and per-job counters kept in step with the source tables
+
+    Every ORM flush that adds, changes or deletes a candidate, job,
+    interview or violation row also applies the matching ``col = col + n``
+    deltas to the statistics tables in the same transaction, so the
+    counters commit or roll back together with the rows they count and
+    serving them is a primary-key read however large the tables grow.
+    ``rebuild`` recomputes everything from the source tables with grouped
+    queries; it runs on first use and can be triggered by an admin.
+    Writes that bypass the ORM (bulk ``update()``/``delete()`` on the
+    source tables) are not seen and need a rebuild.
+    """
+
+    def __init__(self, db, candidate, job, interview, violation, summary, daily, by_job):
+        self.db = db
+        self.candidate = candidate
+        self.job = job
+        self.interview = interview
+        self.violation = violation
+        self.summary_model = summary
+        self.daily_model = daily
+        self.by_job_model = by_job
+
+        # Attributes whose old value is needed to compute a delta on update
+        self._tracked = {
+            candidate: ('added_date',),
+            job: ('is_active',),
+            interview: ('status', 'date', 'job_id'),
+            violation: ('violation_type', 'timestamp'),
+        }
+        self._lock = threading.Lock()
+        self._flushes = 0
+        self._rebuilds = 0
+        self._last_rebuild_ms = 0.0
+
+    def install(self):
+        for model, attributes in self._tracked.items():
+            for name in attributes:
+                # Load the previous value on assignment so history is never empty
+                event.listen(getattr(model, name), 'set', _keep_history, active_history=True)
+        event.listen(self.db.session, 'after_flush', self._after_flush)
+
+    def _contributions(self, model, values):
+        """Counter increments one row with ``values`` contributes, keyed by (table, key, column)"""
+        out = {}
+        if model is self.candidate:
+            out[('summary', SUMMARY_ID, 'total_candidates')] = 1
+            day = _day(values['added_date'])
+            if day is not None:
+                out[('daily', day, 'candidates')] = 1
+        elif model is self.job:
+            if values['is_active']:
+                out[('summary', SUMMARY_ID, 'total_jobs')] = 1
+        elif model is self.interview:
+            completed = int(values['status'] == 'Completed')
+            scheduled = int(values['status'] == 'Scheduled')
+            out[('summary', SUMMARY_ID, 'total_interviews')] = 1
+            out[('summary', SUMMARY_ID, 'completed_interviews')] = completed
+            out[('summary', SUMMARY_ID, 'scheduled_interviews')] = scheduled
+            day = _day(values['date'])
+            if day is not None:
+                out[('daily', day, 'interviews')] = 1
+                out[('daily', day, 'completed_interviews')] = completed
+            if values['job_id'] is not None:
+                out[('by_job', values['job_id'], 'interviews')] = 1
+                out[('by_job', values['job_id'], 'completed_interviews')] = completed
+                out[('by_job', values['job_id'], 'scheduled_interviews')] = scheduled
+        elif model is self.violation:
+            tab_change = int(values['violation_type'] == 'tab_change')
+            out[('summary', SUMMARY_ID, 'total_violations')] = 1
+            out[('summary', SUMMARY_ID, 'tab_change_violations')] = tab_change
+            day = _day(values['timestamp'])
+            if day is not None:
+                out[('daily', day, 'violations')] = 1
+                out[('daily', day, 'tab_change_violations')] = tab_change
+        return out
+
+    def _after_flush(self, db_session, flush_context):
+        # new/dirty/deleted and attribute history still describe this flush here
+        deltas = defaultdict(int)
+        for obj, sign in [(o, 1) for o in db_session.new] + [(o, -1) for o in db_session.deleted]:
+            attributes = self._tracked.get(type(obj))
+            if attributes is not None:
+                values = {name: getattr(obj, name) for name in attributes}
+                for key, amount in self._contributions(type(obj), values).items():
+                    deltas[key] += sign * amount
+
+        for obj in db_session.dirty:
+            attributes = self._tracked.get(type(obj))
+            if attributes is None:
+                continue
+            state = inspect(obj)
+            old, changed = {}, False
+            for name in attributes:
+                history = state.attrs[name].history
+                current = getattr(obj, name)
+                if history.deleted:
+                    old[name] = history.deleted[0]
+                    changed = changed or old[name] != current
+                else:
+                    old[name] = current
+            if not changed:
+                continue
+            new = {name: getattr(obj, name) for name in attributes}
+            for key, amount in self._contributions(type(obj), old).items():
+                deltas[key] -= amount
+            for key, amount in self._contributions(type(obj), new).items():
+                deltas[key] += amount
+
+        deltas = {key: amount for key, amount in deltas.items() if amount}
+        if deltas:
+            self._apply(db_session.connection(), deltas)
+            with self._lock:
+                self._flushes += 1
+
+    def _apply(self, connection, deltas):
+        grouped = defaultdict(dict)
+        for (table, key, column), amount in deltas.items():
+            grouped[(table, key)][column] = amount
+
+        for (table, key), columns in grouped.items():
+            if table == 'summary':
+                # No summary row yet means it has never been built; rebuild() counts these rows
+                model = self.summary_model
+                connection.execute(
+                    update(model).where(model.id == key)
+                    .values({c: getattr(model, c) + amount for c, amount in columns.items()})
+                )
+                continue
+            model, key_column = ((self.daily_model, 'day') if table == 'daily'
+                                 else (self.by_job_model, 'job_id'))
+            statement = sqlite_insert(model).values({key_column: key, **columns})
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[key_column],
+                set_={c: getattr(model, c) + getattr(statement.excluded, c) for c in columns}
+            ))
+
+    def grouped_counts(self, connection=None):
+        """Summary counters from the source tables in a single grouped query"""
+        candidate, job, interview, violation = self.candidate, self.job, self.interview, self.violation
+        query = union_all(
+            select(literal('candidates'), func.count(), literal(0), literal(0)).select_from(candidate),
+            select(literal('jobs'), func.count(), literal(0), literal(0)).where(job.is_active.is_(True)),
+            select(literal('interviews'), func.count(),
+                   func.coalesce(func.sum(case((interview.status == 'Completed', 1), else_=0)), 0),
+                   func.coalesce(func.sum(case((interview.status == 'Scheduled', 1), else_=0)), 0)),
+            select(literal('violations'), func.count(),
+                   func.coalesce(func.sum(case((violation.violation_type == 'tab_change', 1), else_=0)), 0),
+                   literal(0)),
+        )
+        rows = {row[0]: row[1:] for row in (connection or self.db.session).execute(query)}
+        return {
+            'total_candidates': rows['candidates'][0],
+            'total_jobs': rows['jobs'][0],
+            'total_interviews': rows['interviews'][0],
+            'completed_interviews': rows['interviews'][1],
+            'scheduled_interviews': rows['interviews'][2],
+            'total_violations': rows['violations'][0],
+            'tab_change_violations': rows['violations'][1],
+        }
+
+    def _grouped_daily(self, connection):
+        candidate, interview, violation = self.candidate, self.interview, self.violation
+        days = defaultdict(lambda: defaultdict(int))
+        candidate_day = func.date(candidate.added_date)
+        for day, count in connection.execute(
+                select(candidate_day, func.count()).where(candidate.added_date.isnot(None)).group_by(candidate_day)):
+            days[_day(day)]['candidates'] = count
+        for day, count, completed in connection.execute(
+                select(interview.date, func.count(),
+                       func.sum(case((interview.status == 'Completed', 1), else_=0)))
+                .where(interview.date.isnot(None)).group_by(interview.date)):
+            days[_day(day)]['interviews'] = count
+            days[_day(day)]['completed_interviews'] = completed
+        violation_day = func.date(violation.timestamp)
+        for day, count, tab_changes in connection.execute(
+                select(violation_day, func.count(),
+                       func.sum(case((violation.violation_type == 'tab_change', 1), else_=0)))
+                .where(violation.timestamp.isnot(None)).group_by(violation_day)):
+            days[_day(day)]['violations'] = count
+            days[_day(day)]['tab_change_violations'] = tab_changes
+        return [{'day': day, **{c: counts[c] for c in DAILY_COLUMNS}} for day, counts in days.items()]
+
+    def _grouped_by_job(self, connection):
+        interview = self.interview
+        rows = connection.execute(
+            select(interview.job_id, func.count(),
+                   func.sum(case((interview.status == 'Completed', 1), else_=0)),
+                   func.sum(case((interview.status == 'Scheduled', 1), else_=0)))
+            .where(interview.job_id.isnot(None)).group_by(interview.job_id)
+        )
+        return [{'job_id': job_id, 'interviews': count, 'completed_interviews': completed,
+                 'scheduled_interviews': scheduled} for job_id, count, completed, scheduled in rows]
+
+    def rebuild(self):
+        """Recompute all statistics tables from the source tables and commit"""
+        started = time.perf_counter()
+        db_session = self.db.session
+        try:
+            connection = db_session.connection()
+            # Deleting first takes the write lock, so the counts below cannot
+            # miss a write that commits while the rebuild is running
+            connection.execute(delete(self.summary_model))
+            connection.execute(delete(self.daily_model))
+            connection.execute(delete(self.by_job_model))
+            counts = self.grouped_counts(connection)
+            daily = self._grouped_daily(connection)
+            by_job = self._grouped_by_job(connection)
+            connection.execute(sqlite_insert(self.summary_model).values(
+                id=SUMMARY_ID, rebuilt_at=datetime.utcnow(), **counts))
+            if daily:
+                connection.execute(sqlite_insert(self.daily_model), daily)
+            if by_job:
+                connection.execute(sqlite_insert(self.by_job_model), by_job)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            raise
+        with self._lock:
+            self._rebuilds += 1
+            self._last_rebuild_ms = (time.perf_counter() - started) * 1000.0
+        return counts
+
+    def summary(self):
+        """Cached summary counters, building them on first use"""
+        row = self.db.session.get(self.summary_model, SUMMARY_ID)
+        if row is None:
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Error rebuilding statistics: {e}")
+                return self.grouped_counts()
+            row = self.db.session.get(self.summary_model, SUMMARY_ID)
+        counts = {name: getattr(row, name) for name in (
+            'total_candidates', 'total_jobs', 'total_interviews', 'completed_interviews',
+            'scheduled_interviews', 'total_violations', 'tab_change_violations')}
+        counts['object_violations'] = counts['total_violations'] - counts['tab_change_violations']
+        return counts
+
+    def daily(self, start=None, end=None):
+        """Per-day rows between ``start`` and ``end`` (inclusive), newest first"""
+        query = self.daily_model.query
+        if start is not None:
+            query = query.filter(self.daily_model.day >= start)
+        if end is not None:
+            query = query.filter(self.daily_model.day <= end)
+        return query.order_by(self.daily_model.day.desc()).all()
+
+    def by_job(self):
+        return self.by_job_model.query.order_by(self.by_job_model.interviews.desc()).all()
+
+    def verify(self):
+        """Compare the cached summary with a fresh grouped count; returns the mismatches"""
+        cached = self.summary()
+        fresh = self.grouped_counts()
+        return {name: {'cached': cached[name], 'actual': value}
+                for name, value in fresh.items() if cached[name] != value}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'flushes_applied': self._flushes,
+                'rebuilds': self._rebuilds,
+                'last_rebuild_ms': round(self._last_rebuild_ms, 3),
+            }
+
+
+def _keep_history(target, value, oldvalue, initiator):
+    pass
+
+
+def _day(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
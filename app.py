@@ -1,5 +1,6 @@
 from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
 import json
+import hashlib
 import random
 import datetime
 import uuid
@@ -13,10 +14,30 @@ import threading
 import time
 import os
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
+from inference import InferenceScheduler
+from inference_pool import InferenceProcessPool, parse_cpu_sets
+from admission import FrameAdmission
+from detection import DetectionFilter
+from session_state import SessionStateCache
+from evidence import EvidenceWriter
+from episodes import EpisodeTracker, difference_hash
+from scene_gate import SceneGate
+from preprocess import LetterboxPreprocessor
+from tracking import PersonTracker
+from metrics import MetricsRegistry
+from profiling import RequestProfiler, parse_route_rates
+from emotion import EmotionAnalyzer
+from storage import GroupCommitWriter, configure_sqlite
+from migrations import migrate
+from pagination import keyset_page
+from aggregates import StatisticsAggregator
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here-change-this-in-production'
@@ -26,6 +47,63 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///interview_system.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
+# WAL journaling and a busy timeout so concurrent interviews do not hit
+# 'database is locked'; hot-path inserts are grouped by a single writer
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['DB_WRITER_MAX_BATCH'] = int(os.environ.get('DB_WRITER_MAX_BATCH', 256))
+app.config['DB_WRITER_MAX_DELAY_MS'] = float(os.environ.get('DB_WRITER_MAX_DELAY_MS', 5))
+
+with app.app_context():
+    configure_sqlite(db.engine, busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+db_writer = GroupCommitWriter(
+    app, db,
+    max_batch=app.config['DB_WRITER_MAX_BATCH'],
+    max_delay_ms=app.config['DB_WRITER_MAX_DELAY_MS']
+)
+
+# Prometheus metrics served at /metrics; with a shared directory every
+# gunicorn worker reports totals for the whole server
+app.config['METRICS_MULTIPROC_DIR'] = os.environ.get('METRICS_MULTIPROC_DIR', '')
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+metrics = MetricsRegistry(
+    prefix='interview_',
+    multiprocess_dir=app.config['METRICS_MULTIPROC_DIR'],
+    flush_interval=app.config['METRICS_FLUSH_INTERVAL']
+)
+stage_seconds = metrics.histogram('frame_stage_seconds', 'Time spent in each frame analysis stage', ['stage'])
+frames_received = metrics.counter('frames_received', 'Frames posted for analysis')
+frames_skipped = metrics.counter('frames_skipped', 'Frames dropped before decoding', ['reason'])
+frames_analyzed = metrics.counter('frames_analyzed', 'Frames analyzed, by where the result came from', ['source'])
+violations_flagged = metrics.counter('violations_flagged', 'Violations found in analyzed frames', ['violation_type'])
+requests_in_flight = metrics.gauge('requests_in_flight', 'HTTP requests currently being handled')
+
+@event.listens_for(db.session, 'before_commit')
+def _commit_started(db_session):
+    db_session.info['commit_started'] = time.perf_counter()
+
+@event.listens_for(db.session, 'after_commit')
+def _commit_finished(db_session):
+    started = db_session.info.pop('commit_started', None)
+    if started is not None:
+        stage_seconds.observe(time.perf_counter() - started, stage='db_commit')
+
+# Sampled request profiling (cProfile + SQL timings), toggled at /admin/profiling
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', '0') == '1'
+app.config['PROFILING_SAMPLE_RATE'] = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.05))
+app.config['PROFILING_ROUTE_RATES'] = os.environ.get('PROFILING_ROUTE_RATES', '')  # 'dashboard=0.5,detect_cheating_frame=0.01'
+app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR', 'profiles')
+app.config['PROFILING_MAX_CAPTURES'] = int(os.environ.get('PROFILING_MAX_CAPTURES', 200))
+
+request_profiler = RequestProfiler(
+    app,
+    directory=app.config['PROFILING_DIR'],
+    enabled=app.config['PROFILING_ENABLED'],
+    sample_rate=app.config['PROFILING_SAMPLE_RATE'],
+    route_rates=parse_route_rates(app.config['PROFILING_ROUTE_RATES']),
+    max_captures=app.config['PROFILING_MAX_CAPTURES']
+)
+
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
@@ -33,11 +111,121 @@ if not os.path.exists(UPLOAD_FOLDER):
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 # Initialize YOLO model
+# DETECTOR_WEIGHTS selects the backend: a PyTorch .pt file, an exported .onnx
+# file, or an OpenVINO model directory (see tools/export_detector.py)
+app.config['DETECTOR_WEIGHTS'] = os.environ.get('DETECTOR_WEIGHTS', 'yolov8n.pt')
 try:
-    model = YOLO('yolov8n.pt')
+    model = YOLO(app.config['DETECTOR_WEIGHTS'], task='detect')
 except:
     model = None
-    print("YOLO model not found. Please download yolov8n.pt")
+    print(f"YOLO model not found. Please download or export {app.config['DETECTOR_WEIGHTS']}")
+
+# Batch frames from concurrent sessions into a single YOLO call
+app.config['INFERENCE_MAX_BATCH_SIZE'] = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 8))
+app.config['INFERENCE_MAX_WAIT_MS'] = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 20))
+
+# 'inline' runs YOLO in this process; 'process_pool' hands frames to worker
+# processes through a shared-memory ring
+app.config['INFERENCE_BACKEND'] = os.environ.get('INFERENCE_BACKEND', 'inline')
+app.config['INFERENCE_POOL_WORKERS'] = int(os.environ.get('INFERENCE_POOL_WORKERS', 2))
+app.config['INFERENCE_POOL_CPUS'] = os.environ.get('INFERENCE_POOL_CPUS', '')  # '', 'auto' or '0-3;4-7'
+
+# Frames are letterboxed to INFERENCE_SIZE x INFERENCE_SIZE before inference
+app.config['INFERENCE_SIZE'] = int(os.environ.get('INFERENCE_SIZE', 640))
+preprocessor = LetterboxPreprocessor(app.config['INFERENCE_SIZE'])
+
+inference_pool = None
+
+def run_model_batch(frames):
+    if inference_pool is not None:
+        return inference_pool.infer_batch(frames)
+    return model(frames, verbose=False, **inference_kwargs)
+
+inference_scheduler = InferenceScheduler(
+    run_model_batch,
+    max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS'],
+    concurrency=app.config['INFERENCE_POOL_WORKERS'] if app.config['INFERENCE_BACKEND'] == 'process_pool' else 1
+)
+
+# Violation evidence frames are written by a background pool
+app.config['EVIDENCE_WORKERS'] = int(os.environ.get('EVIDENCE_WORKERS', 2))
+app.config['EVIDENCE_QUEUE_SIZE'] = int(os.environ.get('EVIDENCE_QUEUE_SIZE', 64))
+app.config['EVIDENCE_FORMAT'] = os.environ.get('EVIDENCE_FORMAT', 'JPEG')
+app.config['EVIDENCE_QUALITY'] = int(os.environ.get('EVIDENCE_QUALITY', 90))
+app.config['EVIDENCE_OVERFLOW'] = os.environ.get('EVIDENCE_OVERFLOW', 'drop_oldest')
+
+app.config['EVIDENCE_STATE_DIR'] = os.environ.get('EVIDENCE_STATE_DIR', os.path.join('frames', '.evidence'))
+app.config['EVIDENCE_STATE_TTL_SECONDS'] = float(os.environ.get('EVIDENCE_STATE_TTL_SECONDS', 86400))
+
+def discard_evidence(job):
+    """Clear image_path on rows that already point at a dropped or failed evidence file"""
+    def clear(db_session):
+        for model in (CheatingViolation, ViolationEpisode):
+            db_session.execute(
+                update(model)
+                .where(model.session_id == job.session_id, model.image_path == job.path)
+                .values(image_path=None)
+            )
+    # Queued after the job that inserted the rows, so it always finds them
+    db_writer.submit(clear, wait=False)
+
+evidence_writer = EvidenceWriter(
+    workers=app.config['EVIDENCE_WORKERS'],
+    max_queue=app.config['EVIDENCE_QUEUE_SIZE'],
+    image_format=app.config['EVIDENCE_FORMAT'],
+    quality=app.config['EVIDENCE_QUALITY'],
+    overflow=app.config['EVIDENCE_OVERFLOW'],
+    observe_write=lambda seconds: stage_seconds.observe(seconds, stage='evidence_write'),
+    # Shared by all workers so any of them can answer /evidence/<id>
+    state_dir=app.config['EVIDENCE_STATE_DIR'],
+    state_ttl=app.config['EVIDENCE_STATE_TTL_SECONDS'],
+    on_discard=discard_evidence
+)
+
+# Static scenes reuse the session's last detection result
+app.config['SCENE_CHANGE_THRESHOLD'] = float(os.environ.get('SCENE_CHANGE_THRESHOLD', 4.0))
+app.config['SCENE_MAX_STALENESS_SECONDS'] = float(os.environ.get('SCENE_MAX_STALENESS_SECONDS', 2.0))
+
+scene_gate = SceneGate(
+    threshold=app.config['SCENE_CHANGE_THRESHOLD'],
+    max_staleness=app.config['SCENE_MAX_STALENESS_SECONDS']
+)
+
+# Tracking mode: full detection only on keyframes, person boxes tracked in between
+app.config['TRACKING_MODE'] = os.environ.get('TRACKING_MODE', '0') == '1'
+app.config['TRACKING_MIN_INTERVAL'] = int(os.environ.get('TRACKING_MIN_INTERVAL', 2))
+app.config['TRACKING_MAX_INTERVAL'] = int(os.environ.get('TRACKING_MAX_INTERVAL', 12))
+app.config['TRACKING_MIN_SCORE'] = float(os.environ.get('TRACKING_MIN_SCORE', 0.6))
+
+person_tracker = PersonTracker(
+    min_interval=app.config['TRACKING_MIN_INTERVAL'],
+    max_interval=app.config['TRACKING_MAX_INTERVAL'],
+    min_score=app.config['TRACKING_MIN_SCORE']
+) if app.config['TRACKING_MODE'] else None
+
+# Client capture profiles for binary frame ingestion
+CAPTURE_PROFILES = {
+    'low': {'width': 320, 'quality': 0.7},
+    'medium': {'width': 640, 'quality': 0.8},
+    'high': {'width': 1280, 'quality': 0.92}
+}
+app.config['CAPTURE_PROFILE'] = os.environ.get('CAPTURE_PROFILE', 'medium')
+app.config['MAX_FRAME_BYTES'] = int(os.environ.get('MAX_FRAME_BYTES', 2 * 1024 * 1024))
+
+# Decide which frames to analyze before decoding them
+app.config['FRAME_SKIP_RATIO'] = float(os.environ.get('FRAME_SKIP_RATIO', 0.5))
+app.config['FRAME_MAX_SKIP_RATIO'] = float(os.environ.get('FRAME_MAX_SKIP_RATIO', 0.9))
+app.config['FRAME_MAX_FPS_PER_SESSION'] = float(os.environ.get('FRAME_MAX_FPS_PER_SESSION', 4))
+
+frame_admission = FrameAdmission(
+    queue_depth=inference_scheduler.queue_depth,
+    base_skip_ratio=app.config['FRAME_SKIP_RATIO'],
+    max_skip_ratio=app.config['FRAME_MAX_SKIP_RATIO'],
+    queue_low=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    queue_high=app.config['INFERENCE_MAX_BATCH_SIZE'] * 4,
+    max_fps=app.config['FRAME_MAX_FPS_PER_SESSION']
+)
 
 # Database Models
 class User(db.Model):
@@ -64,6 +252,11 @@ class Candidate(db.Model):
     added_date = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
+    # Indexes are also created for existing databases by migrations.py
+    __table_args__ = (
+        db.Index('ix_candidate_added_date', 'added_date'),
+    )
+    
     # Relationships
     interviews = db.relationship('Interview', backref='candidate', lazy=True)
 
@@ -102,6 +295,14 @@ class Interview(db.Model):
     tab_changes = db.Column(db.Integer, default=0)
     recommendation = db.Column(db.String(100))
     completed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_interview_candidate_date', 'candidate_id', 'date'),
+        db.Index('ix_interview_job_date', 'job_id', 'date'),
+        db.Index('ix_interview_date', 'date'),
+        db.Index('ix_interview_status_created', 'status', 'created_date'),
+        db.Index('ix_interview_created_date', 'created_date'),
+    )
 
 class InterviewSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -113,6 +314,10 @@ class InterviewSession(db.Model):
     current_question_index = db.Column(db.Integer, default=0)
     tab_changes = db.Column(db.Integer, default=0)
     frame_counter = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_interview_session_status', 'status'),
+    )
 
 class InterviewQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -121,6 +326,10 @@ class InterviewQuestion(db.Model):
     question_type = db.Column(db.String(20), nullable=False)  # 'technical', 'behavioral'
     question_number = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_interview_question_session_number', 'session_id', 'question_number'),
+    )
 
 class InterviewAnswer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -128,6 +337,10 @@ class InterviewAnswer(db.Model):
     question_id = db.Column(db.Integer, db.ForeignKey('interview_question.id'), nullable=False)
     answer = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_interview_answer_session_question', 'session_id', 'question_id'),
+    )
 
 class CheatingViolation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -138,6 +351,94 @@ class CheatingViolation(db.Model):
     person_count = db.Column(db.Integer)  # for multiple persons
     image_path = db.Column(db.String(255))  # saved image path
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_cheating_violation_session_type', 'session_id', 'violation_type'),
+        db.Index('ix_cheating_violation_type', 'violation_type'),
+    )
+
+class ViolationEpisode(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(36), db.ForeignKey('interview_session.session_id'), nullable=False)
+    violation_id = db.Column(db.Integer, db.ForeignKey('cheating_violation.id'), nullable=False)
+    violation_type = db.Column(db.String(50), nullable=False)  # 'object_detected', 'multiple_persons'
+    object_name = db.Column(db.String(50))
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)
+    frame_count = db.Column(db.Integer, default=1)
+    peak_confidence = db.Column(db.Float)
+    peak_person_count = db.Column(db.Integer)
+    evidence_count = db.Column(db.Integer, default=0)
+    image_path = db.Column(db.String(255))  # latest distinct evidence frame
+    is_open = db.Column(db.Boolean, default=True)
+    
+    # Relationships
+    violation = db.relationship('CheatingViolation', backref=db.backref('episode', uselist=False))
+    
+    __table_args__ = (
+        db.Index('ix_violation_episode_session_started', 'session_id', 'started_at'),
+    )
+
+# Statistics tables maintained by StatisticsAggregator
+class StatsSummary(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # single row, id 1
+    total_candidates = db.Column(db.Integer, nullable=False, default=0)
+    total_jobs = db.Column(db.Integer, nullable=False, default=0)  # active jobs
+    total_interviews = db.Column(db.Integer, nullable=False, default=0)
+    completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+    scheduled_interviews = db.Column(db.Integer, nullable=False, default=0)
+    total_violations = db.Column(db.Integer, nullable=False, default=0)
+    tab_change_violations = db.Column(db.Integer, nullable=False, default=0)
+    rebuilt_at = db.Column(db.DateTime)
+
+class StatsDaily(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    candidates = db.Column(db.Integer, nullable=False, default=0)  # by added_date
+    interviews = db.Column(db.Integer, nullable=False, default=0)  # by interview date
+    completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+    violations = db.Column(db.Integer, nullable=False, default=0)  # by timestamp
+    tab_change_violations = db.Column(db.Integer, nullable=False, default=0)
+
+class StatsByJob(db.Model):
+    job_id = db.Column(db.Integer, db.ForeignKey('job_requirement.id'), primary_key=True)
+    interviews = db.Column(db.Integer, nullable=False, default=0)
+    completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+    scheduled_interviews = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    job = db.relationship('JobRequirement')
+
+class InterviewResult(db.Model):
+    """Results of a finished session, computed once and never modified"""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(36), db.ForeignKey('interview_session.session_id'), unique=True, nullable=False)
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'))
+    started_at = db.Column(db.DateTime)
+    ended_at = db.Column(db.DateTime)
+    questions_answered = db.Column(db.Integer, nullable=False)
+    technical_score = db.Column(db.Integer, nullable=False)
+    behavioral_score = db.Column(db.Integer, nullable=False)
+    integrity_score = db.Column(db.Integer, nullable=False)
+    overall_score = db.Column(db.Float, nullable=False)
+    cheating_violations = db.Column(db.Integer, nullable=False)
+    tab_changes = db.Column(db.Integer, nullable=False)
+    recommendation = db.Column(db.String(100))
+    payload = db.Column(db.Text, nullable=False)  # JSON body served by get_interview_results
+    etag = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    interview = db.relationship('Interview', backref=db.backref('result', uselist=False))
+
+# Bring existing database files up to the current schema version
+with app.app_context():
+    migrate(db.engine)
+
+statistics = StatisticsAggregator(
+    db, Candidate, JobRequirement, Interview, CheatingViolation,
+    summary=StatsSummary, daily=StatsDaily, by_job=StatsByJob
+)
+statistics.install()
 
 # Sample interview questions
 INTERVIEW_QUESTIONS = {
@@ -170,6 +471,105 @@ INTERVIEW_QUESTIONS = {
 # Cheating detection classes
 CHEATING_OBJECTS = ['cell phone', 'book', 'laptop', 'tablet']
 PERSON_CLASS = 'person'
+DETECTION_CONFIDENCE = 0.5
+
+# Class IDs are resolved once; unknown names (e.g. 'tablet' on COCO) are ignored
+detection_filter = DetectionFilter(
+    model.names, PERSON_CLASS, CHEATING_OBJECTS, conf=DETECTION_CONFIDENCE
+) if model else None
+inference_kwargs = dict(detection_filter.model_kwargs(), imgsz=app.config['INFERENCE_SIZE']) if model else {}
+
+if model and app.config['INFERENCE_BACKEND'] == 'process_pool':
+    inference_pool = InferenceProcessPool(
+        app.config['DETECTOR_WEIGHTS'],
+        workers=app.config['INFERENCE_POOL_WORKERS'],
+        model_kwargs=inference_kwargs,
+        cpus=parse_cpu_sets(app.config['INFERENCE_POOL_CPUS'], app.config['INFERENCE_POOL_WORKERS']),
+        max_frame=(app.config['INFERENCE_SIZE'], app.config['INFERENCE_SIZE'])
+    )
+
+def warm_up_model():
+    """Run one inference so lazy model setup happens before serving traffic"""
+    if not model:
+        return
+    started = time.time()
+    if inference_pool is not None:
+        # Pool workers warm themselves up before reporting ready
+        inference_pool.start()
+    else:
+        size = app.config['INFERENCE_SIZE']
+        run_model_batch([np.zeros((size, size, 3), dtype=np.uint8)])
+    print(f"YOLO model warmed up in {time.time() - started:.2f}s (pid {os.getpid()})")
+
+# Server-side emotion analysis on the detector's person boxes (needs deepface)
+app.config['EMOTION_ANALYSIS'] = os.environ.get('EMOTION_ANALYSIS', '0') == '1'
+app.config['EMOTION_MAX_BATCH_SIZE'] = int(os.environ.get('EMOTION_MAX_BATCH_SIZE', 32))
+app.config['EMOTION_MAX_WAIT_MS'] = float(os.environ.get('EMOTION_MAX_WAIT_MS', 10))
+app.config['EMOTION_MAX_FACES'] = int(os.environ.get('EMOTION_MAX_FACES', 4))
+
+emotion_analyzer = EmotionAnalyzer(max_faces=app.config['EMOTION_MAX_FACES']) if app.config['EMOTION_ANALYSIS'] else None
+
+# One scheduler item per frame holds all of its faces
+emotion_scheduler = InferenceScheduler(
+    emotion_analyzer.predict_batch,
+    max_batch_size=app.config['EMOTION_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['EMOTION_MAX_WAIT_MS']
+) if emotion_analyzer else None
+
+def warm_up_emotion_model():
+    """Load the emotion model in this process (TensorFlow is not fork-safe)"""
+    global emotion_analyzer
+    if not emotion_analyzer:
+        return
+    started = time.time()
+    try:
+        emotion_analyzer.load()
+    except Exception as e:
+        emotion_analyzer = None
+        print(f"Emotion model not loaded, disabling emotion analysis: {e}")
+        return
+    print(f"Emotion model loaded in {time.time() - started:.2f}s (pid {os.getpid()})")
+
+# Under gunicorn --preload this runs once in the master and is shared by forked
+# workers; inference pools are started per worker instead
+if os.environ.get('MODEL_WARMUP', '1') == '1' and inference_pool is None:
+    warm_up_model()
+
+# Consecutive detections are merged into episodes with deduplicated evidence.
+# Open episodes are per worker; see EpisodeTracker for multi-worker caveats
+app.config['VIOLATION_EPISODE_GAP_SECONDS'] = float(os.environ.get('VIOLATION_EPISODE_GAP_SECONDS', 3.0))
+app.config['EVIDENCE_HASH_DISTANCE'] = int(os.environ.get('EVIDENCE_HASH_DISTANCE', 10))
+
+episode_tracker = EpisodeTracker(
+    gap_seconds=app.config['VIOLATION_EPISODE_GAP_SECONDS'],
+    hash_distance=app.config['EVIDENCE_HASH_DISTANCE']
+)
+
+# Hot per-session counters live in memory and are flushed in batches
+app.config['SESSION_STATE_FLUSH_INTERVAL'] = float(os.environ.get('SESSION_STATE_FLUSH_INTERVAL', 2.0))
+
+session_state = SessionStateCache(
+    app, db, InterviewSession,
+    fields=('frame_counter', 'tab_changes'),
+    flush_interval=app.config['SESSION_STATE_FLUSH_INTERVAL']
+)
+
+# Gauges read at scrape time
+metrics.gauge('active_sessions', 'Interview sessions with status active',
+              function=lambda: InterviewSession.query.filter_by(status='active').count(),
+              multiprocess_mode='local')
+metrics.gauge('inference_queue_depth', 'Frames waiting for YOLO', function=inference_scheduler.queue_depth)
+metrics.gauge('evidence_queue_depth', 'Evidence frames waiting to be written', function=evidence_writer.queue_depth)
+metrics.gauge('session_state_flush_lag_seconds', 'Age of the oldest unflushed session counter',
+              function=session_state.flush_lag, multiprocess_mode='max')
+
+@app.before_request
+def _track_request_started():
+    requests_in_flight.inc()
+
+@app.teardown_request
+def _track_request_finished(exc):
+    requests_in_flight.dec()
 
 # Helper functions
 def init_db():
@@ -200,6 +600,168 @@ def init_db():
         db.session.commit()
         print("Database initialized successfully!")
 
+def persist_episodes(opened=(), updated=(), closed=()):
+    """Insert new violation episodes and write back changed ones (run as a db_writer job)"""
+    inserted = []
+    for episode in opened:
+        cheating_violation = CheatingViolation(
+            session_id=episode.session_id,
+            violation_type=episode.violation_type,
+            object_name=episode.key,
+            confidence=episode.peak_confidence,
+            person_count=episode.peak_person_count,
+            image_path=episode.evidence_path,
+            timestamp=episode.started_at
+        )
+        record = ViolationEpisode(
+            session_id=episode.session_id,
+            violation=cheating_violation,
+            violation_type=episode.violation_type,
+            object_name=episode.key,
+            started_at=episode.started_at,
+            ended_at=episode.ended_at,
+            frame_count=episode.frames,
+            peak_confidence=episode.peak_confidence,
+            peak_person_count=episode.peak_person_count,
+            evidence_count=episode.evidence_count,
+            image_path=episode.evidence_path
+        )
+        db.session.add(cheating_violation)
+        db.session.add(record)
+        inserted.append((episode, record))
+    
+    if inserted:
+        db.session.flush()
+        for episode, record in inserted:
+            episode.record_id = record.id
+    
+    for is_open, episodes in ((True, updated), (False, closed)):
+        for episode in episodes:
+            if episode.record_id is None:
+                continue
+            db.session.execute(
+                update(ViolationEpisode)
+                .where(ViolationEpisode.id == episode.record_id)
+                .values(
+                    ended_at=episode.ended_at,
+                    frame_count=episode.frames,
+                    peak_confidence=episode.peak_confidence,
+                    peak_person_count=episode.peak_person_count,
+                    evidence_count=episode.evidence_count,
+                    image_path=episode.evidence_path,
+                    is_open=is_open
+                )
+            )
+
+def finish_session(session_id):
+    """Flush in-memory session state once an interview is over"""
+    scene_gate.forget(session_id)
+    if emotion_analyzer:
+        emotion_analyzer.forget(session_id)
+    if person_tracker:
+        person_tracker.forget(session_id)
+    closed = episode_tracker.close_session(session_id)
+    if closed:
+        # Through the writer so it lands after the session's queued episode inserts
+        db_writer.submit(lambda db_session: persist_episodes(closed=closed))
+    session_state.end_session(session_id)
+
+def snapshot_results(db_session, session_id):
+    """Compute and store the result snapshot of a finished session (run as a db_writer job)
+
+    Does nothing if the session already has one, so it is safe to submit
+    more than once. Violation and answer counts come from one aggregate
+    query over the session's indexed rows. The session's end_time is only
+    set if it is missing, and a linked Interview row gets the scores.
+    """
+    if db_session.query(InterviewResult.id).filter_by(session_id=session_id).scalar() is not None:
+        return
+    interview_session = db_session.query(InterviewSession).filter_by(session_id=session_id).first()
+    if interview_session is None:
+        return
+    
+    total_violations, tab_changes, answers_count = db_session.execute(select(
+        select(func.count()).where(CheatingViolation.session_id == session_id).scalar_subquery(),
+        select(func.count()).where(CheatingViolation.session_id == session_id,
+                                   CheatingViolation.violation_type == 'tab_change').scalar_subquery(),
+        select(func.count()).where(InterviewAnswer.session_id == session_id).scalar_subquery()
+    )).one()
+    cheating_violations = total_violations - tab_changes
+    violations = db_session.execute(
+        select(CheatingViolation.violation_type, CheatingViolation.object_name, CheatingViolation.confidence,
+               CheatingViolation.person_count, CheatingViolation.timestamp)
+        .where(CheatingViolation.session_id == session_id)
+        .order_by(CheatingViolation.timestamp, CheatingViolation.id)
+    ).all()
+    
+    # Generate scores
+    technical_score = random.randint(60, 95)
+    behavioral_score = random.randint(65, 90)
+    integrity_score = max(0, 100 - (cheating_violations * 10) - (tab_changes * 5))
+    
+    overall_score = (technical_score + behavioral_score + integrity_score) / 3
+    recommendation = 'Proceed to next round' if overall_score >= 70 else 'Requires further evaluation'
+    
+    if interview_session.end_time is None:
+        interview_session.end_time = datetime.utcnow()
+    interview_session.status = 'completed'
+    
+    results = {
+        'session_id': session_id,
+        'duration': str(interview_session.end_time - interview_session.start_time),
+        'questions_answered': answers_count,
+        'technical_score': technical_score,
+        'behavioral_score': behavioral_score,
+        'integrity_score': integrity_score,
+        'overall_score': round(overall_score, 2),
+        'cheating_violations': cheating_violations,
+        'tab_changes': tab_changes,
+        'violations_detail': [
+            {
+                'type': v.violation_type,
+                'object': v.object_name,
+                'confidence': v.confidence,
+                'person_count': v.person_count,
+                'timestamp': v.timestamp.isoformat()
+            } for v in violations
+        ],
+        'recommendation': recommendation
+    }
+    payload = json.dumps(results, sort_keys=True)
+    
+    interview = None
+    if interview_session.interview_id is not None:
+        interview = db_session.get(Interview, interview_session.interview_id)
+    if interview is None:
+        interview = db_session.query(Interview).filter_by(session_id=session_id).first()
+    if interview is not None:
+        interview.technical_score = technical_score
+        interview.behavioral_score = behavioral_score
+        interview.integrity_score = integrity_score
+        interview.overall_score = round(overall_score, 2)
+        interview.cheating_violations = cheating_violations
+        interview.tab_changes = tab_changes
+        interview.recommendation = recommendation
+        interview.completed_at = interview_session.end_time
+        interview.status = 'Completed'
+    
+    db_session.add(InterviewResult(
+        session_id=session_id,
+        interview_id=interview.id if interview is not None else None,
+        started_at=interview_session.start_time,
+        ended_at=interview_session.end_time,
+        questions_answered=answers_count,
+        technical_score=technical_score,
+        behavioral_score=behavioral_score,
+        integrity_score=integrity_score,
+        overall_score=round(overall_score, 2),
+        cheating_violations=cheating_violations,
+        tab_changes=tab_changes,
+        recommendation=recommendation,
+        payload=payload,
+        etag=hashlib.sha256(payload.encode()).hexdigest()
+    ))
+
 def validate_email(email):
     """Simple email validation"""
     import re
@@ -212,6 +774,74 @@ def validate_phone(phone):
     pattern = r'^[+]?[\d\s\-\(\)]{10,}$'
     return re.match(pattern, phone) is not None
 
+# Admin listings are keyset-paginated; see pagination.keyset_page
+app.config['LISTING_PAGE_SIZE'] = int(os.environ.get('LISTING_PAGE_SIZE', 50))
+app.config['LISTING_MAX_PAGE_SIZE'] = int(os.environ.get('LISTING_MAX_PAGE_SIZE', 200))
+
+INTERVIEW_SORTS = {'created': Interview.created_date, 'date': Interview.date}
+CANDIDATE_SORTS = {'added': Candidate.added_date}
+
+def listing_limit(args):
+    limit = args.get('limit', app.config['LISTING_PAGE_SIZE'], type=int)
+    return max(1, min(limit, app.config['LISTING_MAX_PAGE_SIZE']))
+
+def list_interviews(args, limit=None):
+    """One page of interviews with their candidate and job loaded in the same query
+
+    Filters: status, type, candidate_id, job_id. Sort: created (default)
+    or date, with order=asc|desc. Raises ValueError for an unknown sort
+    or a malformed cursor.
+    """
+    sort = args.get('sort', 'created')
+    if sort not in INTERVIEW_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    query = Interview.query.options(joinedload(Interview.candidate), joinedload(Interview.job))
+    for field in ('status', 'type'):
+        if args.get(field):
+            query = query.filter(getattr(Interview, field) == args[field])
+    for field in ('candidate_id', 'job_id'):
+        value = args.get(field, type=int)
+        if value is not None:
+            query = query.filter(getattr(Interview, field) == value)
+    return keyset_page(query, INTERVIEW_SORTS[sort], Interview.id,
+                       cursor=args.get('cursor'), limit=limit or listing_limit(args),
+                       descending=args.get('order', 'desc') != 'asc')
+
+def list_candidates(args, limit=None):
+    """One page of candidates, newest first unless order=asc; filter: position"""
+    sort = args.get('sort', 'added')
+    if sort not in CANDIDATE_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    query = Candidate.query
+    if args.get('position'):
+        query = query.filter(Candidate.position == args['position'])
+    return keyset_page(query, CANDIDATE_SORTS[sort], Candidate.id,
+                       cursor=args.get('cursor'), limit=limit or listing_limit(args),
+                       descending=args.get('order', 'desc') != 'asc')
+
+def interview_to_dict(interview):
+    return {
+        'id': interview.id,
+        'date': interview.date.isoformat(),
+        'time': interview.time.strftime('%H:%M'),
+        'type': interview.type,
+        'status': interview.status,
+        'created_date': interview.created_date.isoformat() if interview.created_date else None,
+        'candidate': {'id': interview.candidate.id, 'name': interview.candidate.name,
+                      'email': interview.candidate.email} if interview.candidate else None,
+        'job': {'id': interview.job.id, 'title': interview.job.title} if interview.job else None,
+        'overall_score': interview.overall_score
+    }
+
+def candidate_to_dict(candidate):
+    return {
+        'id': candidate.id,
+        'name': candidate.name,
+        'email': candidate.email,
+        'position': candidate.position,
+        'added_date': candidate.added_date.isoformat() if candidate.added_date else None
+    }
+
 # Routes
 @app.route('/')
 def home():
@@ -259,14 +889,21 @@ def dashboard():
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('login'))
     
-    candidates = Candidate.query.all()
-    jobs = JobRequirement.query.filter_by(is_active=True).all()
-    interviews = Interview.query.all()
+    # Cached counts and only the first page of each listing; the rest is
+    # fetched from the /admin/api endpoints as the user asks for it
+    candidates = list_candidates(MultiDict(), limit=5)
+    interviews = list_interviews(MultiDict(), limit=5)
+    stats = statistics.summary()
     
     return render_template('dashboard.html', 
-                         candidates=candidates, 
-                         jobs=jobs, 
-                         interviews=interviews)
+                         candidates=candidates.items, 
+                         candidates_cursor=candidates.next_cursor,
+                         interviews=interviews.items,
+                         interviews_cursor=interviews.next_cursor,
+                         candidate_count=stats['total_candidates'],
+                         job_count=stats['total_jobs'],
+                         interview_count=stats['total_interviews'],
+                         pending_count=stats['scheduled_interviews'])
 
 @app.route('/add_candidate', methods=['GET', 'POST'])
 def add_candidate():
@@ -450,7 +1087,14 @@ def interview():
     if 'user_id' not in session:
         flash('Please login to access the interview.', 'error')
         return redirect(url_for('login'))
-    return render_template('interview.html')
+    
+    # Clients may pick a capture profile with ?capture=low|medium|high
+    capture_profile = request.args.get('capture', app.config['CAPTURE_PROFILE'])
+    if capture_profile not in CAPTURE_PROFILES:
+        capture_profile = app.config['CAPTURE_PROFILE']
+    return render_template('interview.html',
+                         capture_profile=capture_profile,
+                         capture_profiles=CAPTURE_PROFILES)
 
 @app.route('/start_interview', methods=['POST'])
 def start_interview():
@@ -467,9 +1111,6 @@ def start_interview():
     )
     
     try:
-        db.session.add(interview_session)
-        db.session.commit()
-        
         # Generate first question
         question_type = random.choice(['technical', 'behavioral'])
         question_text = random.choice(INTERVIEW_QUESTIONS[question_type])
@@ -481,8 +1122,7 @@ def start_interview():
             question_number=1
         )
         
-        db.session.add(question)
-        db.session.commit()
+        db_writer.submit(lambda db_session: db_session.add_all([interview_session, question]))
         
         return jsonify({
             'status': 'success',
@@ -505,59 +1145,74 @@ def get_next_question():
     if not interview_session:
         return jsonify({'error': 'Session not found'}), 400
     
-    # Store previous answer if provided
-    data = request.get_json()
-    if data and data.get('answer'):
-        # Get the current question
-        current_question = InterviewQuestion.query.filter_by(
-            session_id=session_id,
-            question_number=interview_session.current_question_index + 1
-        ).first()
-        
-        if current_question:
-            answer = InterviewAnswer(
-                session_id=session_id,
-                question_id=current_question.id,
-                answer=data['answer']
-            )
-            db.session.add(answer)
-    
-    # Update question index
-    interview_session.current_question_index += 1
-    
-    if interview_session.current_question_index >= 5:  # Limit to 5 questions
-        interview_session.status = 'completed'
-        interview_session.end_time = datetime.utcnow()
-        db.session.commit()
-        
-        return jsonify({
-            'status': 'completed',
-            'message': 'Interview completed successfully!'
-        })
+    answer_text = (request.get_json(silent=True) or {}).get('answer')
     
     # Generate next question
     question_type = random.choice(['technical', 'behavioral'])
     question_text = random.choice(INTERVIEW_QUESTIONS[question_type])
     
-    question = InterviewQuestion(
-        session_id=session_id,
-        question=question_text,
-        question_type=question_type,
-        question_number=interview_session.current_question_index + 1
-    )
+    def advance(db_session):
+        # Answer, index bump and next question commit together, so the
+        # index never points past a question that was not stored
+        index = db_session.execute(
+            update(InterviewSession)
+            .where(InterviewSession.session_id == session_id)
+            .values(current_question_index=InterviewSession.current_question_index + 1)
+            .returning(InterviewSession.current_question_index)
+        ).scalar_one()
+        
+        # Store previous answer if provided
+        if answer_text:
+            current_question = db_session.query(InterviewQuestion).filter_by(
+                session_id=session_id,
+                question_number=index
+            ).first()
+            if current_question:
+                db_session.add(InterviewAnswer(
+                    session_id=session_id,
+                    question_id=current_question.id,
+                    answer=answer_text
+                ))
+        
+        if index >= 5:  # Limit to 5 questions
+            db_session.execute(
+                update(InterviewSession)
+                .where(InterviewSession.session_id == session_id)
+                .values(status='completed',
+                        end_time=func.coalesce(InterviewSession.end_time, datetime.utcnow()))
+            )
+            return index, True
+        
+        db_session.add(InterviewQuestion(
+            session_id=session_id,
+            question=question_text,
+            question_type=question_type,
+            question_number=index + 1
+        ))
+        return index, False
     
     try:
-        db.session.add(question)
-        db.session.commit()
+        index, completed = db_writer.submit(advance)
+        
+        if completed:
+            finish_session(session_id)
+            # Queued behind the session's pending writes, so the snapshot sees them
+            db_writer.submit(lambda db_session: snapshot_results(db_session, session_id), wait=False)
+            
+            return jsonify({
+                'status': 'completed',
+                'message': 'Interview completed successfully!'
+            })
         
         return jsonify({
             'status': 'success',
             'question': question_text,
-            'question_number': interview_session.current_question_index + 1
+            'question_number': index + 1
         })
         
     except Exception as e:
         db.session.rollback()
+        print(f"Error advancing interview {session_id}: {e}")
         return jsonify({'error': 'Failed to generate question'}), 500
 
 @app.route('/submit_answer', methods=['POST'])
@@ -587,8 +1242,7 @@ def submit_answer():
         )
         
         try:
-            db.session.add(answer)
-            db.session.commit()
+            db_writer.submit(lambda db_session: db_session.add(answer))
             return jsonify({'status': 'success'})
         except Exception as e:
             db.session.rollback()
@@ -596,99 +1250,139 @@ def submit_answer():
     
     return jsonify({'error': 'Question not found'}), 400
 
-@app.route('/detect_cheating', methods=['POST'])
-def detect_cheating():
-    session_id = session.get('session_id')
-    if not session_id:
-        return jsonify({'error': 'Invalid session'}), 400
+class FrameTooLarge(Exception):
+    """Raised by a frame loader when the body exceeds MAX_FRAME_BYTES"""
 
-    interview_session = InterviewSession.query.filter_by(session_id=session_id).first()
-    if not interview_session:
+def analyze_frame(session_id, load_image):
+    """Admit, decode and run detection on one frame for an interview session"""
+    if session_state.get(session_id, 'frame_counter') is None:
         return jsonify({'error': 'Session not found'}), 400
 
     if not model:
         return jsonify({'error': 'YOLO model not loaded'}), 500
 
     try:
-        # Update frame counter
-        interview_session.frame_counter += 1
-        current_frame = interview_session.frame_counter
-
-        data = request.get_json()
-        image_data = data.get('image')
-
-        # Decode base64 image
-        image_data = image_data.split(',')[1]
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        image_np = np.array(image)
-
-        # Process only every second frame
-        if current_frame % 2 != 0:
-            db.session.commit()
+        # Update frame counter (flushed to the database in the background)
+        current_frame = session_state.increment(session_id, 'frame_counter')
+        frames_received.inc()
+
+        # Drop frames before the payload is parsed or decoded
+        admitted, reason = frame_admission.admit(session_id)
+        if not admitted:
+            frames_skipped.inc(reason=reason)
             return jsonify({
                 'violations': [],
                 'person_count': 0,
                 'status': 'skipped',
+                'reason': reason,
                 'frame_number': current_frame
             })
 
-        # Run YOLO detection
-        results = model(image_np)
-
-        violations = []
-        person_count = 0
-
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    class_id = int(box.cls[0])
-                    class_name = model.names[class_id]
-                    confidence = float(box.conf[0])
-
-                    if confidence > 0.5:
-                        if class_name == PERSON_CLASS:
-                            person_count += 1
-                        elif class_name in CHEATING_OBJECTS:
-                            violations.append({
-                                'object': class_name,
-                                'confidence': confidence,
-                                'timestamp': datetime.utcnow().isoformat()
-                            })
+        try:
+            with stage_seconds.time(stage='decode'):
+                image = load_image()
+                # Image.open only reads the header; decode the pixels here
+                if image is not None:
+                    image.load()
+        except FrameTooLarge:
+            return jsonify({'error': 'Frame too large'}), 413
+        except OSError:
+            # UnidentifiedImageError and truncated data are both OSErrors
+            return jsonify({'error': 'Invalid image'}), 400
+        if image is None:
+            return jsonify({'error': 'No image provided'}), 400
+        # Skip YOLO when the scene has not changed since the last analysis
+        thumbnail = scene_gate.thumbnail(image)
+        cached = scene_gate.lookup(session_id, thumbnail)
+        tracked = None
+        if cached is not None:
+            person_count, detections = cached
+        else:
+            image_np = preprocessor(np.asarray(image.convert('RGB')))
+
+            # Between keyframes the tracker maintains the person count
+            track_frame = person_tracker.prepare(image_np) if person_tracker else None
+            if person_tracker:
+                tracked = person_tracker.track(session_id, track_frame)
+
+            if tracked is not None:
+                person_count, detections = tracked
+            else:
+                # Run YOLO detection (batched with frames from other sessions)
+                with stage_seconds.time(stage='inference'):
+                    result = inference_scheduler.submit(image_np, session_id=session_id)
+                with stage_seconds.time(stage='postprocess'):
+                    person_count, detections = detection_filter.summarize(result)
+                    person_boxes = detection_filter.person_boxes(result)
+                    if person_tracker:
+                        person_tracker.keyframe(session_id, track_frame, person_boxes,
+                                                (person_count, detections), preprocessor.size)
+
+                # Emotion on faces inside the person boxes, batched across sessions
+                if emotion_analyzer and len(person_boxes):
+                    try:
+                        with stage_seconds.time(stage='emotion'):
+                            faces = emotion_analyzer.faces(image_np, person_boxes)
+                            emotion_analyzer.remember(
+                                session_id, emotion_scheduler.submit(faces, session_id=session_id) if len(faces) else []
+                            )
+                    except Exception as e:
+                        # Emotion is best effort; never fail the detection response
+                        print(f"Error in emotion analysis: {e}")
+            scene_gate.store(session_id, thumbnail, (person_count, detections))
+
+        detected_at = datetime.utcnow()
+        violations = [
+            {
+                'object': class_name,
+                'confidence': confidence,
+                'timestamp': detected_at.isoformat()
+            } for class_name, confidence in detections
+        ]
 
         # Check for multiple persons
         if person_count > 1:
             violations.append({
                 'object': 'multiple_persons',
                 'count': person_count,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': detected_at.isoformat()
             })
 
-        # Save violations to database
+        frames_analyzed.inc(source='cached' if cached is not None else 'tracked' if tracked is not None else 'detector')
+        for violation in violations:
+            violations_flagged.inc(violation_type='multiple_persons' if violation['object'] == 'multiple_persons'
+                                   else 'object_detected')
+
+        # Merge detections into ongoing episodes; one violation row per episode
+        opened, extended, closed = episode_tracker.observe(session_id, violations, detected_at)
+
+        new_evidence = []
+        if opened or extended:
+            frame_hash = difference_hash(image)
+            new_evidence = [episode for episode in opened + extended
+                            if episode_tracker.wants_evidence(episode, frame_hash)]
+
         saved_path = None
-        if violations:
-            # Save violation image
+        evidence = None
+        if new_evidence:
+            # Queue violation image; the response does not wait for the write
             frames_dir = f"frames/{session_id}"
-            os.makedirs(frames_dir, exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            frame_filename = f"violation_{current_frame:06d}_{timestamp}.jpg"
-            saved_path = os.path.join(frames_dir, frame_filename)
-            image.save(saved_path, 'JPEG', quality=100)
-
-            # Save each violation
-            for violation in violations:
-                cheating_violation = CheatingViolation(
-                    session_id=session_id,
-                    violation_type='object_detected' if violation['object'] != 'multiple_persons' else 'multiple_persons',
-                    object_name=violation['object'],
-                    confidence=violation.get('confidence'),
-                    person_count=violation.get('count'),
-                    image_path=saved_path
-                )
-                db.session.add(cheating_violation)
-
-        db.session.commit()
+            evidence = evidence_writer.submit(
+                image, frames_dir, f"violation_{current_frame:06d}_{timestamp}",
+                session_id=session_id
+            )
+            if evidence.status != 'dropped':
+                saved_path = evidence.path
+            for episode in new_evidence:
+                episode.add_evidence(evidence)
+
+        # Extended episodes are only written back when they gain evidence
+        updated = [episode for episode in new_evidence if episode not in opened]
+        if opened or updated or closed:
+            # Committed by the group writer; the response does not wait for it
+            db_writer.submit(lambda db_session: persist_episodes(opened=opened, updated=updated, closed=closed),
+                             wait=False)
 
         return jsonify({
             'violations': violations,
@@ -696,7 +1390,13 @@ def detect_cheating():
             'status': 'violation_detected' if violations else 'clean',
             'frame_number': current_frame,
             'processed': True,
-            'saved_path': saved_path
+            'cached': cached is not None,
+            'tracked': tracked is not None,
+            'saved_path': saved_path,
+            'evidence_id': evidence.evidence_id if evidence else None,
+            'evidence_status': evidence.status if evidence else None,
+            'new_episodes': [episode.key for episode in opened],
+            'emotions': emotion_analyzer.latest(session_id) if emotion_analyzer else None
         })
 
     except Exception as e:
@@ -704,18 +1404,79 @@ def detect_cheating():
         print(f"Error in detect_cheating: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/detect_cheating', methods=['POST'])
+def detect_cheating():
+    """Legacy ingestion: JSON body with a base64 data URL"""
+    session_id = session.get('session_id')
+    if not session_id:
+        return jsonify({'error': 'Invalid session'}), 400
+
+    def load_image():
+        data = request.get_json()
+        image_data = data.get('image')
+
+        # Decode base64 image
+        image_data = image_data.split(',')[1]
+        image_bytes = base64.b64decode(image_data)
+        return Image.open(io.BytesIO(image_bytes))
+
+    return analyze_frame(session_id, load_image)
+
+@app.route('/detect_cheating_frame', methods=['POST'])
+def detect_cheating_frame():
+    """Binary ingestion: raw JPEG bytes or a multipart 'frame' file"""
+    session_id = session.get('session_id')
+    if not session_id:
+        return jsonify({'error': 'Invalid session'}), 400
+
+    max_bytes = app.config['MAX_FRAME_BYTES']
+    if request.content_length and request.content_length > max_bytes:
+        return jsonify({'error': 'Frame too large'}), 413
+    if request.content_length is None and request.mimetype == 'multipart/form-data':
+        # The form parser would read a chunked body of any size
+        return jsonify({'error': 'Content-Length required'}), 411
+
+    def load_image():
+        if request.mimetype == 'multipart/form-data':
+            frame = request.files.get('frame')
+            if not frame:
+                return None
+            image_bytes = frame.read()
+        else:
+            # Bounded, since chunked uploads carry no Content-Length
+            image_bytes = request.stream.read(max_bytes + 1)
+            if len(image_bytes) > max_bytes:
+                raise FrameTooLarge()
+        if not image_bytes:
+            return None
+        return Image.open(io.BytesIO(image_bytes))
+
+    return analyze_frame(session_id, load_image)
+
+@app.route('/evidence/<evidence_id>')
+def evidence_status(evidence_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    job = evidence_writer.status(evidence_id)
+    if not job:
+        return jsonify({'error': 'Evidence not found'}), 404
+    
+    if session.get('user_role') != 'admin' and job.session_id != session.get('session_id'):
+        return jsonify({'error': 'Evidence not found'}), 404
+    
+    return jsonify(job.to_dict())
+
 @app.route('/report_tab_change', methods=['POST'])
 def report_tab_change():
     session_id = session.get('session_id')
     if not session_id:
         return jsonify({'error': 'Invalid session'}), 400
     
-    interview_session = InterviewSession.query.filter_by(session_id=session_id).first()
-    if not interview_session:
+    total_tab_changes = session_state.increment(session_id, 'tab_changes')
+    if total_tab_changes is None:
         return jsonify({'error': 'Session not found'}), 400
     
-    interview_session.tab_changes += 1
-    
     # Save as violation
     violation = CheatingViolation(
         session_id=session_id,
@@ -723,12 +1484,12 @@ def report_tab_change():
     )
     
     try:
-        db.session.add(violation)
-        db.session.commit()
+        db_writer.submit(lambda db_session: db_session.add(violation))
+        violations_flagged.inc(violation_type='tab_change')
         
         return jsonify({
             'status': 'recorded',
-            'total_tab_changes': interview_session.tab_changes
+            'total_tab_changes': total_tab_changes
         })
     except Exception as e:
         db.session.rollback()
@@ -740,66 +1501,98 @@ def get_interview_results():
     if not session_id:
         return jsonify({'error': 'Invalid session'}), 400
     
-    interview_session = InterviewSession.query.filter_by(session_id=session_id).first()
-    if not interview_session:
-        return jsonify({'error': 'Session not found'}), 400
-    
-    # Get violation counts
-    violations = CheatingViolation.query.filter_by(session_id=session_id).all()
-    cheating_violations = len([v for v in violations if v.violation_type != 'tab_change'])
-    tab_changes = len([v for v in violations if v.violation_type == 'tab_change'])
-    
-    # Get answers count
-    answers_count = InterviewAnswer.query.filter_by(session_id=session_id).count()
-    
-    # Generate scores
-    technical_score = random.randint(60, 95)
-    behavioral_score = random.randint(65, 90)
-    integrity_score = max(0, 100 - (cheating_violations * 10) - (tab_changes * 5))
-    
-    overall_score = (technical_score + behavioral_score + integrity_score) / 3
-    recommendation = 'Proceed to next round' if overall_score >= 70 else 'Requires further evaluation'
-    
-    # Update interview session with results
-    interview_session.end_time = datetime.utcnow()
-    interview_session.status = 'completed'
-    
-    try:
-        db.session.commit()
-        
-        # Calculate duration
-        duration = interview_session.end_time - interview_session.start_time
-        
-        results = {
-            'session_id': session_id,
-            'duration': str(duration),
-            'questions_answered': answers_count,
-            'technical_score': technical_score,
-            'behavioral_score': behavioral_score,
-            'integrity_score': integrity_score,
-            'overall_score': round(overall_score, 2),
-            'cheating_violations': cheating_violations,
-            'tab_changes': tab_changes,
-            'violations_detail': [
-                {
-                    'type': v.violation_type,
-                    'object': v.object_name,
-                    'confidence': v.confidence,
-                    'person_count': v.person_count,
-                    'timestamp': v.timestamp.isoformat()
-                } for v in violations
-            ],
-            'recommendation': recommendation
-        }
-        
-        return jsonify(results)
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': 'Failed to generate results'}), 500
+    # Repeat fetches only read the ETag
+    etag = db.session.query(InterviewResult.etag).filter_by(session_id=session_id).scalar()
+    if etag is None:
+        if not InterviewSession.query.filter_by(session_id=session_id).first():
+            return jsonify({'error': 'Session not found'}), 400
+        try:
+            finish_session(session_id)
+            db_writer.submit(lambda db_session: snapshot_results(db_session, session_id))
+        except IntegrityError:
+            # Another worker stored the snapshot first
+            db.session.rollback()
+        except Exception as e:
+            print(f"Error generating results: {e}")
+            return jsonify({'error': 'Failed to generate results'}), 500
+        etag = db.session.query(InterviewResult.etag).filter_by(session_id=session_id).scalar()
+        if etag is None:
+            return jsonify({'error': 'Failed to generate results'}), 500
+    
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        payload = db.session.query(InterviewResult.payload).filter_by(session_id=session_id).scalar()
+        response = app.response_class(payload, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 # Additional admin routes for managing the system
 
+@app.route('/admin/inference_stats')
+def admin_inference_stats():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    return jsonify({
+        'inference': inference_scheduler.stats(),
+        'admission': frame_admission.stats(),
+        'session_state': session_state.stats(),
+        'evidence': evidence_writer.stats(),
+        'pool': inference_pool.stats() if inference_pool else None,
+        'scene_gate': scene_gate.stats(),
+        'tracking': person_tracker.stats() if person_tracker else None,
+        'emotion': dict(emotion_analyzer.stats(), scheduler=emotion_scheduler.stats()) if emotion_analyzer else None,
+        'db_writer': db_writer.stats(),
+        'statistics': statistics.stats()
+    })
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+def admin_profiling():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        try:
+            enabled = data.get('enabled')
+            if isinstance(enabled, str):
+                enabled = enabled.lower() in ('1', 'true', 'on')
+            sample_rate = data.get('sample_rate')
+            route_rates = data.get('route_rates')
+            if isinstance(route_rates, str):
+                route_rates = parse_route_rates(route_rates)
+            request_profiler.configure(
+                enabled=enabled,
+                sample_rate=float(sample_rate) if sample_rate is not None else None,
+                route_rates=route_rates
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid profiling settings: {e}'}), 400
+
+    return jsonify({
+        'settings': request_profiler.settings(),
+        'slowest': request_profiler.slowest(
+            limit=request.args.get('limit', 20, type=int),
+            endpoint=request.args.get('endpoint')
+        )
+    })
+
+@app.route('/admin/profiling/<capture_id>')
+def admin_profiling_capture(capture_id):
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    capture = request_profiler.capture(capture_id)
+    if capture is None:
+        return jsonify({'error': 'Capture not found'}), 404
+    return jsonify(capture)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return metrics.render(), 200, {'Content-Type': metrics.content_type}
+
 @app.route('/admin/users')
 def admin_users():
     if 'user_id' not in session or session.get('user_role') != 'admin':
@@ -815,13 +1608,49 @@ def admin_interviews():
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('login'))
     
-    interviews = db.session.query(Interview, Candidate, JobRequirement).join(
-        Candidate, Interview.candidate_id == Candidate.id
-    ).join(
-        JobRequirement, Interview.job_id == JobRequirement.id
-    ).all()
+    try:
+        page = list_interviews(request.args)
+    except ValueError as e:
+        flash(f'Invalid listing parameters: {e}', 'error')
+        return redirect(url_for('admin_interviews'))
+    
+    # Same (interview, candidate, job) rows as before, one page at a time
+    interviews = [(interview, interview.candidate, interview.job) for interview in page.items]
+    
+    return render_template('admin_interviews.html',
+                         interviews=interviews,
+                         next_cursor=page.next_cursor,
+                         filters=request.args)
+
+@app.route('/admin/api/interviews')
+def admin_api_interviews():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        page = list_interviews(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'items': [interview_to_dict(interview) for interview in page.items],
+        'next_cursor': page.next_cursor
+    })
+
+@app.route('/admin/api/candidates')
+def admin_api_candidates():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        page = list_candidates(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return render_template('admin_interviews.html', interviews=interviews)
+    return jsonify({
+        'items': [candidate_to_dict(candidate) for candidate in page.items],
+        'next_cursor': page.next_cursor
+    })
 
 @app.route('/admin/interview_results/<int:interview_id>')
 def admin_interview_results(interview_id):
@@ -937,35 +1766,67 @@ def admin_statistics():
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('login'))
     
-    # Get various statistics
-    total_candidates = Candidate.query.count()
-    total_jobs = JobRequirement.query.filter_by(is_active=True).count()
-    total_interviews = Interview.query.count()
-    completed_interviews = Interview.query.filter_by(status='Completed').count()
+    # Counters are read from the incrementally maintained statistics tables
+    stats = statistics.summary()
     
     # Get recent activities
-    recent_candidates = Candidate.query.order_by(Candidate.added_date.desc()).limit(5).all()
-    recent_interviews = Interview.query.order_by(Interview.created_date.desc()).limit(5).all()
-    
-    # Get violation statistics
-    total_violations = CheatingViolation.query.count()
-    tab_change_violations = CheatingViolation.query.filter_by(violation_type='tab_change').count()
-    object_violations = CheatingViolation.query.filter(CheatingViolation.violation_type != 'tab_change').count()
-    
-    stats = {
-        'total_candidates': total_candidates,
-        'total_jobs': total_jobs,
-        'total_interviews': total_interviews,
-        'completed_interviews': completed_interviews,
-        'recent_candidates': recent_candidates,
-        'recent_interviews': recent_interviews,
-        'total_violations': total_violations,
-        'tab_change_violations': tab_change_violations,
-        'object_violations': object_violations
-    }
+    stats['recent_candidates'] = Candidate.query.order_by(Candidate.added_date.desc()).limit(5).all()
+    stats['recent_interviews'] = Interview.query.order_by(Interview.created_date.desc()).limit(5).all()
+    
+    # Per-day and per-job breakdowns
+    stats['daily'] = statistics.daily(start=datetime.utcnow().date() - timedelta(days=30))
+    stats['jobs'] = statistics.by_job()
     
     return render_template('admin_statistics.html', stats=stats)
 
+@app.route('/admin/api/statistics')
+def admin_api_statistics():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    response = {
+        'summary': statistics.summary(),
+        'daily': [{
+            'day': row.day.isoformat(),
+            'candidates': row.candidates,
+            'interviews': row.interviews,
+            'completed_interviews': row.completed_interviews,
+            'violations': row.violations,
+            'tab_change_violations': row.tab_change_violations
+        } for row in statistics.daily(start, end)],
+        'jobs': [{
+            'job_id': row.job_id,
+            'title': row.job.title if row.job else None,
+            'interviews': row.interviews,
+            'completed_interviews': row.completed_interviews,
+            'scheduled_interviews': row.scheduled_interviews
+        } for row in statistics.by_job()]
+    }
+    if request.args.get('verify') == '1':
+        # Full grouped count over the source tables; slow on large databases
+        response['mismatches'] = statistics.verify()
+    return jsonify(response)
+
+@app.route('/admin/statistics/rebuild', methods=['POST'])
+def admin_rebuild_statistics():
+    if 'user_id' not in session or session.get('user_role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        counts = statistics.rebuild()
+    except Exception as e:
+        print(f"Error rebuilding statistics: {e}")
+        return jsonify({'error': 'Rebuild failed'}), 500
+    return jsonify({'status': 'success', 'summary': counts, **statistics.stats()})
+
 @app.route('/admin/create_user', methods=['GET', 'POST'])
 def admin_create_user():
     if 'user_id' not in session or session.get('user_role') != 'admin':
@@ -0,0 +1,92 @@
+"""Latency and recall of the detector at several inference sizes
+
+Every frame under frames/ is letterboxed with LetterboxPreprocessor and
+run through YOLO at each size. Detections at ``--reference`` are taken as
+ground truth; recall is the share of reference violations (objects and
+multiple persons) still found at the smaller size. Run from the
+repository root:
+
+    python benchmarks/bench_inference_size.py [--sizes 320 480 640]
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection import DetectionFilter
+from preprocess import LetterboxPreprocessor
+
+CHEATING_OBJECTS = ['cell phone', 'book', 'laptop', 'tablet']
+PERSON_CLASS = 'person'
+
+
+def violation_keys(detections):
+    person_count, objects = detections
+    keys = {name for name, _ in objects}
+    if person_count > 1:
+        keys.add('multiple_persons')
+    return keys
+
+
+def run(model, detection_filter, frames, size, repeats):
+    preprocessor = LetterboxPreprocessor(size)
+    kwargs = dict(detection_filter.model_kwargs(), imgsz=size)
+    model(preprocessor(frames[0]), verbose=False, **kwargs)
+
+    preprocess_ms, inference_ms, found = [], [], []
+    for frame in frames:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            canvas = preprocessor(frame)
+            prepared = time.perf_counter()
+            result = model(canvas, verbose=False, **kwargs)[0]
+            finished = time.perf_counter()
+            preprocess_ms.append((prepared - started) * 1000.0)
+            inference_ms.append((finished - prepared) * 1000.0)
+        found.append(violation_keys(detection_filter.summarize(result)))
+    return preprocess_ms, inference_ms, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[320, 480, 640])
+    parser.add_argument('--reference', type=int, default=640)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.frames_dir, '**', '*.jpg'), recursive=True))
+    if not paths:
+        sys.exit(f"No frames found under {args.frames_dir}")
+    frames = [np.array(Image.open(path).convert('RGB')) for path in paths]
+
+    model = YOLO(args.weights, task='detect')
+    detection_filter = DetectionFilter(model.names, PERSON_CLASS, CHEATING_OBJECTS)
+
+    sizes = sorted(set(args.sizes) | {args.reference})
+    results = {size: run(model, detection_filter, frames, size, args.repeats) for size in sizes}
+    reference = results[args.reference][2]
+    positives = sum(len(keys) for keys in reference)
+
+    print(f"{len(frames)} frames, {positives} reference violations at {args.reference}px")
+    print(f"{'size':>5} {'prep p50':>9} {'infer p50':>10} {'infer p95':>10} {'recall':>7}")
+    for size in sizes:
+        preprocess_ms, inference_ms, found = results[size]
+        recovered = sum(len(truth & keys) for truth, keys in zip(reference, found))
+        recall = recovered / positives if positives else float('nan')
+        p95 = statistics.quantiles(inference_ms, n=20)[-1] if len(inference_ms) > 1 else inference_ms[0]
+        print(f"{size:>5} {statistics.median(preprocess_ms):>8.2f}ms "
+              f"{statistics.median(inference_ms):>8.2f}ms {p95:>8.2f}ms {recall:>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compare bytes per frame and server CPU per frame for the two ingestion paths
+
+Replays the evidence JPEGs under frames/ as the browser would send them:
+the legacy JSON data URL at quality 1.0, and raw JPEG bytes for each
+capture profile. Run from the repository root:
+
+    python benchmarks/bench_ingestion.py [--frames 50] [--repeat 5]
+"""
+import argparse
+import base64
+import glob
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+# Mirrors CAPTURE_PROFILES in app.py without importing the model
+CAPTURE_PROFILES = {
+    'low': {'width': 320, 'quality': 0.7},
+    'medium': {'width': 640, 'quality': 0.8},
+    'high': {'width': 1280, 'quality': 0.92}
+}
+
+
+def encode(image, width, quality):
+    if width and image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.BILINEAR)
+    buf = io.BytesIO()
+    image.save(buf, 'JPEG', quality=int(quality * 100))
+    return buf.getvalue()
+
+
+def decode_json(body):
+    data = json.loads(body)
+    image_data = data.get('image').split(',')[1]
+    image = Image.open(io.BytesIO(base64.b64decode(image_data)))
+    return np.array(image)
+
+
+def decode_raw(body):
+    return np.array(Image.open(io.BytesIO(body)))
+
+
+def measure(payloads, decoder, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        for body in payloads:
+            decoder(body)
+    elapsed = time.process_time() - started
+    return elapsed / (repeat * len(payloads)) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.frames_dir, '*', '*.jpg')))[:args.frames]
+    if not paths:
+        print(f"No frames found under {args.frames_dir}/")
+        return
+    images = [Image.open(p).convert('RGB') for p in paths]
+
+    rows = []
+    legacy = []
+    for image in images:
+        data_url = 'data:image/jpeg;base64,' + base64.b64encode(encode(image, None, 1.0)).decode()
+        legacy.append(json.dumps({'image': data_url, 'timestamp': 0, 'session_id': 'x' * 36}).encode())
+    rows.append(('json data URL, q=1.0, native', legacy, decode_json))
+
+    for name, profile in CAPTURE_PROFILES.items():
+        payloads = [encode(image, profile['width'], profile['quality']) for image in images]
+        rows.append((f"raw {name}, q={profile['quality']}, w<={profile['width']}", payloads, decode_raw))
+
+    print(f"{len(images)} frames, {args.repeat} repeats")
+    print(f"{'path':<36} {'bytes/frame':>12} {'cpu ms/frame':>13}")
+    for label, payloads, decoder in rows:
+        size = sum(len(p) for p in payloads) / len(payloads)
+        cpu = measure(payloads, decoder, args.repeat)
+        print(f"{label:<36} {size:>12.0f} {cpu:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Micro-benchmark: per-box Python loop vs DetectionFilter.summarize
+
+Builds ultralytics Results with synthetic boxes over the COCO class map and
+times the post-processing loop detect_cheating used to run against the
+vectorized filter. Run from the repository root:
+
+    python benchmarks/bench_postprocess.py [--boxes 5 20 100 300]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection import DetectionFilter
+
+COCO_NAMES = {0: 'person', 63: 'laptop', 67: 'cell phone', 73: 'book'}
+COCO_NAMES.update({i: f'class_{i}' for i in range(80) if i not in COCO_NAMES})
+CHEATING_OBJECTS = ['cell phone', 'book', 'laptop', 'tablet']
+PERSON_CLASS = 'person'
+
+
+def legacy_loop(results, names):
+    violations = []
+    person_count = 0
+    for result in results:
+        boxes = result.boxes
+        if boxes is not None:
+            for box in boxes:
+                class_id = int(box.cls[0])
+                class_name = names[class_id]
+                confidence = float(box.conf[0])
+                if confidence > 0.5:
+                    if class_name == PERSON_CLASS:
+                        person_count += 1
+                    elif class_name in CHEATING_OBJECTS:
+                        violations.append((class_name, confidence))
+    return person_count, violations
+
+
+def make_result(n_boxes, rng):
+    xy = rng.uniform(0, 600, size=(n_boxes, 2))
+    wh = rng.uniform(10, 200, size=(n_boxes, 2))
+    conf = rng.uniform(0, 1, size=(n_boxes, 1))
+    cls = rng.integers(0, 80, size=(n_boxes, 1))
+    data = torch.tensor(np.hstack([xy, xy + wh, conf, cls]), dtype=torch.float32)
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    return Results(image, path='bench.jpg', names=COCO_NAMES, boxes=data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boxes', type=int, nargs='+', default=[5, 20, 100, 300])
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    detection_filter = DetectionFilter(COCO_NAMES, PERSON_CLASS, CHEATING_OBJECTS, conf=0.5)
+
+    print(f"{'boxes':>6} {'loop us':>10} {'vector us':>10} {'speedup':>8}")
+    for n_boxes in args.boxes:
+        result = make_result(n_boxes, rng)
+        expected = legacy_loop([result], COCO_NAMES)
+        actual = detection_filter.summarize(result)
+        assert expected[0] == actual[0] and len(expected[1]) == len(actual[1]), (expected, actual)
+
+        loop = timeit.timeit(lambda: legacy_loop([result], COCO_NAMES), number=args.number)
+        vector = timeit.timeit(lambda: detection_filter.summarize(result), number=args.number)
+        loop_us = loop / args.number * 1e6
+        vector_us = vector / args.number * 1e6
+        print(f"{n_boxes:>6} {loop_us:>10.1f} {vector_us:>10.1f} {loop_us / vector_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Stage-level latency, throughput and memory of the frame analysis path
+
+Replays the JPEGs under frames/ through each stage of detect_cheating in
+isolation and then end to end: base64 decode, PIL open, numpy
+conversion, letterbox preprocessing, YOLO inference, box
+post-processing, JPEG evidence save and a SQLAlchemy commit of one
+violation row. Each stage reports p50/p95/p99 latency, throughput and
+the tracemalloc peak (Python-side allocations only; torch and OpenCV
+buffers are not traced). Run from the repository root:
+
+    python benchmarks/bench_stages.py --output bench.json
+    python benchmarks/bench_stages.py --compare bench.json
+
+With --compare the new run is diffed against a saved one and the
+script exits with status 1 if any stage's p50 or p95 regressed by more
+than --threshold percent.
+"""
+import argparse
+import base64
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import Column, DateTime, Float, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection import DetectionFilter
+from preprocess import LetterboxPreprocessor
+
+CHEATING_OBJECTS = ['cell phone', 'book', 'laptop', 'tablet']
+PERSON_CLASS = 'person'
+
+Base = declarative_base()
+
+
+# Mirrors CheatingViolation in app.py without importing the app
+class CheatingViolation(Base):
+    __tablename__ = 'cheating_violation'
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(36), nullable=False)
+    violation_type = Column(String(50), nullable=False)
+    object_name = Column(String(50))
+    confidence = Column(Float)
+    person_count = Column(Integer)
+    image_path = Column(String(255))
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True)
+        return commit.stdout.strip(), bool(status.stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def measure(stage, inputs, repeats):
+    """Time ``stage`` over ``inputs``, then trace its peak allocation in a separate pass"""
+    timings = []
+    for _ in range(repeats):
+        for item in inputs:
+            started = time.perf_counter()
+            stage(item)
+            timings.append((time.perf_counter() - started) * 1000.0)
+
+    tracemalloc.start()
+    for item in inputs:
+        stage(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_seconds = sum(timings) / 1000.0
+    return {
+        'samples': len(timings),
+        'p50_ms': round(percentile(timings, 50), 4),
+        'p95_ms': round(percentile(timings, 95), 4),
+        'p99_ms': round(percentile(timings, 99), 4),
+        'mean_ms': round(float(np.mean(timings)), 4),
+        'throughput_per_s': round(len(timings) / total_seconds, 2) if total_seconds else None,
+        'peak_memory_bytes': peak
+    }
+
+
+def run(args):
+    paths = sorted(glob.glob(os.path.join(args.frames_dir, '**', '*.jpg'), recursive=True))[:args.frames]
+    if not paths:
+        sys.exit(f"No frames found under {args.frames_dir}")
+
+    from ultralytics import YOLO
+    model = YOLO(args.weights, task='detect')
+    detection_filter = DetectionFilter(model.names, PERSON_CLASS, CHEATING_OBJECTS, conf=args.conf)
+    preprocessor = LetterboxPreprocessor(args.size)
+    model_kwargs = dict(detection_filter.model_kwargs(), imgsz=args.size)
+
+    workdir = tempfile.mkdtemp(prefix='bench_stages_')
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(engine)
+    db_session = Session(engine)
+
+    # Inputs for each stage are the outputs of the stage before it
+    encoded = [base64.b64encode(open(path, 'rb').read()).decode() for path in paths]
+    raw = [base64.b64decode(data) for data in encoded]
+    images = [Image.open(io.BytesIO(data)).convert('RGB') for data in raw]
+    arrays = [np.array(image) for image in images]
+    canvases = [preprocessor(array).copy() for array in arrays]
+    model(canvases[0], verbose=False, **model_kwargs)
+    results = [model(canvas, verbose=False, **model_kwargs)[0] for canvas in canvases]
+    evidence_path = os.path.join(workdir, 'evidence.jpg')
+
+    def open_image(data):
+        return Image.open(io.BytesIO(data)).convert('RGB')
+
+    def infer(canvas):
+        return model(canvas, verbose=False, **model_kwargs)[0]
+
+    def save_evidence(image):
+        image.save(evidence_path, 'JPEG', quality=args.quality)
+
+    def commit(index):
+        db_session.add(CheatingViolation(session_id='bench', violation_type='object_detected',
+                                         object_name='cell phone', confidence=0.9,
+                                         image_path=evidence_path))
+        db_session.commit()
+
+    def end_to_end(data):
+        image = open_image(base64.b64decode(data))
+        person_count, detections = detection_filter.summarize(infer(preprocessor(np.array(image))))
+        save_evidence(image)
+        commit(0)
+        return person_count, detections
+
+    stages = [
+        ('base64_decode', base64.b64decode, encoded, args.repeats),
+        ('pil_open', open_image, raw, args.repeats),
+        ('np_array', np.array, images, args.repeats),
+        ('preprocess', preprocessor, arrays, args.repeats),
+        ('inference', infer, canvases, args.inference_repeats),
+        ('postprocess', detection_filter.summarize, results, args.repeats),
+        ('evidence_save', save_evidence, images, args.repeats),
+        ('db_commit', commit, list(range(len(paths))), args.repeats),
+        ('end_to_end', end_to_end, encoded, args.inference_repeats),
+    ]
+
+    report = {'stages': {}}
+    for name, stage, inputs, repeats in stages:
+        if args.stages and name not in args.stages:
+            continue
+        report['stages'][name] = measure(stage, inputs, repeats)
+        print(f"{name:>14}: p50 {report['stages'][name]['p50_ms']:.3f}ms", file=sys.stderr)
+
+    db_session.close()
+    engine.dispose()
+
+    commit_id, dirty = git_commit()
+    report.update({
+        'commit': commit_id,
+        'dirty': dirty,
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'frames': len(paths),
+            'weights': args.weights,
+            'size': args.size,
+            'conf': args.conf,
+            'quality': args.quality,
+            'repeats': args.repeats,
+            'inference_repeats': args.inference_repeats
+        }
+    })
+    return report
+
+
+def compare(baseline, current, threshold):
+    """Print per-stage deltas and return the stages that regressed"""
+    regressions = []
+    print(f"baseline {baseline.get('commit')} -> current {current.get('commit')}")
+    print(f"{'stage':>14} {'p50 base':>10} {'p50 now':>10} {'p50 %':>7} {'p95 base':>10} {'p95 now':>10} {'p95 %':>7}")
+    for name, now in current['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            continue
+        deltas = {}
+        for key in ('p50_ms', 'p95_ms'):
+            deltas[key] = (now[key] - base[key]) / base[key] * 100.0 if base[key] else 0.0
+        flag = ' REGRESSED' if max(deltas.values()) > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:>14} {base['p50_ms']:>10.3f} {now['p50_ms']:>10.3f} {deltas['p50_ms']:>+6.1f}% "
+              f"{base['p95_ms']:>10.3f} {now['p95_ms']:>10.3f} {deltas['p95_ms']:>+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--size', type=int, default=640)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--quality', type=int, default=90)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--inference-repeats', type=int, default=1)
+    parser.add_argument('--stages', nargs='+', help='only run these stages')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON report to diff against')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent slowdown in p50 or p95 that counts as a regression')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Sustained SQLite write throughput under concurrent interview sessions
+
+Simulates N sessions, each on its own thread, inserting violation and
+answer rows as fast as it can for a fixed duration, and compares three
+storage setups on a fresh temporary database:
+
+    rollback  default rollback journal, one commit per insert
+    wal       WAL + busy_timeout (storage.configure_sqlite), one commit per insert
+    group     WAL + busy_timeout, inserts submitted to storage.GroupCommitWriter
+
+Reports committed writes per second, 'database is locked' and other
+errors, and per-write latency percentiles. Run from the repository root:
+
+    python benchmarks/bench_storage.py --sessions 10 50 200 --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import GroupCommitWriter, configure_sqlite
+
+MODES = ('rollback', 'wal', 'group')
+
+
+def build_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db = SQLAlchemy(app)
+
+    # Mirror the write-heavy tables in app.py without importing the app
+    class CheatingViolation(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        session_id = db.Column(db.String(36), nullable=False)
+        violation_type = db.Column(db.String(50), nullable=False)
+        object_name = db.Column(db.String(50))
+        confidence = db.Column(db.Float)
+        timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    class InterviewAnswer(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        session_id = db.Column(db.String(36), nullable=False)
+        question_number = db.Column(db.Integer, nullable=False)
+        answer_text = db.Column(db.Text)
+        timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    with app.app_context():
+        db.create_all()
+    return app, db, CheatingViolation, InterviewAnswer
+
+
+def make_row(models, session_id, n):
+    violation_model, answer_model = models
+    if n % 4 == 3:
+        return answer_model(session_id=session_id, question_number=n, answer_text='answer ' * 20)
+    return violation_model(session_id=session_id, violation_type='object_detected',
+                           object_name='cell phone', confidence=0.8)
+
+
+def run(mode, sessions, seconds, busy_timeout_ms, max_delay_ms):
+    with tempfile.TemporaryDirectory() as tmp:
+        app, db, *models = build_app(os.path.join(tmp, 'bench.db'))
+        writer = None
+        if mode != 'rollback':
+            # pysqlite's own 5 s lock timeout still applies in rollback mode
+            with app.app_context():
+                configure_sqlite(db.engine, busy_timeout_ms=busy_timeout_ms)
+        if mode == 'group':
+            writer = GroupCommitWriter(app, db, max_delay_ms=max_delay_ms)
+
+        counts = {'committed': 0, 'locked': 0, 'errors': 0}
+        latencies = []
+        lock = threading.Lock()
+        stop_at = time.perf_counter() + seconds
+        start = threading.Barrier(sessions + 1)
+
+        def session_loop(index):
+            session_id = f'bench-{index:04d}'
+            local = {'committed': 0, 'locked': 0, 'errors': 0}
+            local_latencies = []
+            with app.app_context():
+                start.wait()
+                n = 0
+                while time.perf_counter() < stop_at:
+                    row = make_row(models, session_id, n)
+                    n += 1
+                    started = time.perf_counter()
+                    try:
+                        if writer is not None:
+                            writer.submit(lambda s, row=row: s.add(row))
+                        else:
+                            db.session.add(row)
+                            db.session.commit()
+                        local['committed'] += 1
+                        local_latencies.append((time.perf_counter() - started) * 1000.0)
+                    except OperationalError as e:
+                        db.session.rollback()
+                        local['locked' if 'locked' in str(e) else 'errors'] += 1
+                    except Exception:
+                        db.session.rollback()
+                        local['errors'] += 1
+                db.session.remove()
+            with lock:
+                for key, value in local.items():
+                    counts[key] += value
+                latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=session_loop, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        result = {
+            'mode': mode,
+            'sessions': sessions,
+            'seconds': round(elapsed, 2),
+            'writes_per_second': round(counts['committed'] / elapsed, 1),
+            **counts,
+            'latency_ms_p50': round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+            'latency_ms_p99': round(float(np.percentile(latencies, 99)), 3) if latencies else None,
+        }
+        if writer is not None:
+            result['mean_batch_size'] = writer.stats()['mean_batch_size']
+        with app.app_context():
+            db.engine.dispose()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--busy-timeout-ms', type=int, default=5000)
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<10}{'sessions':>9}{'writes/s':>11}{'locked':>8}{'errors':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for sessions in args.sessions:
+        for mode in args.modes:
+            result = run(mode, sessions, args.seconds, args.busy_timeout_ms, args.max_delay_ms)
+            results.append(result)
+            print(f"{mode:<10}{sessions:>9}{result['writes_per_second']:>11.1f}{result['locked']:>8}"
+                  f"{result['errors']:>8}{result['latency_ms_p50'] or 0:>9.2f}{result['latency_ms_p99'] or 0:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
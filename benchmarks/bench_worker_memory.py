@@ -0,0 +1,93 @@
+"""Resident memory per worker with and without a preloaded, shared model
+
+Forks N workers the way gunicorn does and reports RSS, PSS (shared pages
+split between processes) and USS (private pages) per worker once every
+worker has run a warm-up inference:
+
+  per-worker  each worker loads its own YOLO copy (gunicorn without --preload)
+  preload     the parent loads and warms the model, freezes the GC and forks
+
+Run from the repository root (Linux only, needs /proc/self/smaps_rollup):
+
+    python benchmarks/bench_worker_memory.py [--workers 4] [--weights yolov8n.pt]
+"""
+import argparse
+import gc
+import multiprocessing as mp
+
+import numpy as np
+
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    uss = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss': fields.get('Rss', 0), 'pss': fields.get('Pss', 0), 'uss': uss}
+
+
+def load_model(weights):
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    warm_up(model)
+    return model
+
+
+def warm_up(model):
+    model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
+
+
+def worker(model, weights, ready, results):
+    if model is None:
+        model = load_model(weights)
+    else:
+        warm_up(model)
+    # Measure only once every sibling is resident, so PSS reflects sharing
+    ready.wait()
+    results.put(memory_kb())
+    ready.wait()
+
+
+def run(mode, workers, weights, out):
+    ctx = mp.get_context('fork')
+    model = None
+    if mode == 'preload':
+        model = load_model(weights)
+        gc.freeze()
+
+    ready = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(model, weights, ready, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    samples = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    out.put({key: sum(s[key] for s in samples) / len(samples) / 1024.0 for key in ('rss', 'pss', 'uss')})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--weights', default='yolov8n.pt')
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, weights {args.weights}")
+    print(f"{'mode':<12} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9}")
+    for mode in ('per-worker', 'preload'):
+        # Each mode runs in a fresh process so the parent starts clean
+        ctx = mp.get_context('spawn')
+        out = ctx.Queue()
+        proc = ctx.Process(target=run, args=(mode, args.workers, args.weights, out))
+        proc.start()
+        row = out.get()
+        proc.join()
+        print(f"{mode:<12} {row['rss']:>9.1f} {row['pss']:>9.1f} {row['uss']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Parity and latency of exported detector backends against the PyTorch model
+
+Runs the reference weights and each candidate (ONNX, OpenVINO, INT8...)
+over the stored evidence frames and reports, per proctoring class, how
+many reference detections the candidate recovers (same class, IoU above
+--iou), alongside per-frame latency. Run from the repository root:
+
+    python benchmarks/detector_parity.py --candidates yolov8n.onnx yolov8n_int8_openvino_model
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+from ultralytics import YOLO
+
+PARITY_CLASSES = ['person', 'cell phone', 'book', 'laptop']
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def run_backend(weights, images, conf, class_ids):
+    model = YOLO(weights, task='detect')
+    # Warm up so lazy initialization is not counted as latency
+    model(images[0], verbose=False, conf=conf, classes=class_ids)
+
+    latencies, detections = [], []
+    for image in images:
+        started = time.perf_counter()
+        result = model(image, verbose=False, conf=conf, classes=class_ids)[0]
+        latencies.append(time.perf_counter() - started)
+        data = result.boxes.data.cpu().numpy()
+        detections.append([(int(row[5]), row[:4]) for row in data])
+    latencies = np.array(latencies) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'mean_ms': float(latencies.mean()),
+    }, detections
+
+
+def recall_by_class(reference, candidate, class_ids, iou_threshold):
+    found = {class_id: 0 for class_id in class_ids}
+    total = {class_id: 0 for class_id in class_ids}
+    for ref_boxes, cand_boxes in zip(reference, candidate):
+        unmatched = list(cand_boxes)
+        for class_id, box in ref_boxes:
+            total[class_id] += 1
+            best = max(
+                (i for i, (cand_id, _) in enumerate(unmatched) if cand_id == class_id),
+                key=lambda i: iou(box, unmatched[i][1]),
+                default=None
+            )
+            if best is not None and iou(box, unmatched[best][1]) >= iou_threshold:
+                found[class_id] += 1
+                unmatched.pop(best)
+    return {
+        class_id: (found[class_id] / total[class_id] if total[class_id] else None, total[class_id])
+        for class_id in class_ids
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reference', default='yolov8n.pt')
+    parser.add_argument('--candidates', nargs='+', required=True)
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.frames_dir, '**', '*.jpg'), recursive=True))[:args.limit]
+    if not paths:
+        print(f"No frames found under {args.frames_dir}/")
+        return
+    images = [np.array(Image.open(p).convert('RGB'))[:, :, ::-1] for p in paths]
+
+    names = YOLO(args.reference).names
+    ids_by_name = {name: class_id for class_id, name in names.items()}
+    class_ids = [ids_by_name[name] for name in PARITY_CLASSES]
+
+    ref_latency, reference = run_backend(args.reference, images, args.conf, class_ids)
+    report = {'frames': len(images), 'reference': {'weights': args.reference, **ref_latency}, 'candidates': []}
+
+    header = f"{'backend':<36} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}"
+    header += ''.join(f" {name[:10]:>12}" for name in PARITY_CLASSES)
+    print(f"{len(images)} frames, conf>{args.conf}, IoU>={args.iou}; recall vs reference (reference count)")
+    print(header)
+    ref_counts = ''.join(
+        f" {'(' + str(sum(1 for boxes in reference for c, _ in boxes if c == class_id)) + ')':>12}"
+        for class_id in class_ids
+    )
+    print(f"{args.reference:<36} {ref_latency['p50_ms']:>8.1f} {ref_latency['p95_ms']:>8.1f} {'1.00x':>8}{ref_counts}")
+
+    for weights in args.candidates:
+        latency, candidate = run_backend(weights, images, args.conf, class_ids)
+        recalls = recall_by_class(reference, candidate, class_ids, args.iou)
+        speedup = ref_latency['p50_ms'] / latency['p50_ms']
+        cells = ''.join(
+            f" {'n/a' if recalls[class_id][0] is None else format(recalls[class_id][0], '.3f'):>12}"
+            for class_id in class_ids
+        )
+        print(f"{weights:<36} {latency['p50_ms']:>8.1f} {latency['p95_ms']:>8.1f} {speedup:>7.2f}x{cells}")
+        report['candidates'].append({
+            'weights': weights,
+            **latency,
+            'speedup_p50': speedup,
+            'recall': {names[class_id]: recalls[class_id][0] for class_id in class_ids},
+            'reference_counts': {names[class_id]: recalls[class_id][1] for class_id in class_ids}
+        })
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
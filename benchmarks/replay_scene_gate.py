@@ -0,0 +1,94 @@
+"""Replay stored sessions through the scene-change gate
+
+Every frame under frames/<session_id>/ is run through YOLO to get the
+ground-truth violations, then replayed in capture order (timestamps come
+from the file names) through SceneGate at several thresholds. A false
+negative is a frame whose ground truth contains a violation (object or
+multiple persons) that the gated result is missing. Run from the
+repository root:
+
+    python benchmarks/replay_scene_gate.py [--thresholds 2 4 6 8 12]
+"""
+import argparse
+import glob
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection import DetectionFilter
+from scene_gate import SceneGate
+
+CHEATING_OBJECTS = ['cell phone', 'book', 'laptop', 'tablet']
+PERSON_CLASS = 'person'
+
+
+def capture_time(path):
+    # violation_000002_20250823_114602_912.jpg
+    stem = os.path.splitext(os.path.basename(path))[0]
+    date, clock, millis = stem.split('_')[2:5]
+    return datetime.strptime(f"{date}{clock}{millis}", "%Y%m%d%H%M%S%f").timestamp()
+
+
+def violation_keys(detections):
+    person_count, objects = detections
+    keys = {name for name, _ in objects}
+    if person_count > 1:
+        keys.add('multiple_persons')
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[2, 4, 6, 8, 12])
+    parser.add_argument('--max-staleness', type=float, default=2.0)
+    args = parser.parse_args()
+
+    model = YOLO(args.weights, task='detect')
+    detection_filter = DetectionFilter(model.names, PERSON_CLASS, CHEATING_OBJECTS)
+
+    sessions = []
+    for session_dir in sorted(glob.glob(os.path.join(args.frames_dir, '*'))):
+        paths = sorted(glob.glob(os.path.join(session_dir, '*.jpg')), key=capture_time)
+        frames = []
+        for path in paths:
+            image = Image.open(path).convert('RGB')
+            result = model(np.array(image), verbose=False, **detection_filter.model_kwargs())[0]
+            frames.append((capture_time(path), image, detection_filter.summarize(result)))
+        if frames:
+            sessions.append((os.path.basename(session_dir), frames))
+
+    total = sum(len(frames) for _, frames in sessions)
+    positives = sum(1 for _, frames in sessions for _, _, truth in frames if violation_keys(truth))
+    print(f"{len(sessions)} sessions, {total} frames, {positives} with violations; "
+          f"max staleness {args.max_staleness}s")
+    print(f"{'threshold':>9} {'hit rate':>9} {'false neg':>10} {'FN rate':>8}")
+
+    for threshold in args.thresholds:
+        gate = SceneGate(threshold=threshold, max_staleness=args.max_staleness)
+        hits = false_negatives = 0
+        for session_id, frames in sessions:
+            for captured_at, image, truth in frames:
+                thumbnail = gate.thumbnail(image)
+                cached = gate.lookup(session_id, thumbnail, now=captured_at)
+                if cached is None:
+                    gate.store(session_id, thumbnail, truth, now=captured_at)
+                    served = truth
+                else:
+                    hits += 1
+                    served = cached
+                if violation_keys(truth) - violation_keys(served):
+                    false_negatives += 1
+        fn_rate = false_negatives / positives if positives else 0.0
+        print(f"{threshold:>9.1f} {hits / total:>9.3f} {false_negatives:>10} {fn_rate:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Replay stored sessions through tracking mode
+
+Every frame under frames/<session_id>/ is run through YOLO once to get
+ground-truth person boxes and violations. Sessions are then replayed in
+capture order through PersonTracker; keyframes reuse the ground truth
+of their frame, as the detector would return it. Reports the share of
+frames that needed the detector, how often the tracked person count
+matched, and the delay (in frames) before a multiple-person episode
+was reported. Run from the repository root:
+
+    python benchmarks/replay_tracking.py [--max-intervals 4 8 12 24]
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+
+import numpy as np
+from PIL import Image
+from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection import DetectionFilter
+from preprocess import LetterboxPreprocessor
+from replay_scene_gate import CHEATING_OBJECTS, PERSON_CLASS, capture_time
+from tracking import PersonTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--frames-dir', default='frames')
+    parser.add_argument('--size', type=int, default=640)
+    parser.add_argument('--min-interval', type=int, default=2)
+    parser.add_argument('--max-intervals', type=int, nargs='+', default=[4, 8, 12, 24])
+    args = parser.parse_args()
+
+    model = YOLO(args.weights, task='detect')
+    detection_filter = DetectionFilter(model.names, PERSON_CLASS, CHEATING_OBJECTS)
+    preprocessor = LetterboxPreprocessor(args.size)
+    kwargs = dict(detection_filter.model_kwargs(), imgsz=args.size)
+    prepare = PersonTracker(track_size=160).prepare
+
+    sessions = []
+    for session_dir in sorted(glob.glob(os.path.join(args.frames_dir, '*'))):
+        paths = sorted(glob.glob(os.path.join(session_dir, '*.jpg')), key=capture_time)
+        frames = []
+        for path in paths:
+            canvas = preprocessor(np.array(Image.open(path).convert('RGB')))
+            result = model(canvas, verbose=False, **kwargs)[0]
+            frames.append((capture_time(path), prepare(canvas), detection_filter.person_boxes(result),
+                           detection_filter.summarize(result)))
+        if frames:
+            sessions.append((os.path.basename(session_dir), frames))
+
+    total = sum(len(frames) for _, frames in sessions)
+    onsets = sum(1 for _, frames in sessions for i, frame in enumerate(frames)
+                 if frame[3][0] > 1 and (i == 0 or frames[i - 1][3][0] <= 1))
+    print(f"{len(sessions)} sessions, {total} frames, {onsets} multiple-person onsets")
+    print(f"{'max interval':>12} {'detector':>9} {'count ok':>9} {'delay p50':>10} {'delay max':>10} {'missed':>7}")
+
+    for max_interval in args.max_intervals:
+        tracker = PersonTracker(min_interval=args.min_interval, max_interval=max_interval)
+        keyframes = agreed = missed = 0
+        delays = []
+        for session_id, frames in sessions:
+            onset = None
+            for index, (captured_at, frame, boxes, truth) in enumerate(frames):
+                served = tracker.track(session_id, frame, now=captured_at)
+                if served is None:
+                    keyframes += 1
+                    tracker.keyframe(session_id, frame, boxes, truth, args.size, now=captured_at)
+                    served = truth
+                agreed += served[0] == truth[0]
+
+                if truth[0] > 1 and onset is None:
+                    onset = index
+                if onset is not None and served[0] > 1:
+                    delays.append(index - onset)
+                    onset = None
+                elif truth[0] <= 1 and onset is not None:
+                    missed += 1
+                    onset = None
+            missed += onset is not None
+
+        delay_p50 = f"{statistics.median(delays):.1f}" if delays else '-'
+        delay_max = f"{max(delays)}" if delays else '-'
+        print(f"{max_interval:>12} {keyframes / total:>9.3f} {agreed / total:>9.3f} "
+              f"{delay_p50:>10} {delay_max:>10} {missed:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class DetectionFilter:
+    """Vectorized post-processing of YOLO boxes for proctoring
+
+    Class names are resolved to IDs once, so per-frame work is a handful of
+    array operations over ``boxes.cls`` and ``boxes.conf``. ``model_kwargs``
+    pushes the confidence threshold and the class whitelist into the model
+    call so irrelevant detections are dropped inside NMS.
+    """
+
+    def __init__(self, names, person_class, cheating_objects, conf=0.5):
+        ids_by_name = {name: class_id for class_id, name in names.items()}
+        self.names = names
+        self.conf = float(conf)
+        self.person_id = ids_by_name.get(person_class, -1)
+        self.cheating_ids = np.array(
+            sorted(ids_by_name[name] for name in cheating_objects if name in ids_by_name),
+            dtype=np.int64
+        )
+
+        classes = list(self.cheating_ids)
+        if self.person_id >= 0:
+            classes.append(self.person_id)
+        self.classes = sorted(int(c) for c in classes)
+
+    def model_kwargs(self):
+        return {'conf': self.conf, 'classes': self.classes}
+
+    def summarize(self, result):
+        """Return (person_count, [(object_name, confidence), ...]) for one result"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return 0, []
+
+        cls = _to_numpy(boxes.cls).astype(np.int64, copy=False)
+        conf = _to_numpy(boxes.conf)
+
+        confident = conf > self.conf
+        person_count = int(np.count_nonzero(confident & (cls == self.person_id)))
+
+        objects = np.flatnonzero(confident & np.isin(cls, self.cheating_ids))
+        detections = [(self.names[int(cls[i])], float(conf[i])) for i in objects]
+        return person_count, detections
+
+    def person_boxes(self, result):
+        """Return an (N, 4) xyxy array of the confident person boxes in a result"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return np.empty((0, 4), dtype=np.float32)
+
+        cls = _to_numpy(boxes.cls).astype(np.int64, copy=False)
+        conf = _to_numpy(boxes.conf)
+        return _to_numpy(boxes.xyxy)[(conf > self.conf) & (cls == self.person_id)]
+
+
+def _to_numpy(values):
+    if hasattr(values, 'cpu'):
+        values = values.cpu().numpy()
+    return np.asarray(values)
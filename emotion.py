@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Output order of the DeepFace Emotion model
+EMOTION_LABELS = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+
+
+class EmotionAnalyzer:
+    """Facial emotion classification on the person boxes YOLO already found
+
+    Each person crop is searched for a face with a Haar cascade; faces are
+    reduced to the 48x48 grayscale input of the DeepFace Emotion model.
+    ``predict_batch`` takes the face stacks of several frames and runs
+    them through the resident Keras model in one forward pass, so it can
+    be handed to an InferenceScheduler to batch across sessions. The model
+    is built on first use in each process, since TensorFlow does not
+    survive fork. The last result per session is kept for frames that
+    skip the detector.
+    """
+
+    def __init__(self, max_faces=4, min_face=32, scale_factor=1.1, min_neighbors=5, session_ttl=300.0):
+        self.max_faces = int(max_faces)
+        self.min_face = int(min_face)
+        self.scale_factor = float(scale_factor)
+        self.min_neighbors = int(min_neighbors)
+        self.session_ttl = session_ttl
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.model = None
+        self._model_pid = None
+        self._model_lock = threading.Lock()
+
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._counts = {'crops': 0, 'faces': 0, 'no_face': 0}
+
+    def load(self):
+        """Build the DeepFace Emotion model once per process and keep it in memory"""
+        pid = os.getpid()
+        if self._model_pid == pid:
+            return
+        with self._model_lock:
+            if self._model_pid == pid:
+                return
+            from deepface import DeepFace
+            from deepface.models.demography import Emotion
+            model = DeepFace.build_model(model_name='Emotion', task='facial_attribute').model
+            # faces() prepares what DeepFace.analyze feeds this model in
+            # deepface 0.0.95: 48x48 grayscale scaled to [0, 1], scored in
+            # the order of Emotion.labels
+            if tuple(model.input_shape[1:]) != (48, 48, 1) or model.output_shape[-1] != len(EMOTION_LABELS):
+                raise RuntimeError(f"Unexpected Emotion model shape {model.input_shape} -> {model.output_shape}")
+            if tuple(Emotion.labels) != EMOTION_LABELS:
+                raise RuntimeError(f"Unexpected Emotion labels {Emotion.labels}")
+            self.model = model
+            self.model.predict_on_batch(np.zeros((1, 48, 48, 1), dtype=np.float32))
+            self._model_pid = pid
+
+    def faces(self, canvas, person_boxes):
+        """Return an (N, 48, 48, 1) float32 stack of faces found in the person boxes
+
+        ``canvas`` is the BGR frame the boxes were detected on.
+        """
+        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        boxes = np.asarray(person_boxes, dtype=np.float32).reshape(-1, 4)
+        # Largest people first; they are nearest the camera
+        order = np.argsort(-(boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]))
+
+        faces = []
+        for x1, y1, x2, y2 in boxes[order[:self.max_faces]].astype(int):
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+            crop = gray[y1:y2, x1:x2]
+            if crop.shape[0] < self.min_face or crop.shape[1] < self.min_face:
+                continue
+            self._count('crops')
+            found = self.face_cascade.detectMultiScale(
+                crop, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+                minSize=(self.min_face, self.min_face)
+            )
+            if len(found) == 0:
+                self._count('no_face')
+                continue
+            fx, fy, fw, fh = max(found, key=lambda face: face[2] * face[3])
+            face = cv2.resize(crop[fy:fy + fh, fx:fx + fw], (48, 48), interpolation=cv2.INTER_AREA)
+            faces.append(face)
+            self._count('faces')
+
+        if not faces:
+            return np.empty((0, 48, 48, 1), dtype=np.float32)
+        return (np.stack(faces)[..., None] / 255.0).astype(np.float32)
+
+    def predict_batch(self, face_stacks):
+        """Classify the faces of several frames in one forward pass"""
+        counts = [len(stack) for stack in face_stacks]
+        if not sum(counts):
+            return [[] for _ in face_stacks]
+
+        self.load()
+        probabilities = np.asarray(self.model.predict_on_batch(np.concatenate(face_stacks)))
+        results, start = [], 0
+        for count in counts:
+            results.append([self._describe(row) for row in probabilities[start:start + count]])
+            start += count
+        return results
+
+    def _describe(self, row):
+        total = float(row.sum()) or 1.0
+        scores = {label: round(100.0 * float(value) / total, 2) for label, value in zip(EMOTION_LABELS, row)}
+        dominant = EMOTION_LABELS[int(np.argmax(row))]
+        return {'dominant_emotion': dominant, 'confidence': scores[dominant], 'emotion': scores}
+
+    def remember(self, session_id, emotions, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._latest[session_id] = (emotions, now)
+            if now - self._last_prune > self.session_ttl:
+                stale = [sid for sid, (_, at) in self._latest.items() if now - at > self.session_ttl]
+                for sid in stale:
+                    del self._latest[sid]
+                self._last_prune = now
+
+    def latest(self, session_id):
+        with self._lock:
+            entry = self._latest.get(session_id)
+        return entry[0] if entry else []
+
+    def forget(self, session_id):
+        with self._lock:
+            self._latest.pop(session_id, None)
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return {'tracked_sessions': len(self._latest), **self._counts}
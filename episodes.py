@@ -0,0 +1,156 @@
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from evidence import DISCARDED_STATUSES
+
+
+def difference_hash(image):
+    """64-bit dHash of a PIL image, robust to small shifts and re-encoding"""
+    small = image.convert('L').resize((9, 8), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class Episode:
+    """Consecutive detections of one violation condition in a session"""
+
+    def __init__(self, session_id, key, violation, now):
+        self.session_id = session_id
+        self.key = key
+        self.violation_type = 'multiple_persons' if key == 'multiple_persons' else 'object_detected'
+        self.started_at = now
+        self.ended_at = now
+        self.frames = 0
+        self.peak_confidence = None
+        self.peak_person_count = None
+        self.evidence_hashes = []
+        self.evidence_count = 0
+        self.evidence_jobs = []
+        self.record_id = None
+        self.update(violation, now)
+
+    @property
+    def evidence_path(self):
+        """Path of the newest evidence frame that was not dropped or failed"""
+        for job in reversed(self.evidence_jobs):
+            if job.status not in DISCARDED_STATUSES:
+                return job.path
+        return None
+
+    def add_evidence(self, job, keep=16):
+        self.evidence_jobs.append(job)
+        del self.evidence_jobs[:-keep]
+
+    def update(self, violation, now):
+        """Extend the episode by one frame"""
+        self.ended_at = now
+        self.frames += 1
+        self.update_peaks(violation)
+
+    def update_peaks(self, violation):
+        """Fold another box from an already counted frame into the peaks"""
+        confidence = violation.get('confidence')
+        if confidence is not None and (self.peak_confidence is None or confidence > self.peak_confidence):
+            self.peak_confidence = confidence
+        count = violation.get('count')
+        if count is not None and (self.peak_person_count is None or count > self.peak_person_count):
+            self.peak_person_count = count
+
+
+class EpisodeTracker:
+    """Merges per-frame violations into episodes and deduplicates evidence
+
+    A detection extends the open episode for the same object (or the
+    multiple-persons condition) if it was last seen within ``gap_seconds``;
+    otherwise a new episode starts. Evidence frames are only kept when
+    their dHash differs from every frame already kept for the episode by
+    more than ``hash_distance`` bits.
+
+    Open episodes are held in process memory. Under gunicorn each worker
+    tracks the frames it happens to receive, so a session whose frames are
+    spread over several workers gets one episode (and one violation row)
+    per worker for the same condition, each counting only that worker's
+    frames. Route a session's frames to one worker (sticky sessions) or run
+    a single worker when episode counts must be exact.
+    """
+
+    def __init__(self, gap_seconds=3.0, hash_distance=10, max_hashes=16):
+        self.gap_seconds = float(gap_seconds)
+        self.hash_distance = int(hash_distance)
+        self.max_hashes = int(max_hashes)
+        self._open = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def observe(self, session_id, violations, now):
+        """Fold one analyzed frame into the session's episodes
+
+        Returns ``(opened, extended, closed)`` lists of episodes.
+        """
+        opened, extended, closed = [], [], []
+        with self._lock:
+            episodes = self._open.setdefault(session_id, {})
+            seen = set()
+            for violation in violations:
+                key = violation['object']
+                if key in seen:
+                    # Several boxes of one class in a frame count once
+                    episodes[key].update_peaks(violation)
+                    continue
+                seen.add(key)
+
+                episode = episodes.get(key)
+                if episode is not None and (now - episode.ended_at).total_seconds() > self.gap_seconds:
+                    closed.append(episodes.pop(key))
+                    episode = None
+                if episode is None:
+                    episode = episodes[key] = Episode(session_id, key, violation, now)
+                    opened.append(episode)
+                else:
+                    episode.update(violation, now)
+                    extended.append(episode)
+
+            for key in list(episodes):
+                if key not in seen and (now - episodes[key].ended_at).total_seconds() > self.gap_seconds:
+                    closed.append(episodes.pop(key))
+            if not episodes:
+                del self._open[session_id]
+
+            if time.monotonic() - self._last_sweep > max(self.gap_seconds, 1.0) * 10:
+                closed.extend(self._sweep(now))
+        return opened, extended, closed
+
+    def _sweep(self, now):
+        # Sessions that stopped sending frames still need their episodes closed
+        closed = []
+        for session_id in list(self._open):
+            episodes = self._open[session_id]
+            for key in list(episodes):
+                if (now - episodes[key].ended_at).total_seconds() > self.gap_seconds:
+                    closed.append(episodes.pop(key))
+            if not episodes:
+                del self._open[session_id]
+        self._last_sweep = time.monotonic()
+        return closed
+
+    def wants_evidence(self, episode, frame_hash):
+        """Record ``frame_hash`` and return True if it is new for the episode"""
+        with self._lock:
+            if any(hamming_distance(frame_hash, h) <= self.hash_distance for h in episode.evidence_hashes):
+                return False
+            episode.evidence_hashes.append(frame_hash)
+            del episode.evidence_hashes[:-self.max_hashes]
+            episode.evidence_count += 1
+            return True
+
+    def close_session(self, session_id):
+        with self._lock:
+            return list(self._open.pop(session_id, {}).values())
@@ -0,0 +1,295 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_new', 'inline')
+DISCARDED_STATUSES = ('dropped', 'failed')
+
+
+class EvidenceJob:
+    """A violation frame waiting to be encoded and written to disk"""
+
+    def __init__(self, image, path, session_id=None):
+        self.evidence_id = uuid.uuid4().hex
+        self.image = image
+        self.path = path
+        self.session_id = session_id
+        self.status = 'pending'
+        self.error = None
+        self.created_at = time.time()
+        self.saved_at = None
+
+    def to_dict(self):
+        return {
+            'evidence_id': self.evidence_id,
+            'status': self.status,
+            'path': self.path,
+            'error': self.error,
+            'created_at': self.created_at,
+            'saved_at': self.saved_at
+        }
+
+    @classmethod
+    def from_dict(cls, data, session_id=None):
+        job = cls(None, data['path'], session_id)
+        job.evidence_id = data['evidence_id']
+        job.status = data['status']
+        job.error = data.get('error')
+        job.created_at = data.get('created_at')
+        job.saved_at = data.get('saved_at')
+        return job
+
+
+class EvidenceWriter:
+    """Background pool that persists violation evidence frames
+
+    ``submit`` returns immediately with a pending job whose status turns
+    into ``saved`` once the file is on disk. When the bounded queue is
+    full the ``overflow`` policy decides what happens: ``drop_oldest``
+    discards the oldest queued frame, ``drop_new`` discards the new one and
+    ``inline`` writes it on the calling thread.
+
+    With ``state_dir`` set, every status change is also written to
+    ``<state_dir>/<evidence_id>.json`` so any gunicorn worker can resolve
+    an evidence ID, not just the one that queued it. A job's file is
+    removed when the job falls out of the ``retain`` most recent ones, and
+    files older than ``state_ttl`` seconds (left behind by workers that
+    exited) are swept when a process starts its writer threads.
+    ``on_discard`` is called with each job that is dropped or fails to write.
+    """
+
+    def __init__(self, workers=2, max_queue=64, image_format='JPEG', quality=90,
+                 overflow='drop_oldest', retain=10000, observe_write=None,
+                 state_dir=None, state_ttl=86400.0, on_discard=None):
+        image_format = image_format.upper()
+        if image_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported evidence format: {image_format}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.workers = max(1, int(workers))
+        self.image_format = image_format
+        self.extension = FORMAT_EXTENSIONS[image_format]
+        self.quality = int(quality)
+        self.overflow = overflow
+        self.retain = retain
+        # Called with the seconds each write took, e.g. a metrics histogram
+        self.observe_write = observe_write
+        self.state_dir = state_dir
+        self.state_ttl = float(state_ttl)
+        self.on_discard = on_discard
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._counts = {'submitted': 0, 'saved': 0, 'failed': 0, 'dropped': 0, 'inline': 0}
+
+        atexit.register(self.drain)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so gunicorn workers start their own
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'evidence-writer-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.state_dir:
+                threading.Thread(target=self._sweep_state, name='evidence-state-sweep', daemon=True).start()
+            self._pid = pid
+
+    def submit(self, image, directory, basename, session_id=None):
+        """Queue an image for writing and return its pending job"""
+        self._ensure_started()
+        path = os.path.join(directory, f"{basename}.{self.extension}")
+        job = EvidenceJob(image, path, session_id)
+        self._track(job)
+        # Before queueing, so a fast worker's 'saved' is never overwritten
+        self._save_state(job)
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            if self.overflow == 'inline':
+                self._count('inline')
+                self._write(job)
+            elif self.overflow == 'drop_new':
+                self._drop(job)
+            else:
+                try:
+                    self._drop(self._queue.get_nowait())
+                    self._queue.task_done()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    self._drop(job)
+        return job
+
+    def status(self, evidence_id):
+        with self._lock:
+            job = self._jobs.get(evidence_id)
+        if job is not None or not self.state_dir:
+            return job
+        return self._load_state(evidence_id)
+
+    def _state_path(self, evidence_id):
+        return os.path.join(self.state_dir, f"{evidence_id}.json")
+
+    def _save_state(self, job):
+        if not self.state_dir:
+            return
+        with self._lock:
+            if job.evidence_id not in self._jobs:
+                # Evicted while queued; its file is already gone
+                return
+        path = self._state_path(job.evidence_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(job.to_dict(), session_id=job.session_id), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving evidence state {path}: {e}")
+
+    def _remove_state(self, evidence_id):
+        try:
+            os.remove(self._state_path(evidence_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing evidence state {evidence_id}: {e}")
+
+    def _sweep_state(self):
+        cutoff = time.time() - self.state_ttl
+        try:
+            entries = list(os.scandir(self.state_dir))
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error sweeping evidence state {self.state_dir}: {e}")
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith(('.json', '.tmp')) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                # Removed by another worker's sweep
+                pass
+
+    def _load_state(self, evidence_id):
+        # IDs are uuid4 hex; anything else must not reach the filesystem
+        if len(evidence_id) != 32 or any(c not in '0123456789abcdef' for c in evidence_id):
+            return None
+        try:
+            with open(self._state_path(evidence_id)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return EvidenceJob.from_dict(data, data.get('session_id'))
+
+    def _track(self, job):
+        evicted = []
+        with self._lock:
+            self._jobs[job.evidence_id] = job
+            self._counts['submitted'] += 1
+            while len(self._jobs) > self.retain:
+                evicted.append(self._jobs.popitem(last=False)[0])
+        if self.state_dir:
+            for evidence_id in evicted:
+                self._remove_state(evidence_id)
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def _drop(self, job):
+        job.status = 'dropped'
+        job.image = None
+        self._count('dropped')
+        self._discarded(job)
+
+    def _discarded(self, job):
+        self._save_state(job)
+        if self.on_discard is not None:
+            try:
+                self.on_discard(job)
+            except Exception as e:
+                print(f"Error handling discarded evidence {job.path}: {e}")
+
+    def _write(self, job):
+        tmp_path = f"{job.path}.tmp"
+        started = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(job.path), exist_ok=True)
+            options = {} if self.image_format == 'PNG' else {'quality': self.quality}
+            image = job.image
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(tmp_path, self.image_format, **options)
+            # Publish atomically so a saved path is never half-written
+            os.replace(tmp_path, job.path)
+            job.status = 'saved'
+            job.saved_at = time.time()
+            self._count('saved')
+            self._save_state(job)
+            if self.observe_write is not None:
+                self.observe_write(time.perf_counter() - started)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            self._count('failed')
+            print(f"Error writing evidence {job.path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self._discarded(job)
+        finally:
+            job.image = None
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job.status == 'pending':
+                    self._write(job)
+            finally:
+                self._queue.task_done()
+
+    def drain(self, timeout=5.0):
+        """Wait for queued evidence to be written, up to ``timeout`` seconds"""
+        if self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'format': self.image_format,
+                'quality': self.quality,
+                'overflow': self.overflow,
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                **self._counts,
+            }
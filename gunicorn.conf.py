@@ -0,0 +1,51 @@
+# Gunicorn settings for serving wsgi:app
+#
+# The app is imported once in the master (preload_app), which loads and warms
+# the YOLO weights before forking. Workers share those pages copy-on-write
+# instead of each holding a private copy of the model.
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+preload_app = os.environ.get('MODEL_PRELOAD', '1') == '1'
+
+# Workers write their metrics here so /metrics on any worker reports totals
+metrics_dir = os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join('instance', 'metrics'))
+
+# Torch intra-op threads per worker; the default of one per core oversubscribes
+torch_threads = int(os.environ.get('TORCH_THREADS_PER_WORKER', max(1, (os.cpu_count() or 1) // workers)))
+
+
+def on_starting(server):
+    # Counters restart from zero with the server
+    from metrics import clear_multiprocess_dir
+    clear_multiprocess_dir(metrics_dir)
+
+
+def when_ready(server):
+    # Keep the collector from touching (and so copying) the preloaded objects
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def post_worker_init(worker):
+    # Thread pools do not survive fork and inference pools are per worker, so
+    # each worker warms up its own before it accepts requests
+    from app import warm_up_emotion_model, warm_up_model
+    warm_up_model()
+    warm_up_emotion_model()
+
+
+def child_exit(server, worker):
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid, metrics_dir)
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class InferenceRequest:
+    """A single frame waiting for a batched inference result"""
+
+    def __init__(self, frame, session_id=None):
+        self.frame = frame
+        self.session_id = session_id
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+
+class InferenceScheduler:
+    """Collects frames from many interview sessions into batched model calls
+
+    Requests wait at most ``max_wait_ms`` for companions; a batch is
+    dispatched as soon as ``max_batch_size`` frames are queued.
+    ``concurrency`` dispatcher threads may have batches in flight at once,
+    which only helps when ``infer_batch`` runs outside this process.
+    A request whose caller timed out is withdrawn if it has not been
+    dispatched yet, so an overloaded queue does not keep running frames
+    nobody is waiting for.
+    """
+
+    def __init__(self, infer_batch, max_batch_size=8, max_wait_ms=20, concurrency=1,
+                 stats_window=1000):
+        self.infer_batch = infer_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.concurrency = max(1, int(concurrency))
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._worker_pid = None
+
+        # Statistics
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._batches = 0
+        self._frames = 0
+        self._errors = 0
+        self._cancelled = 0
+        self._queue_waits = deque(maxlen=stats_window)
+        self._batch_latencies = deque(maxlen=stats_window)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so gunicorn workers start their own
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._cond:
+            if self._worker_pid == pid:
+                return
+            self._queue.clear()
+            self._workers = []
+            for i in range(self.concurrency):
+                worker = threading.Thread(target=self._run, name=f'inference-scheduler-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._worker_pid = pid
+
+    def submit(self, frame, session_id=None, timeout=10.0):
+        """Queue a frame and block until its result is ready"""
+        self._ensure_started()
+        req = InferenceRequest(frame, session_id)
+        with self._cond:
+            self._queue.append(req)
+            self._cond.notify()
+
+        if not req.done.wait(timeout):
+            with self._cond:
+                if not req.done.is_set():
+                    req.cancelled = True
+                    try:
+                        self._queue.remove(req)
+                    except ValueError:
+                        # Already in a batch; its result will be ignored
+                        pass
+            if req.cancelled:
+                with self._stats_lock:
+                    self._cancelled += 1
+                raise TimeoutError('Inference request timed out')
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                while not self._queue:
+                    self._cond.wait()
+
+                # Hold the window open for companions from other sessions
+                deadline = self._queue[0].enqueued_at + self.max_wait
+                while self._queue and len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                # Another dispatcher may have taken the frames meanwhile
+                batch = []
+                while self._queue and len(batch) < self.max_batch_size:
+                    req = self._queue.popleft()
+                    if not req.cancelled:
+                        batch.append(req)
+                if batch:
+                    return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            try:
+                results = self.infer_batch([req.frame for req in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Expected {len(batch)} results, got {len(results)}")
+                for req, result in zip(batch, results):
+                    req.result = result
+            except Exception as e:
+                print(f"Error in inference batch: {e}")
+                for req in batch:
+                    req.error = e
+            finished = time.perf_counter()
+
+            self._record(batch, started, finished)
+            for req in batch:
+                req.done.set()
+
+    def _record(self, batch, started, finished):
+        with self._stats_lock:
+            size = len(batch)
+            self._batches += 1
+            self._frames += size
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._batch_latencies.append(finished - started)
+            for req in batch:
+                self._queue_waits.append(started - req.enqueued_at)
+            if batch[0].error is not None:
+                self._errors += 1
+
+    def stats(self):
+        """Batch-size and queue-wait statistics for tuning the batching window"""
+        with self._stats_lock:
+            waits = sorted(self._queue_waits)
+            latencies = sorted(self._batch_latencies)
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'concurrency': self.concurrency,
+                'queue_depth': self.queue_depth(),
+                'batches': self._batches,
+                'frames': self._frames,
+                'errors': self._errors,
+                'cancelled': self._cancelled,
+                'mean_batch_size': round(self._frames / self._batches, 3) if self._batches else 0.0,
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'queue_wait_ms': _summarize(waits),
+                'batch_latency_ms': _summarize(latencies),
+            }
+
+
+def _summarize(sorted_values):
+    if not sorted_values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+
+    def pick(q):
+        return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] * 1000.0
+
+    return {
+        'count': len(sorted_values),
+        'mean': round(sum(sorted_values) / len(sorted_values) * 1000.0, 3),
+        'p50': round(pick(0.50), 3),
+        'p95': round(pick(0.95), 3),
+        'max': round(sorted_values[-1] * 1000.0, 3),
+    }
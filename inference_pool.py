@@ -0,0 +1,364 @@
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared-memory block
+
+    The parent copies each decoded frame into a free slot and sends only
+    the slot index and shape to a worker, so pixel data is never pickled.
+    """
+
+    def __init__(self, slots, max_height, max_width, channels=3):
+        self.slots = int(slots)
+        self.slot_shape = (int(max_height), int(max_width), int(channels))
+        self.slot_bytes = int(np.prod(self.slot_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def acquire(self, timeout):
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('No free frame slot in shared memory ring')
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def write(self, slot, frame):
+        height, width = frame.shape[:2]
+        if height > self.slot_shape[0] or width > self.slot_shape[1]:
+            raise ValueError(f"Frame {width}x{height} exceeds ring slot "
+                             f"{self.slot_shape[1]}x{self.slot_shape[0]}")
+        if frame.ndim == 2:
+            frame = np.repeat(frame[:, :, None], 3, axis=2)
+        frame = frame[:, :, :self.slot_shape[2]]
+        view = slot_view(self.shm.buf, slot, self.slot_bytes, frame.shape)
+        np.copyto(view, frame, casting='unsafe')
+        return frame.shape
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def slot_view(buf, slot, slot_bytes, shape):
+    return np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=slot * slot_bytes)
+
+
+class PooledBoxes:
+    """Minimal stand-in for ultralytics Boxes built from an (N, 6) array"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+
+class PooledResult:
+    """Detections for one frame returned by an inference worker"""
+
+    def __init__(self, data, names):
+        self.boxes = PooledBoxes(data)
+        self.names = names
+
+
+def _worker_main(conn, ring_name, slot_bytes, weights, model_kwargs, cpus):
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+        torch.set_num_threads(len(cpus) if cpus else max(1, (os.cpu_count() or 1) // 2))
+    except ImportError:
+        pass
+
+    from ultralytics import YOLO
+    # Exported weights carry no task; say it, as the in-process path does
+    model = YOLO(weights, task='detect')
+    ring = shared_memory.SharedMemory(name=ring_name)
+    try:
+        # Warm up before reporting ready
+        model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False, **model_kwargs)
+        conn.send(('ready', os.getpid(), dict(model.names)))
+
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            task_id, frames = message
+            try:
+                views = [slot_view(ring.buf, slot, slot_bytes, shape) for slot, shape in frames]
+                results = model(views, verbose=False, **model_kwargs)
+                payload = [result.boxes.data.cpu().numpy().astype(np.float32) for result in results]
+                del views
+                conn.send((task_id, 'ok', payload))
+            except Exception as e:
+                conn.send((task_id, 'error', repr(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class InferenceWorker:
+    """Handle on one inference process and its result pipe"""
+
+    def __init__(self, index, cpus):
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.restarts = -1
+        self.batches = 0
+        # Held while a batch is in flight so the monitor leaves it alone
+        self.busy = threading.Lock()
+
+
+class InferenceProcessPool:
+    """Runs YOLO in separate processes fed through a shared-memory ring
+
+    ``infer_batch`` is a drop-in for InferenceScheduler: frames are copied
+    into ring slots, a free worker receives the slot indices over its pipe
+    and returns compact (N, 6) box arrays. Dead workers are detected while
+    waiting and by a monitor thread, restarted, and the batch is retried
+    once on a fresh worker.
+    """
+
+    def __init__(self, weights, workers=2, model_kwargs=None, cpus=None,
+                 max_frame=(720, 1280), slots_per_worker=16, task_timeout=30.0,
+                 start_timeout=120.0, monitor_interval=1.0):
+        self.weights = weights
+        self.workers = max(1, int(workers))
+        self.model_kwargs = dict(model_kwargs or {})
+        self.cpu_sets = cpus or [None] * self.workers
+        self.max_frame = max_frame
+        self.slots = self.workers * int(slots_per_worker)
+        self.task_timeout = float(task_timeout)
+        self.start_timeout = float(start_timeout)
+        self.monitor_interval = float(monitor_interval)
+
+        self.names = {}
+        self._ctx = mp.get_context('spawn')
+        self._ring = None
+        self._handles = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._task_ids = iter(range(1, 1 << 62))
+        self._crashes = 0
+        self._closing = False
+
+    def _ensure_started(self):
+        # Each gunicorn worker owns its pool; children are never inherited
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._ring = FrameRing(self.slots, *self.max_frame)
+            self._handles = [InferenceWorker(i, self.cpu_sets[i % len(self.cpu_sets)])
+                             for i in range(self.workers)]
+            self._idle = queue.Queue()
+            self._closing = False
+            for handle in self._handles:
+                self._spawn(handle)
+                self._idle.put(handle)
+            self._pid = pid
+            threading.Thread(target=self._monitor, name='inference-pool-monitor', daemon=True).start()
+            atexit.register(self.close)
+
+    def start(self):
+        """Spawn and warm the worker processes for this process"""
+        self._ensure_started()
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        self._closing = True
+        for handle in self._handles:
+            try:
+                handle.conn.send(None)
+            except Exception:
+                pass
+        for handle in self._handles:
+            if handle.process is not None:
+                handle.process.join(timeout=2)
+                if handle.process.is_alive():
+                    handle.process.kill()
+        self._ring.close()
+        self._pid = None
+
+    def _spawn(self, handle):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self._ring.name, self._ring.slot_bytes, self.weights,
+                  self.model_kwargs, handle.cpus),
+            name=f'inference-worker-{handle.index}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        try:
+            ready = parent_conn.poll(self.start_timeout) and parent_conn.recv()
+        except EOFError:
+            ready = None
+        if not ready:
+            process.kill()
+            raise RuntimeError(f"Inference worker {handle.index} did not become ready")
+        status, worker_pid, names = ready
+        handle.process = process
+        handle.conn = parent_conn
+        handle.pid = worker_pid
+        handle.restarts += 1
+        self.names = names
+
+    def _restart(self, handle):
+        self._crashes += 1
+        print(f"Inference worker {handle.index} (pid {handle.pid}) died; restarting")
+        try:
+            handle.conn.close()
+        except Exception:
+            pass
+        if handle.process is not None:
+            if handle.process.is_alive():
+                handle.process.kill()
+            handle.process.join(timeout=1)
+        self._spawn(handle)
+
+    def _monitor(self):
+        # Replace idle workers that died between batches
+        while not self._closing:
+            time.sleep(self.monitor_interval)
+            for handle in self._handles:
+                if self._closing:
+                    return
+                if not handle.busy.acquire(blocking=False):
+                    continue
+                try:
+                    if handle.process is not None and not handle.process.is_alive():
+                        self._restart(handle)
+                except Exception as e:
+                    print(f"Error restarting inference worker {handle.index}: {e}")
+                finally:
+                    handle.busy.release()
+
+    def _run_on(self, handle, task_id, frames):
+        handle.conn.send((task_id, frames))
+        deadline = time.monotonic() + self.task_timeout
+        while True:
+            if handle.conn.poll(0.05):
+                reply_id, status, payload = handle.conn.recv()
+                if reply_id != task_id:
+                    continue
+                if status != 'ok':
+                    raise RuntimeError(f"Inference worker error: {payload}")
+                handle.batches += 1
+                return payload
+            if not handle.process.is_alive():
+                raise ChildProcessError(f"Inference worker {handle.index} died")
+            if time.monotonic() > deadline:
+                handle.process.kill()
+                raise ChildProcessError(f"Inference worker {handle.index} timed out")
+
+    def infer_batch(self, frames):
+        self._ensure_started()
+        slots = []
+        try:
+            shapes = []
+            for frame in frames:
+                slot = self._ring.acquire(self.task_timeout)
+                slots.append(slot)
+                shapes.append(self._ring.write(slot, frame))
+            task = list(zip(slots, shapes))
+
+            for attempt in range(2):
+                handle = self._idle.get()
+                try:
+                    with handle.busy:
+                        try:
+                            payload = self._run_on(handle, next(self._task_ids), task)
+                            return [PooledResult(data, self.names) for data in payload]
+                        except (ChildProcessError, EOFError, BrokenPipeError, OSError):
+                            # Retry once on a fresh worker
+                            self._restart(handle)
+                            if attempt:
+                                raise
+                finally:
+                    self._idle.put(handle)
+        finally:
+            for slot in slots:
+                self._ring.release(slot)
+
+    def stats(self):
+        return {
+            'workers': [
+                {
+                    'index': handle.index,
+                    'pid': handle.pid,
+                    'alive': bool(handle.process and handle.process.is_alive()),
+                    'cpus': sorted(handle.cpus) if handle.cpus else None,
+                    'restarts': max(handle.restarts, 0),
+                    'batches': handle.batches
+                } for handle in self._handles
+            ],
+            'idle_workers': self._idle.qsize(),
+            'ring_slots': self.slots,
+            'free_slots': self._ring._free.qsize() if self._ring else 0,
+            'crashes': self._crashes
+        }
+
+
+def parse_cpu_sets(spec, workers):
+    """Parse INFERENCE_POOL_CPUS: '' (no pinning), 'auto', or '0-3;4-7'"""
+    if not spec:
+        return None
+    if spec == 'auto':
+        available = sorted(os.sched_getaffinity(0))
+        per_worker = max(1, len(available) // workers)
+        return [set(available[i * per_worker:(i + 1) * per_worker] or available) for i in range(workers)]
+
+    cpu_sets = []
+    for group in spec.split(';'):
+        cpus = set()
+        for part in group.split(','):
+            part = part.strip()
+            if '-' in part:
+                start, end = part.split('-')
+                cpus.update(range(int(start), int(end) + 1))
+            elif part:
+                cpus.add(int(part))
+        cpu_sets.append(cpus)
+    return cpu_sets
@@ -0,0 +1,378 @@
+import atexit
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    """Base for a named metric family with optional labels"""
+
+    kind = None
+    sample_suffix = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = None
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        if self.registry is not None:
+            self.registry._ensure_started()
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        # Counter families are named after their samples (``x_total``)
+        name = self.name + self.sample_suffix
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+    def reset(self):
+        with self._lock:
+            self._children.clear()
+
+    def snapshot(self):
+        """Children as ``[[label values], value]`` pairs for the process file"""
+        with self._lock:
+            return [[list(key), value] for key, value in self._children.items()]
+
+    def merge(self, snapshots):
+        """Children summed over the snapshots of several processes"""
+        merged = {}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+    sample_suffix = '_total'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def render(self, children=None):
+        if children is None:
+            with self._lock:
+                children = dict(self._children)
+        lines = self.header()
+        for key, value in sorted(children.items()):
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from ``function`` at scrape time
+
+    ``multiprocess_mode`` says how the values of several processes combine:
+    ``'sum'`` adds them, ``'max'`` takes the largest and ``'local'`` reports
+    only the scraping process (for values every process reads from the same
+    place, such as a database count). Processes that have exited are left out.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None, multiprocess_mode='sum'):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ('sum', 'max', 'local'):
+            raise ValueError(f"Unknown multiprocess_mode {multiprocess_mode!r}")
+        self.function = function
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._children[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def _read(self):
+        try:
+            return self.function()
+        except Exception as e:
+            print(f"Error reading gauge {self.name}: {e}")
+            return None
+
+    def snapshot(self):
+        if self.function is None:
+            return super().snapshot()
+        value = self._read()
+        return [] if value is None else [[[], value]]
+
+    def merge(self, snapshots):
+        if self.multiprocess_mode == 'sum':
+            return super().merge(snapshots)
+        merged = {}
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                key = tuple(key)
+                merged[key] = max(merged[key], value) if key in merged else value
+        return merged
+
+    def render(self, children=None):
+        if children is None:
+            if self.function is not None:
+                value = self._read()
+                children = {} if value is None else {(): value}
+            else:
+                with self._lock:
+                    children = dict(self._children)
+        lines = self.header()
+        for key, value in sorted(children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class HistogramChild:
+    """Bucket counts for one label combination"""
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """Latency distribution in fixed buckets (seconds)
+
+    ``observe`` is a bisect and three additions under a lock, cheap enough
+    for every frame.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = HistogramChild(self.buckets)
+            child.counts[index] += 1
+            child.sum += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), [list(child.counts), child.sum]] for key, child in self._children.items()]
+
+    def merge(self, snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for key, (counts, total) in snapshot:
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                child = merged.get(tuple(key))
+                if child is None:
+                    child = merged[tuple(key)] = HistogramChild(self.buckets)
+                child.counts = [a + b for a, b in zip(child.counts, counts)]
+                child.sum += total
+        return merged
+
+    def render(self, children=None):
+        if children is None:
+            with self._lock:
+                children = {key: child for key, child in self._children.items()}
+        children = sorted((key, list(child.counts), child.sum) for key, child in children.items())
+        lines = self.header()
+        for key, counts, total in children:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _process_file(directory, pid):
+    return os.path.join(directory, f'metrics_{pid}.json')
+
+
+def clear_multiprocess_dir(directory):
+    """Remove the process files of a previous run (call before workers start)"""
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Error removing metrics file {path}: {e}")
+
+
+def mark_process_dead(pid, directory):
+    """Keep an exited process's counters and histograms but drop its gauges"""
+    path = _process_file(directory, pid)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    data['live'] = False
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error marking metrics file {path} dead: {e}")
+
+
+class MetricsRegistry:
+    """Collects metrics and renders them in the Prometheus text format
+
+    Without ``multiprocess_dir`` values live in process memory and each
+    process exposes only its own series. With it, every process writes its
+    values to ``<multiprocess_dir>/metrics_<pid>.json`` every
+    ``flush_interval`` seconds (and when scraped), and ``render`` merges the
+    files of all processes, so any gunicorn worker serves totals for the
+    whole server. Files of exited workers are kept so counters stay
+    monotonic; ``mark_process_dead`` drops their gauges and
+    ``clear_multiprocess_dir`` starts a new run from zero.
+    """
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, prefix='', multiprocess_dir=None, flush_interval=1.0):
+        self.prefix = prefix
+        self.multiprocess_dir = multiprocess_dir or None
+        self.flush_interval = flush_interval
+        self._metrics = []
+        self._lock = threading.Lock()
+        self._pid = None
+        if self.multiprocess_dir:
+            atexit.register(self._write_process_file)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, and values counted in the parent are
+        # already in the parent's file, so a new worker starts from zero
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                for metric in self._metrics:
+                    metric.reset()
+            self._pid = pid
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            self._write_process_file()
+
+    def _write_process_file(self):
+        if self._pid != os.getpid():
+            return
+        data = {
+            'live': True,
+            'metrics': {metric.name: metric.snapshot() for metric in self._metrics
+                        if getattr(metric, 'multiprocess_mode', None) != 'local'},
+        }
+        path = _process_file(self.multiprocess_dir, self._pid)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics file {path}: {e}")
+
+    def _read_process_files(self):
+        processes = []
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    processes.append(json.load(f))
+            except (OSError, ValueError) as e:
+                # Written by os.replace, so only a vanished file ends up here
+                print(f"Error reading metrics file {path}: {e}")
+        return processes
+
+    def _register(self, metric):
+        if self.multiprocess_dir:
+            metric.registry = self
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None, multiprocess_mode='sum'):
+        return self._register(Gauge(self.prefix + name, documentation, labelnames, function, multiprocess_mode))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self.prefix + name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        if not self.multiprocess_dir:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
+
+        self._ensure_started()
+        self._write_process_file()
+        processes = self._read_process_files()
+        for metric in self._metrics:
+            if getattr(metric, 'multiprocess_mode', None) == 'local':
+                lines.extend(metric.render())
+                continue
+            snapshots = [process['metrics'].get(metric.name, []) for process in processes
+                         if metric.kind != 'gauge' or process.get('live', True)]
+            lines.extend(metric.render(metric.merge(snapshots)))
+        return '\n'.join(lines) + '\n'
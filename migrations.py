@@ -0,0 +1,153 @@
+# (version, description, [(table, sql), ...]); statements whose table does
+# not exist yet are skipped because create_all() will build it complete.
+# A table of None always runs, for statements that create tables.
+MIGRATIONS = [
+    (1, 'Composite indexes for session-keyed lookups', [
+        ('interview_question',
+         'CREATE INDEX IF NOT EXISTS ix_interview_question_session_number '
+         'ON interview_question (session_id, question_number)'),
+        ('interview_answer',
+         'CREATE INDEX IF NOT EXISTS ix_interview_answer_session_question '
+         'ON interview_answer (session_id, question_id)'),
+        ('cheating_violation',
+         'CREATE INDEX IF NOT EXISTS ix_cheating_violation_session_type '
+         'ON cheating_violation (session_id, violation_type)'),
+        ('cheating_violation',
+         'CREATE INDEX IF NOT EXISTS ix_cheating_violation_type '
+         'ON cheating_violation (violation_type)'),
+        ('violation_episode',
+         'CREATE INDEX IF NOT EXISTS ix_violation_episode_session_started '
+         'ON violation_episode (session_id, started_at)'),
+        ('interview_session',
+         'CREATE INDEX IF NOT EXISTS ix_interview_session_status '
+         'ON interview_session (status)'),
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_candidate_date '
+         'ON interview (candidate_id, date)'),
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_job_date '
+         'ON interview (job_id, date)'),
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_status '
+         'ON interview (status)'),
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_created_date '
+         'ON interview (created_date)'),
+        ('candidate',
+         'CREATE INDEX IF NOT EXISTS ix_candidate_added_date '
+         'ON candidate (added_date)'),
+    ]),
+    (2, 'Indexes for keyset-paginated interview listings', [
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_date '
+         'ON interview (date)'),
+        # Serves status filters ordered by creation date; replaces the status-only index
+        ('interview',
+         'CREATE INDEX IF NOT EXISTS ix_interview_status_created '
+         'ON interview (status, created_date)'),
+        ('interview',
+         'DROP INDEX IF EXISTS ix_interview_status'),
+    ]),
+    # Created here rather than left to create_all(), which gunicorn never runs,
+    # because every flush writes to them
+    (3, 'Statistics tables', [
+        (None,
+         'CREATE TABLE IF NOT EXISTS stats_summary ('
+         'id INTEGER NOT NULL, total_candidates INTEGER NOT NULL, total_jobs INTEGER NOT NULL, '
+         'total_interviews INTEGER NOT NULL, completed_interviews INTEGER NOT NULL, '
+         'scheduled_interviews INTEGER NOT NULL, total_violations INTEGER NOT NULL, '
+         'tab_change_violations INTEGER NOT NULL, rebuilt_at DATETIME, PRIMARY KEY (id))'),
+        (None,
+         'CREATE TABLE IF NOT EXISTS stats_daily ('
+         'day DATE NOT NULL, candidates INTEGER NOT NULL, interviews INTEGER NOT NULL, '
+         'completed_interviews INTEGER NOT NULL, violations INTEGER NOT NULL, '
+         'tab_change_violations INTEGER NOT NULL, PRIMARY KEY (day))'),
+        (None,
+         'CREATE TABLE IF NOT EXISTS stats_by_job ('
+         'job_id INTEGER NOT NULL, interviews INTEGER NOT NULL, completed_interviews INTEGER NOT NULL, '
+         'scheduled_interviews INTEGER NOT NULL, PRIMARY KEY (job_id), '
+         'FOREIGN KEY(job_id) REFERENCES job_requirement (id))'),
+    ]),
+    (4, 'Interview result snapshots', [
+        (None,
+         'CREATE TABLE IF NOT EXISTS interview_result ('
+         'id INTEGER NOT NULL, session_id VARCHAR(36) NOT NULL, interview_id INTEGER, '
+         'started_at DATETIME, ended_at DATETIME, questions_answered INTEGER NOT NULL, '
+         'technical_score INTEGER NOT NULL, behavioral_score INTEGER NOT NULL, '
+         'integrity_score INTEGER NOT NULL, overall_score FLOAT NOT NULL, '
+         'cheating_violations INTEGER NOT NULL, tab_changes INTEGER NOT NULL, '
+         'recommendation VARCHAR(100), payload TEXT NOT NULL, etag VARCHAR(64) NOT NULL, '
+         'created_at DATETIME, PRIMARY KEY (id), UNIQUE (session_id), '
+         'FOREIGN KEY(session_id) REFERENCES interview_session (session_id), '
+         'FOREIGN KEY(interview_id) REFERENCES interview (id))'),
+    ]),
+    # Databases created before violation episodes existed never got the table,
+    # and migration 1 skipped its index for the same reason
+    (5, 'Violation episodes table', [
+        (None,
+         'CREATE TABLE IF NOT EXISTS violation_episode ('
+         'id INTEGER NOT NULL, session_id VARCHAR(36) NOT NULL, violation_id INTEGER NOT NULL, '
+         'violation_type VARCHAR(50) NOT NULL, object_name VARCHAR(50), '
+         'started_at DATETIME NOT NULL, ended_at DATETIME NOT NULL, frame_count INTEGER, '
+         'peak_confidence FLOAT, peak_person_count INTEGER, evidence_count INTEGER, '
+         'image_path VARCHAR(255), is_open BOOLEAN, PRIMARY KEY (id), '
+         'FOREIGN KEY(session_id) REFERENCES interview_session (session_id), '
+         'FOREIGN KEY(violation_id) REFERENCES cheating_violation (id))'),
+        (None,
+         'CREATE INDEX IF NOT EXISTS ix_violation_episode_session_started '
+         'ON violation_episode (session_id, started_at)'),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def schema_version(engine):
+    with engine.connect() as connection:
+        return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def migrate(engine, verbose=True):
+    """Apply pending migrations and return the resulting schema version
+
+    The version lives in ``PRAGMA user_version``. Each entry in
+    MIGRATIONS is applied at most once, in order, inside a
+    ``BEGIN IMMEDIATE`` transaction, so gunicorn workers starting together
+    never run the same step twice. db.create_all() still creates missing
+    tables; migrations cover tables that already exist, and new indexes
+    must also be declared in the model's ``__table_args__``.
+    """
+    if engine.dialect.name != 'sqlite':
+        return None
+
+    raw = engine.raw_connection()
+    connection = raw.driver_connection
+    isolation_level = connection.isolation_level
+    try:
+        # Manage the transaction by hand so BEGIN IMMEDIATE takes the write lock
+        connection.isolation_level = None
+        cursor = connection.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+            pending = [m for m in MIGRATIONS if m[0] > version]
+            if pending:
+                tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                for target, description, statements in pending:
+                    for table, sql in statements:
+                        if table is None or table in tables:
+                            cursor.execute(sql)
+                    cursor.execute(f'PRAGMA user_version = {int(target)}')
+                    version = target
+                    if verbose:
+                        print(f"Applied schema migration {target}: {description}")
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        finally:
+            cursor.close()
+    finally:
+        connection.isolation_level = isolation_level
+        raw.close()
+    return version
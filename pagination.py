@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import tuple_
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor into values typed like ``columns``; raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    typed = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if value is None:
+                typed.append(None)
+            elif python_type is datetime:
+                typed.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                typed.append(date.fromisoformat(value))
+            else:
+                typed.append(python_type(value))
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+    return typed
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=50, descending=True):
+    """Return the page of ``query`` after ``cursor``, ordered by (sort_column, id_column)
+
+    Unlike OFFSET paging, each page is an index range seek from the last
+    row of the previous one, so deep pages cost the same as the first and
+    rows inserted meanwhile do not shift the page boundaries. The cursor
+    is an opaque token holding the last row's sort key. Rows whose sort
+    value is NULL are never returned, so ``sort_column`` must be filled in.
+    """
+    columns = (sort_column, id_column)
+    query = query.filter(sort_column.isnot(None))
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(tuple_(*columns) < after if descending else tuple_(*columns) > after)
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, sort_column.key), getattr(last, id_column.key)])
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,64 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+class LetterboxPreprocessor:
+    """Resizes frames onto a square inference canvas held in reusable buffers
+
+    The frame is scaled to fit ``size`` x ``size`` keeping its aspect ratio,
+    centred, padded with ``pad_value`` and converted from RGB to the BGR
+    order ultralytics expects for numpy input. Each thread owns its canvas
+    and resize scratch buffers, so steady-state preprocessing allocates
+    nothing; the returned canvas is only valid until the same thread calls
+    again.
+    """
+
+    def __init__(self, size=640, pad_value=114):
+        self.size = int(size)
+        self.pad_value = pad_value
+        self._local = threading.local()
+
+    def _buffers(self):
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {
+                'canvas': np.empty((self.size, self.size, 3), dtype=np.uint8),
+                'scratch': {}
+            }
+        return buffers
+
+    def __call__(self, frame, rgb=True):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB if rgb else cv2.COLOR_GRAY2BGR)
+        elif frame.shape[2] == 4:
+            frame = frame[:, :, :3]
+
+        height, width = frame.shape[:2]
+        scale = min(self.size / height, self.size / width)
+        new_width = min(self.size, max(1, round(width * scale)))
+        new_height = min(self.size, max(1, round(height * scale)))
+
+        buffers = self._buffers()
+        canvas = buffers['canvas']
+
+        if (new_width, new_height) != (width, height):
+            scratch = buffers['scratch'].get((new_height, new_width))
+            if scratch is None:
+                scratch = buffers['scratch'][(new_height, new_width)] = np.empty(
+                    (new_height, new_width, 3), dtype=np.uint8)
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            frame = cv2.resize(np.ascontiguousarray(frame), (new_width, new_height),
+                               dst=scratch, interpolation=interpolation)
+
+        pad_x = (self.size - new_width) // 2
+        pad_y = (self.size - new_height) // 2
+        canvas[:pad_y] = self.pad_value
+        canvas[pad_y + new_height:] = self.pad_value
+        canvas[pad_y:pad_y + new_height, :pad_x] = self.pad_value
+        canvas[pad_y:pad_y + new_height, pad_x + new_width:] = self.pad_value
+
+        region = canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        np.copyto(region, frame[:, :, ::-1] if rgb else frame)
+        return canvas
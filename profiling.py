@@ -0,0 +1,227 @@
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def parse_route_rates(spec):
+    """Parse PROFILING_ROUTE_RATES: 'detect_cheating_frame=0.01,dashboard=0.5'"""
+    rates = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            endpoint, rate = part.split('=', 1)
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+class RequestProfiler:
+    """Samples Flask requests and records a cProfile and the SQL they ran
+
+    When enabled, each request is profiled with probability
+    ``sample_rate`` (or its endpoint's entry in ``route_rates``). A
+    capture is a ``.prof`` file loadable with pstats or snakeviz plus a
+    ``.json`` summary holding the duration, the SQL statements with
+    their timings and the top functions by cumulative time. Only the
+    newest ``max_captures`` are kept. The on/off switch and rates live
+    in ``settings.json`` next to the captures so a toggle reaches every
+    gunicorn worker.
+
+    Only one request per process is profiled at a time; requests sampled
+    while another profile is running are served unprofiled. Profiling
+    never fails a request.
+    """
+
+    def __init__(self, app=None, directory='profiles', enabled=False, sample_rate=0.05,
+                 route_rates=None, max_captures=200, top_functions=25):
+        self.directory = directory
+        self.enabled = bool(enabled)
+        self.sample_rate = float(sample_rate)
+        self.route_rates = dict(route_rates or {})
+        self.max_captures = int(max_captures)
+        self.top_functions = int(top_functions)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Held while a request is being profiled (one cProfile per process)
+        self._active = threading.Lock()
+        self._settings_path = os.path.join(directory, 'settings.json')
+        self._settings_mtime = None
+        self._settings_checked = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _refresh_settings(self):
+        # Re-read the shared toggle at most once a second
+        now = time.monotonic()
+        if now - self._settings_checked < 1.0:
+            return
+        self._settings_checked = now
+        try:
+            mtime = os.path.getmtime(self._settings_path)
+        except OSError:
+            return
+        if mtime == self._settings_mtime:
+            return
+        try:
+            with open(self._settings_path) as f:
+                settings = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading profiling settings: {e}")
+            return
+        self._settings_mtime = mtime
+        self.enabled = bool(settings.get('enabled', self.enabled))
+        self.sample_rate = float(settings.get('sample_rate', self.sample_rate))
+        self.route_rates = dict(settings.get('route_rates', self.route_rates))
+
+    def configure(self, enabled=None, sample_rate=None, route_rates=None):
+        """Change the toggle or rates for every worker sharing ``directory``"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if sample_rate is not None:
+            self.sample_rate = float(sample_rate)
+        if route_rates is not None:
+            self.route_rates = dict(route_rates)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._settings_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.settings(), f)
+        os.replace(tmp_path, self._settings_path)
+        self._settings_mtime = os.path.getmtime(self._settings_path)
+
+    def settings(self):
+        return {'enabled': self.enabled, 'sample_rate': self.sample_rate, 'route_rates': self.route_rates}
+
+    def _before_request(self):
+        self._refresh_settings()
+        if not self.enabled or request.endpoint in (None, 'static'):
+            return
+        if random.random() >= self.route_rates.get(request.endpoint, self.sample_rate):
+            return
+
+        # A second profiler cannot run alongside the first (sys.monitoring
+        # allows one profiling tool), so concurrent samples are skipped
+        if not self._active.acquire(blocking=False):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except Exception as e:
+            self._active.release()
+            print(f"Error starting request profile: {e}")
+            return
+
+        self._local.queries = []
+        g.profile_started = time.perf_counter()
+        g.profile_started_at = datetime.utcnow()
+        g.profiler = profiler
+
+    def _teardown_request(self, exc):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        try:
+            profiler.disable()
+        finally:
+            self._active.release()
+        duration = time.perf_counter() - g.pop('profile_started')
+        queries = self._local.__dict__.pop('queries', [])
+        try:
+            self._save(profiler, duration, queries, g.pop('profile_started_at'), exc)
+        except Exception as e:
+            print(f"Error saving request profile: {e}")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'queries', None) is not None:
+            self._local.query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        queries = getattr(self._local, 'queries', None)
+        if queries is not None:
+            elapsed = time.perf_counter() - self._local.__dict__.pop('query_started', time.perf_counter())
+            queries.append({'statement': statement, 'ms': round(elapsed * 1000.0, 3),
+                            'executemany': executemany})
+
+    def _save(self, profiler, duration, queries, started_at, exc):
+        capture_id = f"{started_at.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, f"{capture_id}.prof"))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.top_functions)
+        summary = {
+            'capture_id': capture_id,
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'started_at': started_at.isoformat(),
+            'duration_ms': round(duration * 1000.0, 3),
+            'error': repr(exc) if exc else None,
+            'pid': os.getpid(),
+            'sql_count': len(queries),
+            'sql_ms': round(sum(query['ms'] for query in queries), 3),
+            'sql': queries,
+            'profile': stream.getvalue()
+        }
+        tmp_path = os.path.join(self.directory, f"{capture_id}.json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, os.path.join(self.directory, f"{capture_id}.json"))
+        self._rotate()
+
+    def _rotate(self):
+        with self._lock:
+            captures = sorted(glob.glob(os.path.join(self.directory, '*.json')))
+            captures = [path for path in captures if path != self._settings_path]
+            for path in captures[:-self.max_captures] if self.max_captures else captures:
+                for stale in (path, path[:-len('.json')] + '.prof'):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+
+    def capture(self, capture_id):
+        """Return one capture's summary, or None"""
+        if os.path.basename(capture_id) != capture_id:
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{capture_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def slowest(self, limit=20, endpoint=None):
+        """Captured requests ordered by duration, without their SQL and profile text"""
+        summaries = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            if path == self._settings_path:
+                continue
+            try:
+                with open(path) as f:
+                    summary = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if endpoint and summary.get('endpoint') != endpoint:
+                continue
+            summary.pop('sql', None)
+            summary.pop('profile', None)
+            summaries.append(summary)
+        summaries.sort(key=lambda summary: summary['duration_ms'], reverse=True)
+        return summaries[:limit]
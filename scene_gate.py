@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+class SceneEntry:
+    """Last fully analyzed frame of a session and its detections"""
+
+    def __init__(self, thumbnail, detections, analyzed_at):
+        self.thumbnail = thumbnail
+        self.detections = detections
+        self.analyzed_at = analyzed_at
+
+
+class SceneGate:
+    """Reuses a session's last detections while its scene is static
+
+    Frames are reduced to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through YOLO. If the mean
+    absolute difference is below ``threshold`` (0-255 scale) and that
+    analysis is younger than ``max_staleness`` seconds, its result is
+    reused; otherwise the frame is re-detected.
+    """
+
+    def __init__(self, threshold=4.0, max_staleness=2.0, size=(32, 24), session_ttl=300.0):
+        self.threshold = float(threshold)
+        self.max_staleness = float(max_staleness)
+        self.size = size
+        self.session_ttl = session_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._counts = {'hits': 0, 'changed': 0, 'stale': 0, 'first': 0}
+
+    def thumbnail(self, image):
+        small = image.convert('L').resize(self.size, Image.BILINEAR)
+        return np.asarray(small, dtype=np.int16)
+
+    def lookup(self, session_id, thumbnail, now=None):
+        """Return cached detections for an unchanged scene, or None"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._counts['first'] += 1
+                return None
+            if now - entry.analyzed_at > self.max_staleness:
+                self._counts['stale'] += 1
+                return None
+            if float(np.abs(thumbnail - entry.thumbnail).mean()) >= self.threshold:
+                self._counts['changed'] += 1
+                return None
+            self._counts['hits'] += 1
+            return entry.detections
+
+    def store(self, session_id, thumbnail, detections, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[session_id] = SceneEntry(thumbnail, detections, now)
+            if now - self._last_prune > self.session_ttl:
+                stale = [sid for sid, entry in self._entries.items()
+                         if now - entry.analyzed_at > self.session_ttl]
+                for sid in stale:
+                    del self._entries[sid]
+                self._last_prune = now
+
+    def forget(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self._counts.values())
+            return {
+                'threshold': self.threshold,
+                'max_staleness_seconds': self.max_staleness,
+                'tracked_sessions': len(self._entries),
+                'hit_rate': round(self._counts['hits'] / lookups, 4) if lookups else 0.0,
+                **self._counts,
+            }
@@ -1,11 +1,155 @@
 import cv2
 import numpy as np
-from deepface import DeepFace
+import queue
 import threading
 import time
+from collections import deque
+from emotion import EMOTION_LABELS, EmotionAnalyzer
+
+class FaceTrack:
+    """One face followed between keyframes, with smoothed emotion scores"""
+    
+    def __init__(self, face_id, box, gray):
+        self.face_id = face_id
+        self.scores = None
+        self.reset(box, gray)
+    
+    def reset(self, box, gray):
+        x, y, w, h = box
+        self.box = (int(x), int(y), int(w), int(h))
+        self.template = gray[y:y+h, x:x+w].copy()
+    
+    def smooth(self, scores, alpha):
+        """Exponential moving average of the per-emotion percentages"""
+        if self.scores is None:
+            self.scores = dict(scores)
+        else:
+            self.scores = {label: alpha * scores[label] + (1 - alpha) * self.scores[label]
+                           for label in EMOTION_LABELS}
+        return self.scores
+
+class FaceTracker:
+    """Detects faces with a Haar cascade at keyframes and tracks them in between
+    
+    Between keyframes every face is located again by template matching in a
+    window around its last box. A face scoring below min_score forces a
+    keyframe. At keyframes detections are matched to existing tracks by
+    overlap, so a face keeps its id and its smoothed scores.
+    """
+    
+    def __init__(self, face_cascade, keyframe_interval=10, min_score=0.55, search_margin=0.3,
+                 min_face=48, match_iou=0.3):
+        self.face_cascade = face_cascade
+        self.keyframe_interval = keyframe_interval
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.min_face = min_face
+        self.match_iou = match_iou
+        self.tracks = []
+        self.frames_since_keyframe = 0
+        self.next_id = 1
+        self.keyframes = 0
+        self.tracked_frames = 0
+    
+    def update(self, gray):
+        """Return the face tracks for this grayscale frame"""
+        needs_keyframe = not self.tracks or self.frames_since_keyframe >= self.keyframe_interval
+        if not needs_keyframe and not self.follow(gray):
+            needs_keyframe = True
+        
+        if needs_keyframe:
+            self.detect(gray)
+        else:
+            self.frames_since_keyframe += 1
+            self.tracked_frames += 1
+        return self.tracks
+    
+    def detect(self, gray):
+        faces = self.face_cascade.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(self.min_face, self.min_face))
+        
+        tracks = []
+        unmatched = list(self.tracks)
+        for box in faces:
+            best = max(unmatched, key=lambda track: _iou(track.box, box), default=None)
+            if best is not None and _iou(best.box, box) >= self.match_iou:
+                unmatched.remove(best)
+                best.reset(box, gray)
+                tracks.append(best)
+            else:
+                tracks.append(FaceTrack(self.next_id, box, gray))
+                self.next_id += 1
+        
+        self.tracks = tracks
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+    
+    def follow(self, gray):
+        """Move every track to its best match; False if any face was lost"""
+        height, width = gray.shape
+        for track in self.tracks:
+            x, y, w, h = track.box
+            mx, my = int(w * self.search_margin) + 2, int(h * self.search_margin) + 2
+            sx1, sy1 = max(0, x - mx), max(0, y - my)
+            sx2, sy2 = min(width, x + w + mx), min(height, y + h + my)
+            window = gray[sy1:sy2, sx1:sx2]
+            if window.shape[0] < h or window.shape[1] < w:
+                return False
+            
+            scores = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if not np.isfinite(score) or score < self.min_score:
+                return False
+            track.box = (sx1 + dx, sy1 + dy, w, h)
+        return True
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+def put_latest(q, item):
+    """Put without blocking, discarding the oldest queued item if full; returns the number dropped"""
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+class FPSMeter:
+    """Frames per second over a sliding window"""
+    
+    def __init__(self, window=2.0):
+        self.window = window
+        self.ticks = deque()
+        self.lock = threading.Lock()
+    
+    def tick(self):
+        now = time.perf_counter()
+        with self.lock:
+            self.ticks.append(now)
+            while self.ticks and now - self.ticks[0] > self.window:
+                self.ticks.popleft()
+    
+    def rate(self):
+        with self.lock:
+            if len(self.ticks) < 2:
+                return 0.0
+            span = self.ticks[-1] - self.ticks[0]
+            return (len(self.ticks) - 1) / span if span else 0.0
 
 class FacialExpressionAnalyzer:
-    def __init__(self):
+    def __init__(self, keyframe_interval=10, smoothing=0.4):
         print("Initializing Facial Expression Analyzer with DeepFace...")
         
         # Emotion colors for visualization
@@ -19,27 +163,65 @@ class FacialExpressionAnalyzer:
             'neutral': (128, 128, 128) # Gray
         }
         
-        # Load face cascade for backup detection
+        # Faces are found with the cascade at keyframes and tracked in between
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.keyframe_interval = keyframe_interval
+        self.smoothing = smoothing
+        self.trackers = {}
+        
+        # Resident DeepFace Emotion model; only the classifier runs per frame
+        self.emotion_model = EmotionAnalyzer()
         
         print("Analyzer ready!")
     
-    def analyze_frame_emotions(self, frame):
-        """Analyze emotions in a frame using DeepFace"""
+    def tracker_for(self, stream_id):
+        tracker = self.trackers.get(stream_id)
+        if tracker is None:
+            tracker = self.trackers[stream_id] = FaceTracker(self.face_cascade, self.keyframe_interval)
+        return tracker
+    
+    def analyze_frame_emotions(self, frame, stream_id='default', raise_errors=False):
+        """Analyze emotions of the faces tracked in a BGR frame
+        
+        Returns DeepFace-style results (region, emotion, dominant_emotion)
+        with scores smoothed per face; stream_id keeps separate tracks for
+        separate cameras or interview sessions. Errors are logged and give
+        an empty result unless raise_errors is set.
+        """
         try:
-            # DeepFace.analyze returns emotion analysis
-            result = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            tracks = self.tracker_for(stream_id).update(gray)
+            if not tracks:
+                return []
             
-            # Handle both single face and multiple faces
-            if isinstance(result, list):
-                return result
-            else:
-                return [result]
+            # Classify every tracked crop in one batch
+            faces = np.stack([
+                cv2.resize(gray[y:y+h, x:x+w], (48, 48), interpolation=cv2.INTER_AREA)
+                for x, y, w, h in (track.box for track in tracks)
+            ])[..., None].astype(np.float32) / 255.0
+            predictions = self.emotion_model.predict_batch([faces])[0]
+            
+            results = []
+            for track, prediction in zip(tracks, predictions):
+                scores = track.smooth(prediction['emotion'], self.smoothing)
+                x, y, w, h = track.box
+                results.append({
+                    'face_id': track.face_id,
+                    'region': {'x': x, 'y': y, 'w': w, 'h': h},
+                    'emotion': scores,
+                    'dominant_emotion': max(scores, key=scores.get)
+                })
+            return results
                 
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Analysis error: {e}")
             return []
     
+    def forget(self, stream_id):
+        self.trackers.pop(stream_id, None)
+    
     def draw_results(self, frame, analysis_results):
         """Draw emotion results on the frame"""
         for result in analysis_results:
@@ -113,60 +295,173 @@ class FacialExpressionAnalyzer:
                        (x + width + 10, bar_y + 10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
     
-    def analyze_webcam(self):
-        """Real-time webcam emotion analysis"""
-        cap = cv2.VideoCapture(0)
+    def analyze_webcam(self, source=0, headless=False, output_path=None, realtime=True, max_frames=None):
+        """Real-time emotion analysis with separate capture, analysis and render threads
+        
+        Capture feeds two bounded queues that drop stale frames: the render
+        queue for the preview and a single-slot analysis queue, so analysis
+        always starts on the freshest frame and never stalls the preview.
+        The render stage draws the latest results and reports preview and
+        analysis FPS separately. source is a camera index or a video file;
+        headless skips the window (optionally writing output_path) so the
+        pipeline can run without a camera or display. A file read with
+        realtime=False is processed offline: every captured frame is
+        rendered (and written) with the latest annotation, so the output
+        keeps the source's length and frame rate. Returns run stats.
+        """
+        cap = cv2.VideoCapture(source)
         
         if not cap.isOpened():
-            print("Error: Could not open webcam")
-            return
+            print(f"Error: Could not open video source {source}")
+            return None
         
-        print("Starting webcam analysis...")
+        is_camera = isinstance(source, int)
+        offline = not realtime and not is_camera
+        source_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        print("Starting webcam analysis..." if is_camera else f"Analyzing video: {source}")
         print("Note: First analysis may take a few seconds while model loads")
         
-        frame_count = 0
-        analysis_interval = 3  # Analyze every 10 frames for better performance
-        current_results = []
+        stop = threading.Event()
+        render_queue = queue.Queue(maxsize=2)
+        analysis_queue = queue.Queue(maxsize=1)
+        latest = {'results': []}
+        latest_lock = threading.Lock()
+        counts = {'captured': 0, 'analyzed': 0, 'rendered': 0, 'dropped_render': 0, 'dropped_analysis': 0}
+        preview_fps = FPSMeter()
+        analysis_fps = FPSMeter()
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Flip for mirror effect
-            frame = cv2.flip(frame, 1)
-            
-            # Analyze emotions every few frames (for performance)
-            if frame_count % analysis_interval == 0:
+        def put_render(item):
+            if not offline:
+                counts['dropped_render'] += put_latest(render_queue, item)
+                return
+            # Offline the renderer sets the pace; wait for it instead of dropping
+            while not stop.is_set():
                 try:
-                    current_results = self.analyze_frame_emotions(frame)
+                    render_queue.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    pass
+        
+        def capture():
+            frame_interval = 1.0 / source_fps
+            next_frame_at = time.perf_counter()
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if is_camera:
+                    # Flip for mirror effect
+                    frame = cv2.flip(frame, 1)
+                counts['captured'] += 1
+                put_render(frame)
+                # The render thread draws on its frame in place, so the
+                # analysis thread gets its own copy
+                counts['dropped_analysis'] += put_latest(analysis_queue, frame.copy())
+                
+                if max_frames and counts['captured'] >= max_frames:
+                    break
+                if realtime and not is_camera:
+                    # Play files at their own frame rate
+                    next_frame_at += frame_interval
+                    time.sleep(max(0.0, next_frame_at - time.perf_counter()))
+            put_render(None)
+            put_latest(analysis_queue, None)
+        
+        def analyze():
+            while not stop.is_set():
+                frame = analysis_queue.get()
+                if frame is None:
+                    break
+                try:
+                    results = self.analyze_frame_emotions(frame, stream_id=source)
                 except Exception as e:
                     print(f"Analysis error: {e}")
-                    current_results = []
-            
-            # Draw results from last analysis
-            if current_results:
-                frame = self.draw_results(frame, current_results)
-            
-            # Add instructions
-            cv2.putText(frame, "Press 'q' to quit, 's' to save", (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # Display frame
-            cv2.imshow('Facial Expression Analysis - DeepFace', frame)
-            
-            # Handle key presses
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-            elif key == ord('s'):
-                cv2.imwrite('facial_emotion_result.jpg', frame)
-                print("Screenshot saved!")
-            
-            frame_count += 1
+                    results = []
+                with latest_lock:
+                    latest['results'] = results
+                counts['analyzed'] += 1
+                analysis_fps.tick()
         
-        cap.release()
-        cv2.destroyAllWindows()
+        threads = [
+            threading.Thread(target=capture, name='emotion-capture', daemon=True),
+            threading.Thread(target=analyze, name='emotion-analysis', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        writer = None
+        started = time.perf_counter()
+        try:
+            # Render on the calling thread; OpenCV windows must stay on one thread
+            while True:
+                try:
+                    frame = render_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if not threads[0].is_alive():
+                        break
+                    continue
+                if frame is None:
+                    break
+                
+                with latest_lock:
+                    current_results = latest['results']
+                if current_results:
+                    frame = self.draw_results(frame, current_results)
+                
+                preview_fps.tick()
+                counts['rendered'] += 1
+                cv2.putText(frame, f"Preview FPS: {preview_fps.rate():.1f} | Analysis FPS: {analysis_fps.rate():.1f}",
+                           (10, frame.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                
+                if output_path:
+                    if writer is None:
+                        height, width = frame.shape[:2]
+                        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'),
+                                                 source_fps, (width, height))
+                    writer.write(frame)
+                
+                if headless:
+                    continue
+                
+                # Add instructions
+                cv2.putText(frame, "Press 'q' to quit, 's' to save", (10, 30), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                
+                # Display frame
+                cv2.imshow('Facial Expression Analysis - DeepFace', frame)
+                
+                # Handle key presses
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('s'):
+                    cv2.imwrite('facial_emotion_result.jpg', frame)
+                    print("Screenshot saved!")
+        finally:
+            stop.set()
+            # Unblock the analysis thread if it is waiting for a frame
+            put_latest(analysis_queue, None)
+            for thread in threads:
+                thread.join(timeout=5)
+            cap.release()
+            if writer is not None:
+                writer.release()
+            if not headless:
+                cv2.destroyAllWindows()
+            self.forget(source)
+        
+        elapsed = time.perf_counter() - started
+        stats = dict(counts)
+        stats['seconds'] = round(elapsed, 3)
+        stats['preview_fps'] = round(counts['rendered'] / elapsed, 2) if elapsed else 0.0
+        stats['analysis_fps'] = round(counts['analyzed'] / elapsed, 2) if elapsed else 0.0
+        print(f"Preview FPS: {stats['preview_fps']}, Analysis FPS: {stats['analysis_fps']}, "
+              f"frames captured/rendered/analyzed: {counts['captured']}/{counts['rendered']}/{counts['analyzed']}")
+        return stats
+    
+    def analyze_video(self, video_path, output_path=None, realtime=False):
+        """Run the webcam pipeline headless against a video file"""
+        return self.analyze_webcam(source=video_path, headless=True, output_path=output_path, realtime=realtime)
     
     def analyze_image(self, image_path):
         """Analyze emotions from static image"""
@@ -179,8 +474,10 @@ class FacialExpressionAnalyzer:
             
             print(f"Analyzing emotions in: {image_path}")
             
-            # Analyze emotions
-            results = self.analyze_frame_emotions(frame)
+            # Analyze emotions (a still image is always a keyframe)
+            self.forget(image_path)
+            results = self.analyze_frame_emotions(frame, stream_id=image_path)
+            self.forget(image_path)
             
             if not results:
                 print("No faces detected in the image")
@@ -228,9 +525,10 @@ class FacialExpressionAnalyzer:
             print("Select Analysis Mode:")
             print("1. Real-time Webcam Analysis")
             print("2. Analyze Image File")
-            print("3. Exit")
+            print("3. Analyze Video File (headless)")
+            print("4. Exit")
             
-            choice = input("\nEnter choice (1-3): ").strip()
+            choice = input("\nEnter choice (1-4): ").strip()
             
             if choice == '1':
                 self.analyze_webcam()
@@ -241,10 +539,17 @@ class FacialExpressionAnalyzer:
                 else:
                     print("Please provide a valid image path")
             elif choice == '3':
+                video_path = input("Enter video path: ").strip()
+                if video_path:
+                    output_path = input("Annotated output path (blank for none): ").strip()
+                    self.analyze_video(video_path, output_path or None)
+                else:
+                    print("Please provide a valid video path")
+            elif choice == '4':
                 print("Goodbye!")
                 break
             else:
-                print("Invalid choice. Please enter 1, 2, or 3.")
+                print("Invalid choice. Please enter 1, 2, 3, or 4.")
 
 # Example usage and testing
 def test_with_sample():
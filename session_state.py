@@ -0,0 +1,239 @@
+import atexit
+import os
+import threading
+import time
+
+from sqlalchemy import update
+
+
+class SessionCounters:
+    """In-memory counters for one interview session
+
+    ``base`` is the value last read from the database, including other
+    workers' flushes, and ``pending`` the increments not yet flushed.
+    """
+
+    def __init__(self, base):
+        self.base = dict(base)
+        self.pending = {field: 0 for field in base}
+        self.dirty_since = None
+        self.last_touched = time.monotonic()
+
+    def value(self, field):
+        return self.base[field] + self.pending[field]
+
+    def is_dirty(self):
+        return any(self.pending.values())
+
+
+class SessionStateCache:
+    """Write-behind cache for hot InterviewSession counters
+
+    Increments are applied in memory and flushed as deltas
+    (``SET col = col + n``) in a single transaction every
+    ``flush_interval`` seconds, when a session ends, and at process exit.
+    Pending deltas are only cleared after the flush commits, so a failed
+    flush is retried and concurrent workers never overwrite each other.
+    Each flush reads the committed totals back (``UPDATE ... RETURNING`` for
+    dirty sessions, a ``SELECT`` for clean ones), so values returned here
+    include increments made by other workers up to the last flush.
+    A hard crash loses at most one flush interval of counts.
+    """
+
+    def __init__(self, app, db, model, fields=('frame_counter', 'tab_changes'),
+                 flush_interval=2.0, idle_ttl=600.0):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.fields = tuple(fields)
+        self.flush_interval = float(flush_interval)
+        self.idle_ttl = float(idle_ttl)
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        self._flushes = 0
+        self._flush_errors = 0
+        self._last_flush_at = None
+        self._last_flush_ms = 0.0
+        self._last_flushed_rows = 0
+
+        atexit.register(self._flush_at_exit)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so gunicorn workers start their own
+        pid = os.getpid()
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == pid:
+                return
+            if self._worker_pid != pid:
+                self._sessions.clear()
+            self._worker_pid = pid
+            self._worker = threading.Thread(target=self._run, name='session-state-flush', daemon=True)
+            self._worker.start()
+
+    def _load(self, session_id):
+        columns = [getattr(self.model, field) for field in self.fields]
+        row = self.db.session.query(*columns).filter(self.model.session_id == session_id).first()
+        if row is None:
+            return None
+        return SessionCounters({field: value or 0 for field, value in zip(self.fields, row)})
+
+    def _state(self, session_id):
+        with self._lock:
+            state = self._sessions.get(session_id)
+        if state is not None:
+            return state
+
+        loaded = self._load(session_id)
+        if loaded is None:
+            return None
+        with self._lock:
+            return self._sessions.setdefault(session_id, loaded)
+
+    def increment(self, session_id, field, amount=1):
+        """Add to a counter and return its new value, or None if the session does not exist"""
+        self._ensure_started()
+        state = self._state(session_id)
+        if state is None:
+            return None
+        with self._lock:
+            state.pending[field] += amount
+            state.last_touched = time.monotonic()
+            if state.dirty_since is None:
+                state.dirty_since = state.last_touched
+            return state.value(field)
+
+    def get(self, session_id, field):
+        state = self._state(session_id)
+        if state is None:
+            return None
+        with self._lock:
+            return state.value(field)
+
+    def flush(self, session_ids=None):
+        """Write pending deltas to the database in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                candidates = self._sessions if session_ids is None else {
+                    sid: self._sessions[sid] for sid in session_ids if sid in self._sessions
+                }
+                snapshot = {
+                    sid: dict(state.pending) for sid, state in candidates.items() if state.is_dirty()
+                }
+                clean = [sid for sid in candidates if sid not in snapshot]
+            if not snapshot and not clean:
+                return True
+
+            started = time.perf_counter()
+            columns = [getattr(self.model, field) for field in self.fields]
+            totals = {}
+            try:
+                for sid, deltas in snapshot.items():
+                    values = {
+                        field: getattr(self.model, field) + delta
+                        for field, delta in deltas.items() if delta
+                    }
+                    row = self.db.session.execute(
+                        update(self.model).where(self.model.session_id == sid).values(values).returning(*columns)
+                    ).first()
+                    if row is not None:
+                        totals[sid] = row
+                if clean:
+                    rows = self.db.session.query(self.model.session_id, *columns).filter(
+                        self.model.session_id.in_(clean)
+                    ).all()
+                    totals.update((row[0], row[1:]) for row in rows)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                self._flush_errors += 1
+                print(f"Error flushing session state: {e}")
+                return False
+
+            now = time.monotonic()
+            with self._lock:
+                for sid, deltas in snapshot.items():
+                    state = self._sessions.get(sid)
+                    if state is None:
+                        continue
+                    for field, delta in deltas.items():
+                        state.pending[field] -= delta
+                    state.dirty_since = now if state.is_dirty() else None
+                for sid, row in totals.items():
+                    state = self._sessions.get(sid)
+                    if state is not None:
+                        state.base = {field: value or 0 for field, value in zip(self.fields, row)}
+
+            if not snapshot:
+                return True
+            self._flushes += 1
+            self._last_flush_at = time.time()
+            self._last_flush_ms = (time.perf_counter() - started) * 1000.0
+            self._last_flushed_rows = len(snapshot)
+            return True
+
+    def end_session(self, session_id):
+        """Flush a finished session and stop tracking it"""
+        flushed = self.flush([session_id])
+        if flushed:
+            with self._lock:
+                state = self._sessions.get(session_id)
+                if state is not None and not state.is_dirty():
+                    del self._sessions[session_id]
+        return flushed
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            idle = [sid for sid, state in self._sessions.items()
+                    if not state.is_dirty() and state.last_touched < cutoff]
+            for sid in idle:
+                del self._sessions[sid]
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                with self.app.app_context():
+                    self.flush()
+                self._prune()
+            except Exception as e:
+                print(f"Error in session state flusher: {e}")
+
+    def _flush_at_exit(self):
+        if self._worker_pid != os.getpid():
+            return
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception as e:
+            print(f"Error flushing session state at exit: {e}")
+
+    def flush_lag(self):
+        """Seconds since the oldest unflushed increment was made"""
+        with self._lock:
+            oldest = min((state.dirty_since for state in self._sessions.values()
+                          if state.dirty_since is not None), default=None)
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def stats(self):
+        with self._lock:
+            tracked = len(self._sessions)
+            dirty = sum(1 for state in self._sessions.values() if state.is_dirty())
+        return {
+            'tracked_sessions': tracked,
+            'dirty_sessions': dirty,
+            'flush_lag_seconds': round(self.flush_lag(), 3),
+            'flush_interval_seconds': self.flush_interval,
+            'flushes': self._flushes,
+            'flush_errors': self._flush_errors,
+            'last_flush_at': self._last_flush_at,
+            'last_flush_ms': round(self._last_flush_ms, 3),
+            'last_flushed_sessions': self._last_flushed_rows,
+        }
@@ -0,0 +1,187 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import event
+
+
+def configure_sqlite(engine, busy_timeout_ms=5000, synchronous='NORMAL'):
+    """Put every new SQLite connection in WAL mode with a busy timeout
+
+    WAL lets readers proceed while a write is in progress, and the busy
+    timeout makes a blocked writer wait instead of failing immediately
+    with 'database is locked'. synchronous=NORMAL is durable in WAL mode
+    except for the last transactions before a power loss.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.close()
+
+    # Connections opened before this point keep their old settings
+    engine.dispose()
+
+
+class WriteJob:
+    """One unit of work for the group-commit writer"""
+
+    def __init__(self, apply):
+        self.apply = apply
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GroupCommitWriter:
+    """Single writer thread that groups database writes into shared transactions
+
+    ``submit`` queues a callable that receives ``db.session`` and adds or
+    updates rows without committing. The writer applies up to ``max_batch``
+    queued jobs, waiting at most ``max_delay_ms`` for more to arrive, and
+    commits them together. If the group fails it is rolled back and each
+    job is retried in its own transaction, so one bad write only fails
+    itself. Jobs run in submission order, so later jobs see what earlier
+    ones wrote. Each process (gunicorn worker) has its own writer.
+    """
+
+    def __init__(self, app, db, max_batch=256, max_delay_ms=10, max_queue=10000, stats_window=1000):
+        self.app = app
+        self.db = db
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, float(max_delay_ms)) / 1000.0
+        self.max_queue = int(max_queue)
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+
+        self._batches = 0
+        self._jobs = 0
+        self._errors = 0
+        self._retried_batches = 0
+        self._commit_ms = []
+        self._stats_window = stats_window
+
+        atexit.register(self.drain)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so gunicorn workers start their own
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._worker = threading.Thread(target=self._run, name='db-group-writer', daemon=True)
+            self._worker.start()
+            self._pid = pid
+
+    def submit(self, apply, wait=True, timeout=10.0):
+        """Queue ``apply(session)``; if ``wait``, block until it is committed and return its result"""
+        self._ensure_started()
+        job = WriteJob(apply)
+        try:
+            self._queue.put(job, timeout=timeout)
+        except queue.Full:
+            raise TimeoutError('Database write queue is full')
+        if not wait:
+            return job
+        if not job.done.wait(timeout):
+            raise TimeoutError('Database write timed out')
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._commit(batch)
+            except Exception as e:
+                print(f"Error in database writer: {e}")
+                for job in batch:
+                    if not job.done.is_set():
+                        job.error = e
+                        job.done.set()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _commit(self, batch):
+        session = self.db.session
+        started = time.perf_counter()
+        try:
+            results = [job.apply(session) for job in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) > 1:
+                # Find the failing write; the others commit on their own
+                with self._lock:
+                    self._retried_batches += 1
+                for job in batch:
+                    self._commit([job])
+                return
+            with self._lock:
+                self._errors += 1
+            print(f"Error committing database write: {e}")
+            batch[0].error = e
+            batch[0].done.set()
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self._batches += 1
+            self._jobs += len(batch)
+            self._commit_ms.append(elapsed_ms)
+            del self._commit_ms[:-self._stats_window]
+        for job, result in zip(batch, results):
+            job.result = result
+            job.done.set()
+
+    def drain(self, timeout=5.0):
+        """Wait for queued writes to commit, up to ``timeout`` seconds"""
+        if self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self):
+        with self._lock:
+            commit_ms = sorted(self._commit_ms)
+            return {
+                'max_batch': self.max_batch,
+                'max_delay_ms': self.max_delay * 1000.0,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'jobs': self._jobs,
+                'mean_batch_size': round(self._jobs / self._batches, 3) if self._batches else 0.0,
+                'retried_batches': self._retried_batches,
+                'errors': self._errors,
+                'commit_ms_p50': round(commit_ms[len(commit_ms) // 2], 3) if commit_ms else 0.0,
+                'commit_ms_max': round(commit_ms[-1], 3) if commit_ms else 0.0,
+            }
@@ -0,0 +1,57 @@
+from admission import FrameAdmission
+
+
+def decisions(admission, session_id, count, start=0.0, step=1.0):
+    return [admission.admit(session_id, now=start + i * step) for i in range(count)]
+
+
+def test_base_skip_ratio_keeps_every_other_frame():
+    admission = FrameAdmission(base_skip_ratio=0.5, max_fps=0)
+    results = decisions(admission, 's1', 6)
+    assert [admitted for admitted, _ in results] == [False, True, False, True, False, True]
+    assert {reason for admitted, reason in results if not admitted} == {'skipped'}
+
+
+def test_zero_skip_ratio_admits_everything():
+    admission = FrameAdmission(base_skip_ratio=0.0, max_fps=0)
+    assert all(admitted for admitted, _ in decisions(admission, 's1', 5))
+
+
+def test_sessions_earn_credit_independently():
+    admission = FrameAdmission(base_skip_ratio=0.5, max_fps=0)
+    assert admission.admit('a', now=0.0) == (False, 'skipped')
+    assert admission.admit('b', now=0.0) == (False, 'skipped')
+    assert admission.admit('a', now=1.0) == (True, 'admitted')
+    assert admission.admit('b', now=1.0) == (True, 'admitted')
+
+
+def test_skip_ratio_rises_with_queue_depth():
+    depth = {'value': 0}
+    admission = FrameAdmission(queue_depth=lambda: depth['value'], base_skip_ratio=0.5,
+                               max_skip_ratio=0.9, queue_low=8, queue_high=32, max_fps=0)
+    assert admission.skip_ratio() == 0.5
+    depth['value'] = 20
+    assert abs(admission.skip_ratio() - 0.7) < 1e-9
+    depth['value'] = 100
+    assert abs(admission.skip_ratio() - 0.9) < 1e-9
+
+    # At 0.9 only one frame in ten is admitted
+    admitted = sum(ok for ok, _ in decisions(admission, 's1', 100))
+    assert admitted == 10
+
+
+def test_max_fps_rate_limits_admitted_frames():
+    admission = FrameAdmission(base_skip_ratio=0.0, max_fps=4.0)
+    assert admission.admit('s1', now=0.0) == (True, 'admitted')
+    assert admission.admit('s1', now=0.1) == (False, 'rate_limited')
+    assert admission.admit('s1', now=0.26) == (True, 'admitted')
+    stats = admission.stats()
+    assert (stats['admitted'], stats['rate_limited'], stats['skipped']) == (2, 1, 0)
+
+
+def test_idle_sessions_are_pruned():
+    admission = FrameAdmission(base_skip_ratio=0.0, max_fps=0, session_ttl=10.0)
+    admission._last_prune = 0.0
+    admission.admit('old', now=0.0)
+    admission.admit('new', now=20.0)
+    assert admission.stats()['active_sessions'] == 1
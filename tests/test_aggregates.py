@@ -0,0 +1,169 @@
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from aggregates import StatisticsAggregator
+
+
+@pytest.fixture
+def stats():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+
+    # The columns the aggregator reads, shaped like the app's models
+    class Candidate(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        added_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+    class JobRequirement(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        is_active = db.Column(db.Boolean, default=True)
+
+    class Interview(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        job_id = db.Column(db.Integer, db.ForeignKey('job_requirement.id'), nullable=False)
+        date = db.Column(db.Date, nullable=False)
+        status = db.Column(db.String(20), default='Scheduled')
+
+    class CheatingViolation(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        violation_type = db.Column(db.String(50), nullable=False)
+        timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    class StatsSummary(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        total_candidates = db.Column(db.Integer, nullable=False, default=0)
+        total_jobs = db.Column(db.Integer, nullable=False, default=0)
+        total_interviews = db.Column(db.Integer, nullable=False, default=0)
+        completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+        scheduled_interviews = db.Column(db.Integer, nullable=False, default=0)
+        total_violations = db.Column(db.Integer, nullable=False, default=0)
+        tab_change_violations = db.Column(db.Integer, nullable=False, default=0)
+        rebuilt_at = db.Column(db.DateTime)
+
+    class StatsDaily(db.Model):
+        day = db.Column(db.Date, primary_key=True)
+        candidates = db.Column(db.Integer, nullable=False, default=0)
+        interviews = db.Column(db.Integer, nullable=False, default=0)
+        completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+        violations = db.Column(db.Integer, nullable=False, default=0)
+        tab_change_violations = db.Column(db.Integer, nullable=False, default=0)
+
+    class StatsByJob(db.Model):
+        job_id = db.Column(db.Integer, db.ForeignKey('job_requirement.id'), primary_key=True)
+        interviews = db.Column(db.Integer, nullable=False, default=0)
+        completed_interviews = db.Column(db.Integer, nullable=False, default=0)
+        scheduled_interviews = db.Column(db.Integer, nullable=False, default=0)
+
+    with app.app_context():
+        db.create_all()
+        aggregator = StatisticsAggregator(db, Candidate, JobRequirement, Interview, CheatingViolation,
+                                          StatsSummary, StatsDaily, StatsByJob)
+        aggregator.install()
+        aggregator.models = {model.__name__: model for model in (
+            Candidate, JobRequirement, Interview, CheatingViolation)}
+        yield db, aggregator
+
+
+def snapshot(aggregator):
+    """Summary, daily and per-job counters as plain values"""
+    daily = {row.day: tuple(getattr(row, c) for c in ('candidates', 'interviews', 'completed_interviews',
+                                                         'violations', 'tab_change_violations'))
+             for row in aggregator.daily()}
+    by_job = {row.job_id: (row.interviews, row.completed_interviews, row.scheduled_interviews)
+              for row in aggregator.by_job()}
+    # Rows whose counters all dropped to zero are equivalent to missing rows
+    daily = {day: counts for day, counts in daily.items() if any(counts)}
+    by_job = {job_id: counts for job_id, counts in by_job.items() if any(counts)}
+    return aggregator.summary(), daily, by_job
+
+
+def populate(db, models):
+    Candidate, Job, Interview, Violation = (models[name] for name in (
+        'Candidate', 'JobRequirement', 'Interview', 'CheatingViolation'))
+    jobs = [Job(is_active=True), Job(is_active=True), Job(is_active=False)]
+    db.session.add_all(jobs)
+    db.session.add_all([Candidate(added_date=datetime(2026, 1, 1, 9)),
+                        Candidate(added_date=datetime(2026, 1, 2, 23, 59))])
+    db.session.flush()
+    interviews = [
+        Interview(job_id=jobs[0].id, date=date(2026, 1, 5), status='Scheduled'),
+        Interview(job_id=jobs[0].id, date=date(2026, 1, 5), status='Completed'),
+        Interview(job_id=jobs[1].id, date=date(2026, 1, 6), status='Scheduled'),
+    ]
+    db.session.add_all(interviews)
+    violations = [
+        Violation(violation_type='tab_change', timestamp=datetime(2026, 1, 5, 10)),
+        Violation(violation_type='object_detected', timestamp=datetime(2026, 1, 5, 11)),
+    ]
+    db.session.add_all(violations)
+    db.session.commit()
+    return jobs, interviews, violations
+
+
+def test_incremental_counters_match_a_rebuild(stats):
+    db, aggregator = stats
+    aggregator.rebuild()
+    jobs, interviews, violations = populate(db, aggregator.models)
+
+    incremental = snapshot(aggregator)
+    summary = incremental[0]
+    assert summary['total_candidates'] == 2
+    assert summary['total_jobs'] == 2
+    assert (summary['total_interviews'], summary['completed_interviews'], summary['scheduled_interviews']) == (3, 1, 2)
+    assert (summary['total_violations'], summary['tab_change_violations'], summary['object_violations']) == (2, 1, 1)
+    assert incremental[1][date(2026, 1, 5)] == (0, 2, 1, 2, 1)
+    assert incremental[2][jobs[0].id] == (2, 1, 1)
+
+    aggregator.rebuild()
+    assert snapshot(aggregator) == incremental
+
+
+def test_updates_and_deletes_move_counts(stats):
+    db, aggregator = stats
+    aggregator.rebuild()
+    jobs, interviews, violations = populate(db, aggregator.models)
+
+    # Complete an interview, move one to another job and day, retire a job
+    interviews[0].status = 'Completed'
+    interviews[2].job_id = jobs[0].id
+    interviews[2].date = date(2026, 1, 7)
+    jobs[1].is_active = False
+    violations[0].violation_type = 'object_detected'
+    db.session.delete(violations[1])
+    db.session.commit()
+
+    incremental = snapshot(aggregator)
+    summary = incremental[0]
+    assert summary['total_jobs'] == 1
+    assert (summary['completed_interviews'], summary['scheduled_interviews']) == (2, 1)
+    assert (summary['total_violations'], summary['tab_change_violations']) == (1, 0)
+    assert jobs[1].id not in incremental[2]
+    assert date(2026, 1, 6) not in incremental[1]
+
+    aggregator.rebuild()
+    assert snapshot(aggregator) == incremental
+    assert aggregator.verify() == {}
+
+
+def test_rolled_back_changes_leave_counters_alone(stats):
+    db, aggregator = stats
+    aggregator.rebuild()
+    populate(db, aggregator.models)
+    before = snapshot(aggregator)
+
+    db.session.add(aggregator.models['CheatingViolation'](violation_type='tab_change'))
+    db.session.flush()
+    db.session.rollback()
+    assert snapshot(aggregator) == before
+
+
+def test_summary_builds_on_first_use(stats):
+    db, aggregator = stats
+    populate(db, aggregator.models)
+    # No rebuild yet: the summary row is missing and is built from the tables
+    assert aggregator.summary()['total_interviews'] == 3
+    assert aggregator.stats()['rebuilds'] == 1
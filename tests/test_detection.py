@@ -0,0 +1,65 @@
+import numpy as np
+
+from detection import DetectionFilter
+
+NAMES = {0: 'person', 63: 'laptop', 67: 'cell phone', 73: 'book'}
+
+
+class Boxes:
+    def __init__(self, rows):
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        self.xyxy = rows[:, :4]
+        self.conf = rows[:, 4]
+        self.cls = rows[:, 5]
+
+    def __len__(self):
+        return len(self.cls)
+
+
+class Result:
+    def __init__(self, rows):
+        self.boxes = Boxes(rows) if rows is not None else None
+
+
+def make_filter(conf=0.5):
+    return DetectionFilter(NAMES, 'person', ['cell phone', 'book', 'headphones'], conf=conf)
+
+
+def test_class_whitelist_covers_person_and_known_objects():
+    detection_filter = make_filter()
+    assert detection_filter.model_kwargs() == {'conf': 0.5, 'classes': [0, 67, 73]}
+
+
+def test_summarize_counts_confident_people_and_objects():
+    result = Result([
+        [0, 0, 10, 10, 0.9, 0],
+        [0, 0, 10, 10, 0.7, 0],
+        [0, 0, 10, 10, 0.3, 0],    # person below threshold
+        [0, 0, 5, 5, 0.8, 67],
+        [0, 0, 5, 5, 0.4, 73],     # book below threshold
+        [0, 0, 5, 5, 0.95, 63],    # laptop is not a cheating object
+    ])
+    person_count, detections = make_filter().summarize(result)
+    assert person_count == 2
+    assert [(name, round(conf, 3)) for name, conf in detections] == [('cell phone', 0.8)]
+
+
+def test_threshold_is_exclusive():
+    person_count, detections = make_filter().summarize(Result([[0, 0, 1, 1, 0.5, 0], [0, 0, 1, 1, 0.5, 67]]))
+    assert (person_count, detections) == (0, [])
+
+
+def test_empty_results():
+    detection_filter = make_filter()
+    assert detection_filter.summarize(Result(None)) == (0, [])
+    assert detection_filter.summarize(Result(np.empty((0, 6)))) == (0, [])
+    assert detection_filter.person_boxes(Result(None)).shape == (0, 4)
+
+
+def test_person_boxes_returns_confident_person_boxes_only():
+    result = Result([
+        [1, 2, 3, 4, 0.9, 0],
+        [5, 6, 7, 8, 0.2, 0],
+        [9, 9, 9, 9, 0.9, 67],
+    ])
+    np.testing.assert_array_equal(make_filter().person_boxes(result), [[1, 2, 3, 4]])
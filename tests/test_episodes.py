@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from episodes import EpisodeTracker, difference_hash, hamming_distance
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def phone(confidence):
+    return {'object': 'cell phone', 'confidence': confidence}
+
+
+class Job:
+    def __init__(self, path, status):
+        self.path = path
+        self.status = status
+
+
+def test_repeat_boxes_in_a_frame_count_once_but_raise_the_peak():
+    tracker = EpisodeTracker(gap_seconds=3.0)
+    opened, extended, closed = tracker.observe('s1', [phone(0.5), phone(0.9)], at(0))
+    assert len(opened) == 1 and extended == [] and closed == []
+    episode = opened[0]
+    assert episode.frames == 1
+    assert episode.peak_confidence == 0.9
+
+    tracker.observe('s1', [phone(0.4), phone(0.6)], at(1))
+    assert episode.frames == 2
+    assert episode.peak_confidence == 0.9
+    assert episode.ended_at == at(1)
+
+
+def test_peak_person_count():
+    tracker = EpisodeTracker()
+    opened, _, _ = tracker.observe('s1', [{'object': 'multiple_persons', 'count': 2}], at(0))
+    tracker.observe('s1', [{'object': 'multiple_persons', 'count': 4}], at(1))
+    tracker.observe('s1', [{'object': 'multiple_persons', 'count': 3}], at(2))
+    assert opened[0].violation_type == 'multiple_persons'
+    assert opened[0].peak_person_count == 4
+    assert opened[0].frames == 3
+
+
+def test_gap_closes_the_episode_and_starts_a_new_one():
+    tracker = EpisodeTracker(gap_seconds=3.0)
+    first, _, _ = tracker.observe('s1', [phone(0.8)], at(0))
+    _, extended, _ = tracker.observe('s1', [phone(0.8)], at(2))
+    assert extended == first
+
+    opened, extended, closed = tracker.observe('s1', [phone(0.7)], at(10))
+    assert closed == first
+    assert extended == []
+    assert len(opened) == 1 and opened[0] is not first[0]
+
+
+def test_episodes_close_when_the_object_disappears():
+    tracker = EpisodeTracker(gap_seconds=3.0)
+    opened, _, _ = tracker.observe('s1', [phone(0.8)], at(0))
+    assert tracker.observe('s1', [], at(2))[2] == []
+    assert tracker.observe('s1', [], at(4))[2] == opened
+    assert tracker.close_session('s1') == []
+
+
+def test_sessions_do_not_share_episodes():
+    tracker = EpisodeTracker()
+    a, _, _ = tracker.observe('a', [phone(0.8)], at(0))
+    b, _, _ = tracker.observe('b', [phone(0.8)], at(0))
+    assert a[0] is not b[0]
+    assert tracker.close_session('a') == a
+
+
+def test_evidence_is_deduplicated_by_frame_hash():
+    tracker = EpisodeTracker(hash_distance=10)
+    episode = tracker.observe('s1', [phone(0.8)], at(0))[0][0]
+    assert tracker.wants_evidence(episode, 0)
+    assert not tracker.wants_evidence(episode, 0b111)            # 3 bits away
+    assert tracker.wants_evidence(episode, (1 << 20) - 1)        # 20 bits away
+    assert episode.evidence_count == 2
+
+
+def test_difference_hash_matches_similar_images():
+    # dHash compares horizontal neighbours, so use a left-to-right gradient
+    gradient = Image.linear_gradient('L').rotate(90).resize((64, 64))
+    brighter = gradient.point(lambda v: min(255, v + 10))
+    flipped = gradient.transpose(Image.FLIP_LEFT_RIGHT)
+    assert hamming_distance(difference_hash(gradient), difference_hash(brighter)) <= 10
+    assert hamming_distance(difference_hash(gradient), difference_hash(flipped)) > 10
+
+
+def test_evidence_path_skips_discarded_writes():
+    tracker = EpisodeTracker()
+    episode = tracker.observe('s1', [phone(0.8)], at(0))[0][0]
+    assert episode.evidence_path is None
+    episode.add_evidence(Job('a.jpg', 'saved'))
+    episode.add_evidence(Job('b.jpg', 'dropped'))
+    assert episode.evidence_path == 'a.jpg'
+    episode.add_evidence(Job('c.jpg', 'pending'))
+    assert episode.evidence_path == 'c.jpg'
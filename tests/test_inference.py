@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from inference import InferenceScheduler
+
+
+def submit_all(scheduler, frames, timeout=5.0):
+    results, errors = {}, {}
+
+    def run(frame):
+        try:
+            results[frame] = scheduler.submit(frame, timeout=timeout)
+        except Exception as e:
+            errors[frame] = e
+
+    threads = [threading.Thread(target=run, args=(frame,)) for frame in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_frames_share_a_batch_and_get_their_own_result():
+    batches = []
+
+    def infer(frames):
+        batches.append(list(frames))
+        return [frame * 10 for frame in frames]
+
+    scheduler = InferenceScheduler(infer, max_batch_size=4, max_wait_ms=200)
+    results, errors = submit_all(scheduler, [1, 2, 3, 4])
+
+    assert errors == {}
+    assert results == {1: 10, 2: 20, 3: 30, 4: 40}
+    assert sorted(len(batch) for batch in batches) == [4]
+    assert scheduler.stats()['frames'] == 4
+
+
+def test_batches_never_exceed_max_batch_size():
+    batches = []
+
+    def infer(frames):
+        batches.append(len(frames))
+        return list(frames)
+
+    scheduler = InferenceScheduler(infer, max_batch_size=2, max_wait_ms=50)
+    results, errors = submit_all(scheduler, list(range(7)))
+
+    assert errors == {}
+    assert results == {i: i for i in range(7)}
+    assert max(batches) <= 2
+    assert sum(batches) == 7
+
+
+def test_batch_error_is_raised_in_every_caller():
+    def infer(frames):
+        raise RuntimeError('model failed')
+
+    scheduler = InferenceScheduler(infer, max_batch_size=4, max_wait_ms=50)
+    results, errors = submit_all(scheduler, [1, 2])
+
+    assert results == {}
+    assert {frame: str(e) for frame, e in errors.items()} == {1: 'model failed', 2: 'model failed'}
+    assert scheduler.stats()['errors'] >= 1
+
+
+def test_wrong_result_count_is_an_error():
+    scheduler = InferenceScheduler(lambda frames: [], max_batch_size=1, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match='Expected 1 results'):
+        scheduler.submit('frame')
+
+
+def test_timed_out_requests_are_withdrawn_before_dispatch():
+    seen = []
+    release = threading.Event()
+
+    def infer(frames):
+        seen.extend(frames)
+        release.wait(2.0)
+        return list(frames)
+
+    scheduler = InferenceScheduler(infer, max_batch_size=1, max_wait_ms=0)
+    # The first frame occupies the only dispatcher until released
+    first = threading.Thread(target=lambda: scheduler.submit('busy', timeout=5.0))
+    first.start()
+    while not seen:
+        time.sleep(0.01)
+
+    with pytest.raises(TimeoutError):
+        scheduler.submit('late', timeout=0.05)
+    assert scheduler.queue_depth() == 0
+
+    release.set()
+    first.join()
+    assert scheduler.submit('next', timeout=5.0) == 'next'
+    assert 'late' not in seen
+    assert scheduler.stats()['cancelled'] == 1
@@ -0,0 +1,75 @@
+import json
+import os
+
+from metrics import MetricsRegistry, clear_multiprocess_dir, mark_process_dead
+
+
+def samples(text):
+    return [line for line in text.splitlines() if line and not line.startswith('#')]
+
+
+def test_counter_family_is_named_after_its_samples():
+    registry = MetricsRegistry(prefix='app_')
+    frames = registry.counter('frames', 'Frames seen', ['source'])
+    frames.inc(source='camera')
+    frames.inc(2, source='camera')
+    text = registry.render()
+    assert '# HELP app_frames_total Frames seen' in text
+    assert '# TYPE app_frames_total counter' in text
+    assert samples(text) == ['app_frames_total{source="camera"} 3']
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+    assert samples(registry.render()) == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 6.05',
+        'latency_seconds_count 4',
+    ]
+
+
+def test_merge_sums_counters_and_histograms_across_processes():
+    registry = MetricsRegistry()
+    counter = registry.counter('hits', 'Hits', ['k'])
+    histogram = registry.histogram('lat', 'Latency', buckets=(1.0,))
+    assert counter.merge([[[['a'], 1]], [[['a'], 2], [['b'], 5]]]) == {('a',): 3, ('b',): 5}
+
+    merged = histogram.merge([[[[], [[1, 0], 0.5]]], [[[], [[2, 1], 3.0]]]])
+    assert merged[()].counts == [3, 1]
+    assert merged[()].sum == 3.5
+
+
+def test_gauge_merge_modes():
+    registry = MetricsRegistry()
+    summed = registry.gauge('depth', 'Depth')
+    largest = registry.gauge('lag', 'Lag', multiprocess_mode='max')
+    snapshots = [[[[], 2]], [[[], 7]], [[[], 3]]]
+    assert summed.merge(snapshots) == {(): 12}
+    assert largest.merge(snapshots) == {(): 7}
+
+
+def write_process_file(directory, pid, metrics, live=True):
+    with open(os.path.join(directory, f'metrics_{pid}.json'), 'w') as f:
+        json.dump({'live': live, 'metrics': metrics}, f)
+
+
+def test_render_merges_files_and_drops_dead_gauges(tmp_path):
+    directory = str(tmp_path)
+    registry = MetricsRegistry(multiprocess_dir=directory, flush_interval=60)
+    registry.counter('hits', 'Hits')
+    registry.gauge('inflight', 'In flight')
+    registry.gauge('active', 'Active', function=lambda: 9, multiprocess_mode='local')
+
+    write_process_file(directory, 1, {'hits': [[[], 4]], 'inflight': [[[], 2]]})
+    write_process_file(directory, 2, {'hits': [[[], 6]], 'inflight': [[[], 3]]})
+    mark_process_dead(2, directory)
+
+    assert samples(registry.render()) == ['hits_total 10', 'inflight 2', 'active 9']
+
+    clear_multiprocess_dir(directory)
+    assert not [name for name in os.listdir(directory) if name.startswith('metrics_1')]
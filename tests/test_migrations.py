@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from migrations import LATEST_VERSION, MIGRATIONS, migrate, schema_version
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+
+def create_legacy_tables(engine):
+    # The tables as they existed before any migration
+    with engine.begin() as connection:
+        for sql in (
+            'CREATE TABLE interview (id INTEGER PRIMARY KEY, candidate_id INTEGER, job_id INTEGER, '
+            'date DATE, status VARCHAR(20), created_date DATETIME)',
+            'CREATE INDEX ix_interview_status ON interview (status)',
+            'CREATE TABLE interview_session (id INTEGER PRIMARY KEY, session_id VARCHAR(36) UNIQUE, status VARCHAR(20))',
+            'CREATE TABLE cheating_violation (id INTEGER PRIMARY KEY, session_id VARCHAR(36), '
+            'violation_type VARCHAR(50))',
+        ):
+            connection.exec_driver_sql(sql)
+
+
+def indexes(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def test_versions_are_increasing():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert LATEST_VERSION == versions[-1]
+
+
+def test_empty_database_gets_the_created_tables(engine):
+    assert schema_version(engine) == 0
+    assert migrate(engine, verbose=False) == LATEST_VERSION
+    assert schema_version(engine) == LATEST_VERSION
+
+    tables = set(inspect(engine).get_table_names())
+    assert {'stats_summary', 'stats_daily', 'stats_by_job', 'interview_result', 'violation_episode'} <= tables
+    # Statements for tables that do not exist are skipped, not failed
+    assert 'interview' not in tables
+    assert 'ix_violation_episode_session_started' in indexes(engine, 'violation_episode')
+
+
+def test_legacy_database_gets_indexes_and_drops_the_replaced_one(engine):
+    create_legacy_tables(engine)
+    migrate(engine, verbose=False)
+
+    interview_indexes = indexes(engine, 'interview')
+    assert {'ix_interview_job_date', 'ix_interview_date', 'ix_interview_status_created'} <= interview_indexes
+    assert 'ix_interview_status' not in interview_indexes
+    assert 'ix_interview_session_status' in indexes(engine, 'interview_session')
+    assert 'ix_cheating_violation_session_type' in indexes(engine, 'cheating_violation')
+
+
+def test_migrate_is_idempotent(engine):
+    create_legacy_tables(engine)
+    assert migrate(engine, verbose=False) == LATEST_VERSION
+    before = {table: indexes(engine, table) for table in inspect(engine).get_table_names()}
+    assert migrate(engine, verbose=False) == LATEST_VERSION
+    after = {table: indexes(engine, table) for table in inspect(engine).get_table_names()}
+    assert before == after
+
+
+def test_only_pending_migrations_run(engine):
+    create_legacy_tables(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('PRAGMA user_version = 2')
+    migrate(engine, verbose=False)
+    # Migration 2 is recorded as applied, so its DROP INDEX never runs
+    assert 'ix_interview_status' in indexes(engine, 'interview')
+    assert 'violation_episode' in inspect(engine).get_table_names()
+
+
+def test_failed_migration_rolls_back(engine, monkeypatch):
+    broken = MIGRATIONS + [(LATEST_VERSION + 1, 'broken', [(None, 'CREATE TABLE ok_table (id INTEGER)'),
+                                                          (None, 'NOT SQL')])]
+    monkeypatch.setattr('migrations.MIGRATIONS', broken)
+    with pytest.raises(Exception):
+        migrate(engine, verbose=False)
+    assert schema_version(engine) == 0
+    assert 'ok_table' not in inspect(engine).get_table_names()
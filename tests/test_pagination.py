@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, Date, DateTime, Integer, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from pagination import decode_cursor, encode_cursor, keyset_page
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = 'row'
+    id = Column(Integer, primary_key=True)
+    day = Column(Date)
+    created = Column(DateTime)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        start = date(2026, 1, 1)
+        # Three rows per day so pages split ties on the sort column
+        session.add_all(Row(id=i + 1, day=start + timedelta(days=i // 3),
+                            created=datetime(2026, 1, 1) + timedelta(minutes=i)) for i in range(20))
+        session.add(Row(id=100, day=None))
+        session.commit()
+        yield session
+
+
+def test_cursor_round_trip_restores_types():
+    cursor = encode_cursor([date(2026, 3, 4), 17])
+    assert '=' not in cursor
+    assert decode_cursor(cursor, (Row.day, Row.id)) == [date(2026, 3, 4), 17]
+
+    cursor = encode_cursor([datetime(2026, 3, 4, 5, 6, 7), 1])
+    assert decode_cursor(cursor, (Row.created, Row.id)) == [datetime(2026, 3, 4, 5, 6, 7), 1]
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64 !',
+    encode_cursor([1]),                          # wrong length
+    encode_cursor(['2026-01-01', 'x']),          # id is not an int
+    encode_cursor(['yesterday', 1]),             # not an ISO date
+    encode_cursor([['2026-01-01'], 1]),          # wrong type altogether
+    'eyJhIjogMX0',                               # a JSON object, not a list
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, (Row.day, Row.id))
+
+
+def collect(session, descending):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = keyset_page(session.query(Row), Row.day, Row.id, cursor=cursor, limit=6, descending=descending)
+        ids.extend(row.id for row in page.items)
+        pages += 1
+        if page.next_cursor is None:
+            return ids, pages
+        cursor = page.next_cursor
+
+
+def test_pages_cover_every_row_once_in_order(session):
+    ids, pages = collect(session, descending=True)
+    assert ids == list(range(20, 0, -1))
+    assert pages == 4
+
+    ids, _ = collect(session, descending=False)
+    assert ids == list(range(1, 21))
+
+
+def test_rows_inserted_before_the_cursor_do_not_shift_the_next_page(session):
+    first = keyset_page(session.query(Row), Row.day, Row.id, limit=6)
+    session.add(Row(id=50, day=date(2030, 1, 1)))
+    session.commit()
+    second = keyset_page(session.query(Row), Row.day, Row.id, cursor=first.next_cursor, limit=6)
+    assert [row.id for row in second.items] == list(range(14, 8, -1))
+
+
+def test_null_sort_values_are_excluded(session):
+    ids, _ = collect(session, descending=True)
+    assert 100 not in ids
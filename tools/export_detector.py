@@ -0,0 +1,80 @@
+"""Export the proctoring detector for CPU inference
+
+Produces an ONNX or OpenVINO copy of the YOLO weights that app.py can load
+by pointing DETECTOR_WEIGHTS at the output. OpenVINO exports can be
+INT8-quantized, calibrated on the stored evidence frames under frames/.
+Run from the repository root:
+
+    python tools/export_detector.py --format onnx
+    python tools/export_detector.py --format openvino --int8 --calib-dir frames
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+
+from ultralytics import YOLO
+
+
+def build_calibration_dataset(model, calib_dir, workdir, limit):
+    """Write a detection dataset YAML over the evidence JPEGs for INT8 calibration"""
+    images = sorted(glob.glob(os.path.join(calib_dir, '**', '*.jpg'), recursive=True))[:limit]
+    if not images:
+        raise SystemExit(f"No calibration images found under {calib_dir}/")
+
+    image_dir = os.path.join(workdir, 'images')
+    os.makedirs(image_dir, exist_ok=True)
+    for i, path in enumerate(images):
+        # Flatten session folders; calibration only needs the pixels
+        shutil.copy(path, os.path.join(image_dir, f"{i:05d}.jpg"))
+
+    names = '\n'.join(f"  {class_id}: {name}" for class_id, name in model.names.items())
+    yaml_path = os.path.join(workdir, 'calibration.yaml')
+    with open(yaml_path, 'w') as f:
+        f.write(f"path: {workdir}\ntrain: images\nval: images\nnames:\n{names}\n")
+    print(f"Calibration set: {len(images)} images from {calib_dir}/")
+    return yaml_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--format', choices=['onnx', 'openvino'], default='onnx')
+    parser.add_argument('--int8', action='store_true', help='INT8-quantize (OpenVINO only)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--batch', type=int, default=8, help='largest batch the scheduler will send')
+    parser.add_argument('--calib-dir', default='frames')
+    parser.add_argument('--calib-limit', type=int, default=300)
+    args = parser.parse_args()
+
+    if args.int8 and args.format != 'openvino':
+        parser.error('--int8 is only supported with --format openvino')
+
+    model = YOLO(args.weights)
+    options = {
+        'format': args.format,
+        'imgsz': args.imgsz,
+        # Dynamic axes let the inference scheduler send variable batch sizes
+        'dynamic': True,
+        'batch': args.batch,
+    }
+
+    workdir = None
+    try:
+        if args.int8:
+            workdir = tempfile.mkdtemp(prefix='detector-calib-')
+            options['int8'] = True
+            options['data'] = build_calibration_dataset(model, args.calib_dir, workdir, args.calib_limit)
+            options['fraction'] = 1.0
+        output = model.export(**options)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Exported {args.weights} -> {output}")
+    print(f"Serve it with DETECTOR_WEIGHTS={output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Report the SQLite query plan of every hot query in app.py
+
+Runs EXPLAIN QUERY PLAN for the lookups the interview, results and
+dashboard routes issue, against a temporary copy of the database with
+pending migrations applied, so the live file is never touched. A query
+is flagged when SQLite would read a whole table without an index or
+sort its results in a temporary B-tree. Run from the repository root:
+
+    python tools/query_plans.py
+    python tools/query_plans.py --db instance/interview_system.db --no-migrate
+
+Exits with status 1 if any query is flagged.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate
+
+# (route or caller, table, SQL equivalent of the ORM query, parameters)
+HOT_QUERIES = [
+    ('interview session lookup', 'interview_session',
+     'SELECT * FROM interview_session WHERE session_id = ? LIMIT 1', ('s',)),
+    ('active_sessions gauge', 'interview_session',
+     'SELECT count(*) FROM interview_session WHERE status = ?', ('active',)),
+    ('current question', 'interview_question',
+     'SELECT * FROM interview_question WHERE session_id = ? AND question_number = ? LIMIT 1', ('s', 1)),
+    ('session questions', 'interview_question',
+     'SELECT * FROM interview_question WHERE session_id = ?', ('s',)),
+    ('session answers', 'interview_answer',
+     'SELECT * FROM interview_answer WHERE session_id = ?', ('s',)),
+    ('answer count', 'interview_answer',
+     'SELECT count(*) FROM interview_answer WHERE session_id = ?', ('s',)),
+    ('session violations', 'cheating_violation',
+     'SELECT * FROM cheating_violation WHERE session_id = ?', ('s',)),
+    ('session violations by type', 'cheating_violation',
+     'SELECT count(*) FROM cheating_violation WHERE session_id = ? AND violation_type = ?', ('s', 'tab_change')),
+    ('dashboard tab changes', 'cheating_violation',
+     'SELECT count(*) FROM cheating_violation WHERE violation_type = ?', ('tab_change',)),
+    ('dashboard object violations', 'cheating_violation',
+     'SELECT count(*) FROM cheating_violation WHERE violation_type != ?', ('tab_change',)),
+    ('result snapshot etag', 'interview_result',
+     'SELECT etag FROM interview_result WHERE session_id = ?', ('s',)),
+    ('session episodes', 'violation_episode',
+     'SELECT * FROM violation_episode WHERE session_id = ? ORDER BY started_at', ('s',)),
+    ('interview by session', 'interview',
+     'SELECT * FROM interview WHERE session_id = ? LIMIT 1', ('s',)),
+    ('candidate interviews', 'interview',
+     'SELECT * FROM interview WHERE candidate_id = ?', (1,)),
+    ('job interviews', 'interview',
+     'SELECT * FROM interview WHERE job_id = ?', (1,)),
+    ('completed interviews', 'interview',
+     'SELECT count(*) FROM interview WHERE status = ?', ('Completed',)),
+    ('recent interviews', 'interview',
+     'SELECT * FROM interview ORDER BY created_date DESC LIMIT 5', ()),
+    ('interview listing page', 'interview',
+     'SELECT * FROM interview LEFT OUTER JOIN candidate ON candidate.id = interview.candidate_id '
+     'LEFT OUTER JOIN job_requirement ON job_requirement.id = interview.job_id '
+     'WHERE interview.created_date IS NOT NULL AND (interview.created_date, interview.id) < (?, ?) '
+     'ORDER BY interview.created_date DESC, interview.id DESC LIMIT 51', ('2030-01-01', 1 << 40)),
+    ('interview listing by status', 'interview',
+     'SELECT * FROM interview WHERE status = ? AND created_date IS NOT NULL '
+     'AND (created_date, id) < (?, ?) ORDER BY created_date DESC, id DESC LIMIT 51',
+     ('Scheduled', '2030-01-01', 1 << 40)),
+    ('interview listing by date', 'interview',
+     'SELECT * FROM interview WHERE date IS NOT NULL AND (date, id) > (?, ?) '
+     'ORDER BY date, id LIMIT 51', ('2020-01-01', 0)),
+    ('candidate listing page', 'candidate',
+     'SELECT * FROM candidate WHERE added_date IS NOT NULL AND (added_date, id) < (?, ?) '
+     'ORDER BY added_date DESC, id DESC LIMIT 51', ('2030-01-01', 1 << 40)),
+    ('recent candidates', 'candidate',
+     'SELECT * FROM candidate ORDER BY added_date DESC LIMIT 5', ()),
+    ('login', 'user',
+     'SELECT * FROM user WHERE email = ? AND is_active = 1 LIMIT 1', ('a@b.c',)),
+]
+
+
+def plan_problems(plan):
+    """Return the plan lines that read a table without an index or sort in a temp B-tree"""
+    problems = []
+    for line in plan:
+        if line.startswith('SCAN ') and ' USING ' not in line:
+            problems.append(line)
+        elif line.startswith('USE TEMP B-TREE'):
+            problems.append(line)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=os.path.join('instance', 'interview_system.db'))
+    parser.add_argument('--no-migrate', action='store_true', help='Report the schema as it is on disk')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Database not found: {args.db}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plans.db')
+        # Copy through the backup API so a WAL database is copied consistently
+        with sqlite3.connect(args.db) as source, sqlite3.connect(path) as target:
+            source.backup(target)
+
+        version = None
+        if not args.no_migrate:
+            engine = create_engine(f'sqlite:///{path}')
+            version = migrate(engine, verbose=False)
+            engine.dispose()
+
+        connection = sqlite3.connect(path)
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        print(f"{args.db}: schema version {connection.execute('PRAGMA user_version').fetchone()[0]}"
+              + ('' if version is None else ' (after migrations)'))
+
+        flagged = 0
+        for name, table, sql, params in HOT_QUERIES:
+            if table not in tables:
+                print(f"\n{name}: skipped, table {table} does not exist yet")
+                continue
+            plan = [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+            problems = plan_problems(plan)
+            flagged += bool(problems)
+            print(f"\n{name}: {'FULL SCAN' if problems else 'ok'}\n  {sql}")
+            for line in plan:
+                print(f"    {line}")
+        connection.close()
+
+    print(f"\n{len(HOT_QUERIES)} queries, {flagged} flagged")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class TrackedPerson:
+    """A person box carried between keyframes by template matching"""
+
+    def __init__(self, box, template):
+        self.box = box
+        self.template = template
+
+
+class SessionTrack:
+    """Tracker state for one interview session"""
+
+    def __init__(self, persons, detections, frame, interval, now):
+        self.persons = persons
+        self.detections = detections
+        self.previous = frame
+        self.interval = interval
+        self.since_keyframe = 0
+        self.keyframe_at = now
+        self.updated_at = now
+
+
+class PersonTracker:
+    """Maintains a session's person count between full YOLO detections
+
+    Person boxes from a keyframe are followed on small grayscale frames
+    with normalized template matching inside a window around their last
+    position. A keyframe is requested when a match scores below
+    ``min_score``, when more than ``new_region_ratio`` of the pixels
+    outside the tracked boxes changed since the previous frame (someone or
+    something entered), when ``interval`` frames or ``max_staleness``
+    seconds have passed. The interval doubles up to ``max_interval`` while
+    consecutive keyframes agree and drops back to ``min_interval`` when
+    they differ or tracking fails. Object detections are carried over from
+    the last keyframe.
+    """
+
+    def __init__(self, min_interval=2, max_interval=12, max_staleness=3.0, min_score=0.6,
+                 new_region_ratio=0.02, diff_threshold=25, track_size=160, search_margin=0.25,
+                 session_ttl=300.0):
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.max_staleness = float(max_staleness)
+        self.min_score = float(min_score)
+        self.new_region_ratio = float(new_region_ratio)
+        self.diff_threshold = int(diff_threshold)
+        self.track_size = int(track_size)
+        self.search_margin = float(search_margin)
+        self.session_ttl = session_ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+        self._counts = {'tracked': 0, 'first': 0, 'interval': 0, 'stale': 0,
+                        'lost': 0, 'new_region': 0}
+
+    def prepare(self, canvas):
+        """Downscale a square BGR inference canvas to the tracking frame"""
+        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (self.track_size, self.track_size), interpolation=cv2.INTER_AREA)
+
+    def _scale(self, canvas_size):
+        return self.track_size / float(canvas_size)
+
+    def keyframe(self, session_id, frame, boxes, detections, canvas_size, now=None):
+        """Reset a session's tracks from a full detection
+
+        ``boxes`` are person boxes (xyxy) in canvas coordinates and
+        ``detections`` the ``(person_count, objects)`` summary.
+        """
+        now = time.monotonic() if now is None else now
+        scale = self._scale(canvas_size)
+        persons = []
+        for box in np.asarray(boxes, dtype=np.float32).reshape(-1, 4) * scale:
+            x1, y1, x2, y2 = self._clip(box)
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+            persons.append(TrackedPerson((x1, y1, x2, y2), frame[y1:y2, x1:x2].copy()))
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                interval = self.min_interval
+            elif _violation_keys(state.detections) == _violation_keys(detections):
+                interval = min(self.max_interval, state.interval * 2)
+            else:
+                interval = self.min_interval
+            self._sessions[session_id] = SessionTrack(persons, detections, frame, interval, now)
+            self._prune(now)
+
+    def track(self, session_id, frame, now=None):
+        """Return tracked ``(person_count, objects)``, or None if a keyframe is needed"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                self._counts['first'] += 1
+                return None
+            if state.since_keyframe + 1 >= state.interval:
+                self._counts['interval'] += 1
+                return None
+            if now - state.keyframe_at > self.max_staleness:
+                self._counts['stale'] += 1
+                return None
+
+            reason = self._follow(state, frame)
+            state.previous = frame
+            state.updated_at = now
+            if reason is not None:
+                self._counts[reason] += 1
+                state.interval = self.min_interval
+                return None
+
+            state.since_keyframe += 1
+            self._counts['tracked'] += 1
+            _, objects = state.detections
+            return len(state.persons), objects
+
+    def _follow(self, state, frame):
+        # Matches every person box, then checks for motion outside them
+        mask = np.ones(frame.shape, dtype=bool)
+        for person in state.persons:
+            x1, y1, x2, y2 = person.box
+            width, height = x2 - x1, y2 - y1
+            margin_x = int(width * self.search_margin) + 2
+            margin_y = int(height * self.search_margin) + 2
+            sx1, sy1, sx2, sy2 = self._clip((x1 - margin_x, y1 - margin_y, x2 + margin_x, y2 + margin_y))
+            scores = cv2.matchTemplate(frame[sy1:sy2, sx1:sx2], person.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if not np.isfinite(score) or score < self.min_score:
+                return 'lost'
+            mask[y1:y2, x1:x2] = False
+            person.box = (sx1 + dx, sy1 + dy, sx1 + dx + width, sy1 + dy + height)
+            nx1, ny1, nx2, ny2 = person.box
+            mask[ny1:ny2, nx1:nx2] = False
+
+        changed = cv2.absdiff(frame, state.previous) > self.diff_threshold
+        if np.count_nonzero(changed & mask) > self.new_region_ratio * frame.size:
+            return 'new_region'
+        return None
+
+    def _clip(self, box):
+        limit = self.track_size
+        x1, y1, x2, y2 = (int(round(v)) for v in box)
+        return max(0, x1), max(0, y1), min(limit, x2), min(limit, y2)
+
+    def _prune(self, now):
+        if now - self._last_prune > self.session_ttl:
+            stale = [sid for sid, state in self._sessions.items()
+                     if now - state.updated_at > self.session_ttl]
+            for sid in stale:
+                del self._sessions[sid]
+            self._last_prune = now
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            frames = sum(self._counts.values())
+            return {
+                'min_interval': self.min_interval,
+                'max_interval': self.max_interval,
+                'tracked_sessions': len(self._sessions),
+                'tracked_rate': round(self._counts['tracked'] / frames, 4) if frames else 0.0,
+                **self._counts,
+            }
+
+
+def _violation_keys(detections):
+    person_count, objects = detections
+    return person_count, frozenset(name for name, _ in objects)
@@ -0,0 +1,296 @@
+"""Offline emotion analysis of recorded interview videos
+
+Each video is split into chunks of --chunk-frames frames. The chunks go
+to a process pool, and each worker keeps one FacialExpressionAnalyzer
+(tracker plus resident emotion model) for its whole life. Frames are
+decoded as a stream and only every --stride-th frame is retrieved, so
+memory does not grow with video length. A finished chunk is written to
+<output>/<video>.parts/ atomically. An interrupted run picks up where it
+stopped, provided the video, stride and chunk size are unchanged. Once
+all chunks of a video exist, they are merged into a timeline
+(<video>.json or <video>.csv) and <video>.summary.json. summary.json
+aggregates every video in the run.
+
+    python video_batch.py interviews/*.mp4 --stride 5 --workers 4 --format csv
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from emotion import EMOTION_LABELS
+
+CSV_FIELDS = ['frame', 'time_seconds', 'face_id', 'dominant_emotion', 'x', 'y', 'w', 'h', *EMOTION_LABELS]
+
+_analyzer = None
+
+
+def _init_worker(keyframe_interval, threads):
+    global _analyzer
+    cv2.setNumThreads(threads)
+    from sentiment import FacialExpressionAnalyzer
+    _analyzer = FacialExpressionAnalyzer(keyframe_interval=keyframe_interval)
+
+
+def probe(path):
+    """Return (frame_count, fps) without decoding frames"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+
+
+def analyze_chunk(path, start, end, stride, fps, part_path):
+    """Analyze frames [start, end) of a video (to the end if end is None) into part_path"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {path}")
+    stream_id = f"{path}:{start}"
+    tmp_path = f"{part_path}.tmp"
+    sampled = 0
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        with open(tmp_path, 'w') as f:
+            # Keep the first sampled frame of each chunk on the global stride grid
+            for index in range(start, end) if end is not None else itertools.count(start):
+                # grab() skips decoding frames that are not sampled
+                if not cap.grab():
+                    break
+                if index % stride:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                sampled += 1
+                # A failed frame fails the chunk, which stays pending for a rerun
+                results = _analyzer.analyze_frame_emotions(frame, stream_id=stream_id, raise_errors=True)
+                row = {'frame': index, 'time_seconds': round(index / fps, 3), 'faces': [
+                    {
+                        'face_id': f"{start}-{result['face_id']}",
+                        'dominant_emotion': result['dominant_emotion'],
+                        'region': result['region'],
+                        'emotion': {label: round(float(score), 3) for label, score in result['emotion'].items()}
+                    } for result in results
+                ]}
+                f.write(json.dumps(row) + '\n')
+        os.replace(tmp_path, part_path)
+    finally:
+        cap.release()
+        _analyzer.forget(stream_id)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return sampled
+
+
+class VideoSummary:
+    """Running aggregates over one video's timeline"""
+
+    def __init__(self, path, frame_count, fps, stride):
+        self.path = path
+        self.frame_count = frame_count
+        self.fps = fps
+        self.stride = stride
+        self.sampled_frames = 0
+        self.frames_with_face = 0
+        self.faces = 0
+        self.dominant_counts = {label: 0 for label in EMOTION_LABELS}
+        self.score_sums = {label: 0.0 for label in EMOTION_LABELS}
+
+    def add(self, row):
+        self.sampled_frames += 1
+        if row['faces']:
+            self.frames_with_face += 1
+        for face in row['faces']:
+            self.faces += 1
+            self.dominant_counts[face['dominant_emotion']] += 1
+            for label in EMOTION_LABELS:
+                self.score_sums[label] += face['emotion'][label]
+
+    def to_dict(self):
+        faces = self.faces or 1
+        return {
+            'video': self.path,
+            'duration_seconds': round(self.frame_count / self.fps, 3) if self.fps else None,
+            'fps': self.fps,
+            'stride': self.stride,
+            'sampled_frames': self.sampled_frames,
+            'frames_with_face': self.frames_with_face,
+            'face_observations': self.faces,
+            'dominant_emotion': max(self.dominant_counts, key=self.dominant_counts.get) if self.faces else None,
+            'dominant_share': {label: round(count / faces, 4) for label, count in self.dominant_counts.items()},
+            'mean_scores': {label: round(total / faces, 3) for label, total in self.score_sums.items()}
+        }
+
+
+def iter_rows(parts_dir):
+    for part in sorted(glob.glob(os.path.join(parts_dir, '*.jsonl'))):
+        with open(part) as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def merge(path, name, parts_dir, output_dir, output_format, frame_count, fps, stride):
+    """Stream the chunk files into the final timeline and return the video summary"""
+    summary = VideoSummary(path, frame_count, fps, stride)
+    timeline_path = os.path.join(output_dir, f"{name}.{output_format}")
+    tmp_path = f"{timeline_path}.tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        if output_format == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for row in iter_rows(parts_dir):
+                summary.add(row)
+                for face in row['faces']:
+                    writer.writerow({
+                        'frame': row['frame'], 'time_seconds': row['time_seconds'],
+                        'face_id': face['face_id'], 'dominant_emotion': face['dominant_emotion'],
+                        **face['region'], **face['emotion']
+                    })
+        else:
+            f.write('{"video": %s, "fps": %s, "stride": %d, "timeline": [' % (json.dumps(path), fps, stride))
+            for i, row in enumerate(iter_rows(parts_dir)):
+                summary.add(row)
+                f.write((',\n' if i else '\n') + json.dumps(row))
+            f.write('\n]}\n')
+    os.replace(tmp_path, timeline_path)
+
+    result = summary.to_dict()
+    with open(os.path.join(output_dir, f"{name}.summary.json"), 'w') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def prepare_parts(path, parts_dir, stride, chunk_frames):
+    """Reuse existing chunk files only if they were made from the same video and settings"""
+    stat = os.stat(path)
+    manifest = {'video': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                'stride': stride, 'chunk_frames': chunk_frames}
+    manifest_path = os.path.join(parts_dir, 'manifest.json')
+    if os.path.isdir(parts_dir):
+        try:
+            with open(manifest_path) as f:
+                if json.load(f) == manifest:
+                    return
+        except (OSError, ValueError):
+            pass
+        print(f"Discarding stale partial results for {path}")
+        shutil.rmtree(parts_dir)
+    os.makedirs(parts_dir)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+
+def run(videos, output_dir, stride=5, workers=2, chunk_frames=9000, output_format='json',
+        keyframe_interval=10, threads_per_worker=1):
+    os.makedirs(output_dir, exist_ok=True)
+    names = {}
+    for path in videos:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in names:
+            raise SystemExit(f"Two inputs share the name {name}: {names[name]} and {path}")
+        names[name] = path
+
+    jobs = {}
+    tasks = []
+    for name, path in names.items():
+        frame_count, fps = probe(path)
+        parts_dir = os.path.join(output_dir, f"{name}.parts")
+        prepare_parts(path, parts_dir, stride, chunk_frames)
+        pending = set()
+        # The frame count is only an estimate for many containers (VFR, webm),
+        # so the last chunk reads until the stream ends; containers without a
+        # count are analyzed as a single chunk
+        chunks = [(start, start + chunk_frames) for start in range(0, frame_count, chunk_frames)]
+        if chunks:
+            chunks[-1] = (chunks[-1][0], None)
+        for start, end in chunks or [(0, None)]:
+            part_path = os.path.join(parts_dir, f"{start:010d}.jsonl")
+            if not os.path.exists(part_path):
+                pending.add(start)
+                tasks.append((name, path, start, end, fps, part_path))
+        jobs[name] = {'path': path, 'parts_dir': parts_dir, 'frame_count': frame_count,
+                      'fps': fps, 'pending': pending}
+        skipped = max(len(chunks), 1) - len(pending)
+        print(f"{path}: {frame_count} frames at {fps:.1f} fps, {len(pending)} chunks to analyze"
+              + (f", {skipped} already done" if skipped else ''))
+
+    summaries = {}
+
+    def finish(name):
+        job = jobs[name]
+        summaries[name] = merge(job['path'], name, job['parts_dir'], output_dir, output_format,
+                                job['frame_count'], job['fps'], stride)
+        print(f"Finished {job['path']}")
+
+    for name, job in jobs.items():
+        if not job['pending']:
+            finish(name)
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(keyframe_interval, threads_per_worker)) as pool:
+            futures = {pool.submit(analyze_chunk, path, start, end, stride, fps, part_path): (name, start)
+                       for name, path, start, end, fps, part_path in tasks}
+            for future in as_completed(futures):
+                name, start = futures[future]
+                try:
+                    sampled = future.result()
+                except Exception as e:
+                    print(f"Error analyzing {jobs[name]['path']} from frame {start}: {e}")
+                    continue
+                jobs[name]['pending'].discard(start)
+                print(f"{jobs[name]['path']}: chunk at frame {start} done ({sampled} frames sampled)")
+                if not jobs[name]['pending']:
+                    finish(name)
+
+    incomplete = [jobs[name]['path'] for name in jobs if name not in summaries]
+    overall = {
+        'videos': [summaries[name] for name in sorted(summaries)],
+        'incomplete': incomplete,
+        'stride': stride
+    }
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(overall, f, indent=2)
+    return overall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('videos', nargs='+', help='video files or glob patterns')
+    parser.add_argument('--output-dir', default='video_analysis')
+    parser.add_argument('--stride', type=int, default=5, help='analyze every Nth frame')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--chunk-frames', type=int, default=9000, help='frames per resumable work unit')
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--keyframe-interval', type=int, default=10)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    args = parser.parse_args()
+
+    videos = []
+    for pattern in args.videos:
+        matches = sorted(glob.glob(pattern))
+        videos.extend(matches or [pattern])
+
+    overall = run(videos, args.output_dir, stride=max(1, args.stride), workers=args.workers,
+                  chunk_frames=max(1, args.chunk_frames), output_format=args.format,
+                  keyframe_interval=args.keyframe_interval, threads_per_worker=args.threads_per_worker)
+    if overall['incomplete']:
+        print(f"Incomplete (rerun to resume): {', '.join(overall['incomplete'])}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()